@@ -28,6 +28,13 @@ import uuid
 import openai
 from contextlib import contextmanager
 
+from streamlit_agent.chatbot_core.llm_client import (
+    LLM_MAX_RETRIES,
+    LLM_TIMEOUT,
+    get_client,
+    shared_http_client,
+)
+
 
 # Ensure necessary packages are installed
 def install_package(package):
@@ -434,7 +441,13 @@ messages = [
 prompt = ChatPromptTemplate.from_messages(messages)
 
 # Specify the model name gpt-4o-mini in ChatOpenAI
-chain = prompt | ChatOpenAI(api_key=openai_api_key, model="gpt-4o-mini")
+chain = prompt | ChatOpenAI(
+    api_key=openai_api_key,
+    model="gpt-4o-mini",
+    timeout=LLM_TIMEOUT,
+    max_retries=LLM_MAX_RETRIES,
+    http_client=shared_http_client(),
+)
 chain_with_history = RunnableWithMessageHistory(
     chain,
     lambda session_id: msgs,
@@ -443,7 +456,15 @@ chain_with_history = RunnableWithMessageHistory(
 )
 
 # Setup agent for SQL
-llm = ChatOpenAI(api_key=openai_api_key, model="gpt-4o-mini", temperature=0, streaming=True)
+llm = ChatOpenAI(
+    api_key=openai_api_key,
+    model="gpt-4o-mini",
+    temperature=0,
+    streaming=True,
+    timeout=LLM_TIMEOUT,
+    max_retries=LLM_MAX_RETRIES,
+    http_client=shared_http_client(),
+)
 
 
 # Function to read Excel file into SQLite file-based database
@@ -604,8 +625,8 @@ def prettify_intermediate_steps(steps):
     return "\n\n".join(prettified_steps)
 
 
-# Ensure the OpenAI client is correctly instantiated
-client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Shared OpenAI client (keep-alive pool, timeouts, retries with backoff, concurrency limit)
+client = get_client()
 
 
 def explain_intermediate_steps(intermediate_steps):
@@ -1,14 +1,18 @@
 import streamlit as st
+import asyncio
 import time
 import random
 import json
-import os
 from datetime import datetime, timedelta, timezone
-from openai import OpenAI
 from dotenv import load_dotenv
-import chromadb
-import pdfplumber
-import uuid
+from chatbot_core import get_retriever
+from chatbot_core.llm_client import get_async_client, get_client
+from chatbot_core.length_fitter import fit_length
+from chatbot_core.spelling import autocorrect_local, get_spell_checker
+from chatbot_core.async_pipeline import PipelineRunner, run_sync
+from chatbot_core.speculation import (
+    SPECULATIVE, estimate_prompt_tokens, record_dropped, record_used, speculation_stats
+)
 import random
 from docx import Document
 import html
@@ -20,7 +24,10 @@ import html
 ############################################################
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Gemeinsamer Client: Keep-Alive-Pool, Timeouts, Retries, Parallelitätslimit
+client = get_client()
+# Async-Client für die Pipeline-Stufen (läuft im Hintergrund-Loop von chatbot_core.async_pipeline)
+aclient = get_async_client()
 
 MODEL_MAIN = "gpt-4.1"
 MODEL_SPELL = "gpt-4o-mini"
@@ -338,42 +345,26 @@ if st.session_state.phase == "learning":
     # RAG SETUP
     # ============================================================
 
-    PDF_PATH = "streamlit_agent/relevante_Informationen_Paper.pdf"
-
-    def load_chroma():
-        chroma_client = chromadb.PersistentClient(path="./chroma_marine_snow")
-        if "marine_snow" in [c.name for c in chroma_client.list_collections()]:
-            return chroma_client.get_collection("marine_snow")
-
-        col = chroma_client.create_collection("marine_snow")
-
-        with pdfplumber.open(PDF_PATH) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                text = page.extract_text()
-                if not text:
-                    continue
-                for para in text.split("\n"):
-                    if len(para.strip()) < 50:
-                        continue
-                    col.add(
-                        documents=[para.strip()],
-                        ids=[str(uuid.uuid4())],
-                        metadatas=[{"page": page_num + 1}]
-                    )
-        return col
-
-    collection = load_chroma()
+    # Gemeinsamer Retriever – Collection wird über chatbot_core.ingest batchweise aufgebaut
+    retriever = get_retriever()
 
     def rag_section(query):
-        result = collection.query(query_texts=[query], n_results=1)
-        return result["documents"][0][0]
+        # Hybride Suche (BM25 + Vektor) über chatbot_core.hybrid
+        return retriever.rag_section(query)
 
     # ============================================================
     # SPELLCHECK
     # ============================================================
 
-    def autocorrect(text):
-        r = client.chat.completions.create(
+    # Lokales Wörterbuch (Paper + IEs) – das LLM nur bei sehr verrauschter Eingabe
+    spell_checker = get_spell_checker(IEs, retriever.collection)
+
+    async def autocorrect(text):
+        corrected, needs_llm = autocorrect_local(spell_checker, text)
+        if not needs_llm:
+            return corrected
+
+        r = await aclient.chat.completions.create(
             model=MODEL_SPELL,
             temperature=0,
             messages=[{"role": "user", "content": f"Korrigiere ohne Kommentar:\n{text}"}]
@@ -570,7 +561,7 @@ if st.session_state.phase == "learning":
     """
 
 
-    def classify_input(user_text, last_bot_answer):
+    async def classify_input(user_text, last_bot_answer):
         """
         Returns one of:
         - OUT_OF_SCOPE
@@ -600,7 +591,7 @@ if st.session_state.phase == "learning":
     Gib NUR die Kategorie als Wort zurück.
     """ 
 
-        r = client.chat.completions.create(
+        r = await aclient.chat.completions.create(
             model="gpt-4o-mini",
             temperature=0,
             messages=[{"role": "user", "content": prompt}]
@@ -615,31 +606,27 @@ if st.session_state.phase == "learning":
     TARGET_MIN = 800
     TARGET_MAX = 1000
 
-    def enforce_length(text):
-        attempt = text
-
-        for _ in range(5):
-            length = len(attempt)
-
-            if TARGET_MIN <= length <= TARGET_MAX:
-                return attempt
-
-            fix_prompt = f"""
-    Korrigiere folgenden Text so, dass er zwingend zwischen {TARGET_MIN} und {TARGET_MAX} Zeichen lang ist.
+    def expand_text(text):
+        # Einziger LLM-Aufruf der Längenanpassung – nur wenn der Text zu kurz ist
+        expand_prompt = f"""
+    Erweitere folgenden Text so, dass er zwischen {TARGET_MIN} und {TARGET_MAX} Zeichen lang ist.
     WICHTIG: LEERZEICHEN werden MITGEZÄHLT.
-    Inhalt NICHT verändern.
+    Nur Inhalte ergänzen, die zum Text passen. Bestehende Aussagen NICHT verändern.
     Keine Metakommentare, keine Hinweise auf Regeln.
 
     Text:
-    {attempt}
+    {text}
     """
-            attempt = client.chat.completions.create(
-                model=MODEL_MAIN,
-                messages=[{"role": "user", "content": fix_prompt}],
-                temperature=0
-            ).choices[0].message.content.strip()
 
-        return attempt
+        return client.chat.completions.create(
+            model=MODEL_MAIN,
+            messages=[{"role": "user", "content": expand_prompt}],
+            temperature=0
+        ).choices[0].message.content.strip()
+
+    def enforce_length(text):
+        # Kürzen passiert lokal (satzweise), Erweitern mit höchstens einem Aufruf
+        return fit_length(text, TARGET_MIN, TARGET_MAX, expand_fn=expand_text)
     # ============================================================
     # CHATBOT PIPELINE als Funktion für Tests
     # ============================================================
@@ -650,119 +637,164 @@ if st.session_state.phase == "learning":
 
         with st.spinner(spinner_text):
 
-            corrected = autocorrect(user_text)
             last_answer = st.session_state.memory.get("last_bot_answer", "")
-            
-            category = classify_input(corrected, last_answer)
 
-            if category == "OUT_OF_SCOPE":
-                return FALLBACK_RESPONSES[level]
+            # autocorrect → (Gatekeeper ∥ RAG) → Antwort
+            # RAG läuft spekulativ parallel zum Gatekeeper und wird bei
+            # OUT_OF_SCOPE / AFFECT_ONLY abgebrochen. Mit CHATBOT_SPECULATIVE=1
+            # startet auch die Antwort schon, bevor der Gatekeeper fertig ist.
+            usage = {"tokens": 0, "prompt_tokens_est": 0}
+            pipeline = PipelineRunner()
+            pipeline.add("corrected", lambda: autocorrect(user_text))
+            pipeline.add(
+                "category", lambda corrected: classify_input(corrected, last_answer),
+                deps=["corrected"],
+                stop_if=lambda category: category in ("OUT_OF_SCOPE", "AFFECT_ONLY")
+            )
+            pipeline.add(
+                "rag", lambda corrected: rag_section(corrected),
+                deps=["corrected"], speculative=True
+            )
+            pipeline.add(
+                "answer",
+                lambda corrected, rag, category=None: compose_answer(
+                    user_text, corrected, rag, level, last_answer, usage
+                ),
+                deps=["corrected", "rag"] if SPECULATIVE else ["corrected", "category", "rag"],
+                speculative=SPECULATIVE
+            )
+
+            run = run_sync(pipeline.run())
+            results = run["results"]
+            print(f"[PIPELINE] {run['total_ms']:.0f} ms – Stufen {run['timings_ms']}"
+                  + (f", abgebrochen: {run['cancelled']}" if run["cancelled"] else ""))
+
+            if SPECULATIVE:
+                timings = run["timings_ms"]
+                if run["stopped_by"] == "category":
+                    # abgebrochener Aufruf: mindestens der Prompt wurde verarbeitet
+                    record_dropped(timings.get("answer", 0.0),
+                                   usage["tokens"] or usage["prompt_tokens_est"])
+                else:
+                    record_used(timings["category"], timings["answer"], usage["tokens"])
+                print(f"[SPEKULATION] {speculation_stats()}")
+
+            if run["stopped_by"] == "category":
+                if results["category"] == "OUT_OF_SCOPE":
+                    return FALLBACK_RESPONSES[level]
+                return generate_affect_response(results["corrected"], level)
+
+            styled, raw = results["answer"]
 
-            if category == "AFFECT_ONLY":
-                return generate_affect_response(corrected, level)
-            
+            if return_raw:
+                return styled, raw
             
-            # RAG
-            RAG = rag_section(corrected)
-
-            mem = st.session_state.memory
-
-            # Core prompt
-            user_prompt = f"""
-                NUTZEREINGABE: "{corrected}"
-                LETZTE ANTWORT: "{mem['last_bot_answer']}"
-                IEs: {IEs}
-                RAG: "{RAG}"
-
-                Gib deine Antwort im folgenden JSON-Format zurück:
-                {{
-                "intent": "HAUPTFRAGE | SPECIFIC | TERM | FOLLOW-UP | SCOPE | SELF | NONE",
-                "socio_affect": "NONE | NEGATIVE | NEUTRAL | POSITIVE",
-                "content": "ANTWORTTEXT"
-                }}
-
-                WICHTIG:
-                - content enthält NUR den Antworttext
-                - KEINE Erklärungen außerhalb des JSON
-                """
-
-            # Schritt 1: Rohinhalt
-            raw = client.chat.completions.create(
-                model=MODEL_MAIN,
-                temperature=0.2,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": user_prompt}
-                ]
-            ).choices[0].message.content.strip()
-            parsed = json.loads(raw)
-            intent = parsed["intent"]
-            raw_text = parsed["content"]
-            socio_affect = parsed["socio_affect"]   
-            # 🔒 FINALER FALLBACK – nichts anderes darf mehr greifen
-            if intent not in ["HAUPTFRAGE", "SPECIFIC", "TERM", "FOLLOW-UP", "SCOPE", "SELF", "NONE"]:
-                return FALLBACK_RESPONSES[level]
-
-
-            if not raw_text or raw_text.strip() == "":
-                return FALLBACK_RESPONSES[level]
-
-            if intent == "NONE":
-                return generate_affect_response(user_text, level)
+            return styled
+
+    async def compose_answer(user_text, corrected, RAG, level, last_answer, usage):
+        """
+        Hauptaufruf → Längenanpassung → Stil. Gibt (styled, raw) zurück.
+        usage sammelt den Tokenverbrauch (für die Spekulations-Zähler).
+        """
+
+        # Core prompt
+        user_prompt = f"""
+            NUTZEREINGABE: "{corrected}"
+            LETZTE ANTWORT: "{last_answer}"
+            IEs: {IEs}
+            RAG: "{RAG}"
+
+            Gib deine Antwort im folgenden JSON-Format zurück:
+            {{
+            "intent": "HAUPTFRAGE | SPECIFIC | TERM | FOLLOW-UP | SCOPE | SELF | NONE",
+            "socio_affect": "NONE | NEGATIVE | NEUTRAL | POSITIVE",
+            "content": "ANTWORTTEXT"
+            }}
+
+            WICHTIG:
+            - content enthält NUR den Antworttext
+            - KEINE Erklärungen außerhalb des JSON
+            """
+
+        # Schritt 1: Rohinhalt
+        usage["prompt_tokens_est"] = estimate_prompt_tokens(SYSTEM_PROMPT, user_prompt)
+        response = await aclient.chat.completions.create(
+            model=MODEL_MAIN,
+            temperature=0.2,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ]
+        )
+        usage["tokens"] += response.usage.total_tokens
+        raw = response.choices[0].message.content.strip()
+        parsed = json.loads(raw)
+        intent = parsed["intent"]
+        raw_text = parsed["content"]
+        socio_affect = parsed["socio_affect"]   
+        # 🔒 FINALER FALLBACK – nichts anderes darf mehr greifen
+        if intent not in ["HAUPTFRAGE", "SPECIFIC", "TERM", "FOLLOW-UP", "SCOPE", "SELF", "NONE"]:
+            return FALLBACK_RESPONSES[level], raw
+
+
+        if not raw_text or raw_text.strip() == "":
+            return FALLBACK_RESPONSES[level], raw
+
+        if intent == "NONE":
+            return await asyncio.to_thread(generate_affect_response, user_text, level), raw
             
-            if intent == "SELF":
-                persona_text = SELF_PERSONA[level]
-
-                # Optional: leicht stilistisch glätten (ohne Inhalt zu ändern)
-                style_prompt = f"""
-                Formuliere den folgenden Text stilistisch um mit diesen Regeln:
-                {ANTHRO[level]}
-                WICHTIG:
-                - Inhalt NICHT verändern
-                - Keine neuen Informationen hinzufügen
-                - Keine Dialogangebote
-                - Gib nur gefragte Informationen zurück (Bsp. Name bei "Wie heißt du?" oder Alles bei "Erzähl mir etwas über dich")
-                Text:
-                {persona_text}
-                """
-
-                styled_persona = client.chat.completions.create(
-                    model=MODEL_MAIN,
-                    temperature=0.2,
-                    messages=[{"role": "user", "content": style_prompt}]
-                ).choices[0].message.content.strip()
-
-                return styled_persona    
-
-            if intent in ["HAUPTFRAGE", "SPECIFIC"]:
-                raw_text = enforce_length(raw_text)
-
-            # Schritt 3: Anthropomorphes Umschreiben
+        if intent == "SELF":
+            persona_text = SELF_PERSONA[level]
+
+            # Optional: leicht stilistisch glätten (ohne Inhalt zu ändern)
             style_prompt = f"""
             Formuliere den folgenden Text stilistisch um mit diesen Regeln:
             {ANTHRO[level]}
-            SEHR WICHTIG:
-            - Beginne die Antwort IMMER direkt mit fachlichem Inhalt
-            - KEINE Gesprächseinstiege (z. B. „Wow“, „Hey“, „Hast du schon mal“)
-            - KEINE rhetorischen Fragen
-            - KEINE Ausrufe zur Aufmerksamkeitserzeugung
-            - Keine Smalltalk-Elemente
-            - Keine Meta-Kommentare
-            Text: {raw_text}    
+            WICHTIG:
+            - Inhalt NICHT verändern
+            - Keine neuen Informationen hinzufügen
+            - Keine Dialogangebote
+            - Gib nur gefragte Informationen zurück (Bsp. Name bei "Wie heißt du?" oder Alles bei "Erzähl mir etwas über dich")
+            Text:
+            {persona_text}
             """
-            
-            styled = client.chat.completions.create(
-                model=MODEL_MAIN,
-                temperature=0.25,
-                messages=[
-                    {"role": "user", "content": style_prompt}
-                ]
-            ).choices[0].message.content.strip()
 
-            if return_raw:
-                return styled, raw
+            styled_persona = (await aclient.chat.completions.create(
+                model=MODEL_MAIN,
+                temperature=0.2,
+                messages=[{"role": "user", "content": style_prompt}]
+            )).choices[0].message.content.strip()
+
+            return styled_persona, raw
+
+        if intent in ["HAUPTFRAGE", "SPECIFIC"]:
+            raw_text = await asyncio.to_thread(enforce_length, raw_text)
+
+        # Schritt 3: Anthropomorphes Umschreiben
+        style_prompt = f"""
+        Formuliere den folgenden Text stilistisch um mit diesen Regeln:
+        {ANTHRO[level]}
+        SEHR WICHTIG:
+        - Beginne die Antwort IMMER direkt mit fachlichem Inhalt
+        - KEINE Gesprächseinstiege (z. B. „Wow“, „Hey“, „Hast du schon mal“)
+        - KEINE rhetorischen Fragen
+        - KEINE Ausrufe zur Aufmerksamkeitserzeugung
+        - Keine Smalltalk-Elemente
+        - Keine Meta-Kommentare
+        Text: {raw_text}    
+        """
             
-            return styled
+        response = await aclient.chat.completions.create(
+            model=MODEL_MAIN,
+            temperature=0.25,
+            messages=[
+                {"role": "user", "content": style_prompt}
+            ]
+        )
+        usage["tokens"] += response.usage.total_tokens
+        styled = response.choices[0].message.content.strip()
+
+        return styled, raw
         
     def generate_affect_response(user_text, level):
         response = client.chat.completions.create(
@@ -2,13 +2,11 @@ import streamlit as st
 import time
 import random
 import json
-import os
 from datetime import datetime, timedelta, timezone
-from openai import OpenAI
 from dotenv import load_dotenv
-import chromadb
-import pdfplumber
-import uuid
+from chatbot_core import get_retriever
+from chatbot_core.llm_client import get_client
+from chatbot_core.length_fitter import fit_length
 import random   
 from docx import Document
 import html
@@ -20,7 +18,8 @@ import html
 ############################################################
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Gemeinsamer Client: Keep-Alive-Pool, Timeouts, Retries, Parallelitätslimit
+client = get_client()
 
 MODEL_MAIN = "gpt-4.1"
 MODEL_SPELL = "gpt-4o-mini"
@@ -361,35 +360,12 @@ if st.session_state.phase == "learning":
     # RAG SETUP
     # ============================================================
 
-    PDF_PATH = "streamlit_agent/relevante_Informationen_Paper.pdf"
-
-    def load_chroma():
-        chroma_client = chromadb.PersistentClient(path="./chroma_marine_snow")
-        if "marine_snow" in [c.name for c in chroma_client.list_collections()]:
-            return chroma_client.get_collection("marine_snow")
-
-        col = chroma_client.create_collection("marine_snow")
-
-        with pdfplumber.open(PDF_PATH) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                text = page.extract_text()
-                if not text:
-                    continue
-                for para in text.split("\n"):
-                    if len(para.strip()) < 50:
-                        continue
-                    col.add(
-                        documents=[para.strip()],
-                        ids=[str(uuid.uuid4())],
-                        metadatas=[{"page": page_num + 1}]
-                    )
-        return col
-
-    collection = load_chroma()
+    # Gemeinsamer Retriever – Collection wird über chatbot_core.ingest batchweise aufgebaut
+    retriever = get_retriever()
 
     def rag_section(query):
-        result = collection.query(query_texts=[query], n_results=1)
-        return result["documents"][0][0]
+        # Hybride Suche (BM25 + Vektor) über chatbot_core.hybrid
+        return retriever.rag_section(query)
 
     # ============================================================
     # SYSTEMPROMPT (Wissenschaftlich, kein Stil)
@@ -526,32 +502,27 @@ if st.session_state.phase == "learning":
     TARGET_MIN = 800
     TARGET_MAX = 1000
 
-    def enforce_length(text):
-        attempt = text
-
-        for _ in range(5):
-            length = len(attempt)
-
-            if TARGET_MIN <= length <= TARGET_MAX:
-                return attempt
-
-            fix_prompt = f"""
-    Korrigiere folgenden Text so, dass er zwingend zwischen {TARGET_MIN} und {TARGET_MAX} Zeichen lang ist.
+    def expand_text(text):
+        # Einziger LLM-Aufruf der Längenanpassung – nur wenn der Text zu kurz ist
+        expand_prompt = f"""
+    Erweitere folgenden Text so, dass er zwischen {TARGET_MIN} und {TARGET_MAX} Zeichen lang ist.
     WICHTIG: LEERZEICHEN werden MITGEZÄHLT.
-    Inhalt NICHT verändern.
+    Nur Inhalte ergänzen, die zum Text passen. Bestehende Aussagen NICHT verändern.
     Keine Metakommentare, keine Hinweise auf Regeln.
 
     Text:
-    {attempt}
+    {text}
     """
 
-            attempt = client.chat.completions.create(
-                model=MODEL_MAIN,
-                messages=[{"role": "user", "content": fix_prompt}],
-                temperature=0
-            ).choices[0].message.content.strip()
+        return client.chat.completions.create(
+            model=MODEL_MAIN,
+            messages=[{"role": "user", "content": expand_prompt}],
+            temperature=0
+        ).choices[0].message.content.strip()
 
-        return attempt[:TARGET_MAX]
+    def enforce_length(text):
+        # Kürzen passiert lokal (satzweise), Erweitern mit höchstens einem Aufruf
+        return fit_length(text, TARGET_MIN, TARGET_MAX, expand_fn=expand_text)
 
     def generate_answer(user_text, level, return_raw=False):
         
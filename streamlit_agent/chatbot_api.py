@@ -2,25 +2,26 @@
 # chatbot_api.py
 # Bietet eine Funktion run_chatbot(), die direkt den Chatbot
 # aus Python aufruft – ohne Streamlit UI.
+#
+# Nutzt die Pipeline aus chatbot_core.pipeline (dieselbe wie
+# survey_v2.py); kein Streamlit-Skript wird mehr importiert.
 # ============================================================
 
-from streamlit_agent.marine_snow_chatbot_v1 import generate_raw_answer, apply_anthro_style
+from dotenv import load_dotenv
 
-# ⬆️ WICHTIG:
-# Ersetze "streamlit_chatbot" durch den tatsächlichen Dateinamen
-# deines Chatbot-Scripts, falls er anders heißt.
+# OPENAI_API_KEY & Co. aus .env – vor dem ersten Client (bisher über marine_snow_chatbot_v1)
+load_dotenv()
 
+from streamlit_agent.chatbot_core.pipeline import generate_answer, new_memory
 
-def run_chatbot(question: str, level: int):
+
+def run_chatbot(question: str, level: int, memory=None, use_cache=False):
     """
     Führt den Chatbot aus, aber ohne Streamlit.
     Gibt den finalen Text zurück.
+    memory: dict aus new_memory() für Folgefragen (sonst frisch pro Aufruf)
+    use_cache: Standard False – Tests sollen das Modell prüfen, nicht die Caches
     """
-
-    # Schritt 1: Rohinhalt erzeugen (Intent, IEs, RAG…)
-    raw = generate_raw_answer(question)
-
-    # Schritt 2: Stil anwenden (Anthropomorphiestufe)
-    styled = apply_anthro_style(raw, level)
-
-    return styled
+    if memory is None:
+        memory = new_memory()
+    return generate_answer(question, level, memory, use_cache=use_cache)
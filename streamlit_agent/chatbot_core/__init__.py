@@ -0,0 +1,33 @@
+# ============================================================
+# chatbot_core – gemeinsame Bausteine der Marine-Snow-Chatbots
+#
+# Exporte werden erst beim Zugriff importiert (PEP 562), damit
+# `import chatbot_core.xyz` nicht Chroma & Co. mitlädt.
+#
+# Die Module lesen ihre Schalter (LLM_BACKEND, LLM_CASSETTE,
+# CHATBOT_GENERATION_MODE, BULK_WORKERS, ...) beim Import. Die Apps
+# importieren chatbot_core vor ihrem eigenen load_dotenv() – deshalb
+# wird .env hier geladen, bevor irgendein Untermodul läuft.
+# ============================================================
+
+import importlib
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_LAZY_EXPORTS = {
+    "get_retriever": "retriever",
+    "warm_up_retriever": "retriever",
+    "generate_answer": "pipeline",
+    "new_memory": "pipeline",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".{_LAZY_EXPORTS[name]}", __name__)
+    return getattr(module, name)
@@ -0,0 +1,241 @@
+# ============================================================
+# answer_cache.py
+# Vorberechnete Antworten für die Standardfragen.
+#
+# Alle Standardfragen (Definition, Bedeutung, Entstehung,
+# Probenahme, Abbau – jede Formulierung) werden offline einmal pro
+# Anthropomorphiestufe durch die komplette Pipeline geschickt. Zur
+# Laufzeit wird eine Nutzerfrage per Fuzzy-Matching der nächsten
+# Standardfrage zugeordnet – bei einem engen Treffer kommt deren
+# Antwort direkt aus dem Cache.
+#
+# Die Cache-Datei trägt eine Version (Hash über Prompts, IEs, ...).
+# Ändert sich ein Prompt, passt die Version nicht mehr und der
+# Cache wird ignoriert, bis er neu gebaut wurde.
+#
+# Aufbau (aus dem Repo-Root, braucht OPENAI_API_KEY):
+#   python -m streamlit_agent.chatbot_core.answer_cache --build
+#   python -m streamlit_agent.chatbot_core.answer_cache --build --levels 0 2
+# ============================================================
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from rapidfuzz import fuzz, process
+
+from .query_cache import normalize_query
+
+ANSWER_CACHE_PATH = "./data/answer_cache.json"
+MATCH_THRESHOLD = 92      # rapidfuzz-Score (0–100) auf normalisiertem Text
+LEVELS = (0, 1, 2)
+
+# Standardfragen je Thema (aus TEST_QUERIES in chatbot_v2.py).
+# Jede Formulierung bekommt beim Aufbau eine eigene Antwort.
+CANONICAL_QUERIES = {
+    "definition": [
+        "Was ist Meeresschnee?",
+        "Erkläre Meeresschnee.",
+        "Definiere Meeresschnee.",
+        "Was versteht man unter Meeresschnee?",
+        "Gib eine Definition von Meeresschnee.",
+        "Worum handelt es sich bei Meeresschnee?",
+        "Was bedeutet der Begriff Meeresschnee?",
+        "Was genau ist Meeresschnee?",
+        "Kannst du Meeresschnee definieren?"
+    ],
+    "sampling": [
+        "Wie wird Meeresschnee gesammelt?",
+        "Wie sampelt man Meeresschnee?",
+        "Wie gewinnt man Proben von Meeresschnee?",
+        "Wie wird Meeresschnee in der Forschung entnommen?",
+        "Wie nimmt man Proben von Meeresschnee?",
+        "Wie erfolgt die Probenahme von Meeresschnee?",
+        "Wie gelangt man an Meeresschneeproben?",
+        "Welche Methoden nutzt man zur Sammlung von Meeresschnee?"
+    ],
+    "formation": [
+        "Wie entsteht Meeresschnee?",
+        "Wodurch bildet sich Meeresschnee?",
+        "Welche Prozesse führen zu Meeresschnee?",
+        "Wie kommt Meeresschnee zustande?",
+        "Wie formt sich Meeresschnee?",
+        "Wie entsteht das Phänomen Meeresschnee?",
+        "Welche Mechanismen erzeugen Meeresschnee?"
+    ],
+    "importance": [
+        "Warum ist Meeresschnee wichtig?",
+        "Weshalb ist Meeresschnee von Bedeutung?",
+        "Warum braucht man Meeresschnee für das Ökosystem?",
+        "Welche Funktion erfüllt Meeresschnee?",
+        "Warum spielt Meeresschnee im Meer eine große Rolle?",
+        "Wieso ist Meeresschnee ökologisch relevant?",
+        "Welche ökologische Rolle übernimmt Meeresschnee?"
+    ],
+    "degradation": [
+        "Wie zerfällt Meeresschnee?",
+        "Wie wird Meeresschnee abgebaut?",
+        "Warum verschwindet Meeresschnee?",
+        "Welche Prozesse führen zum Zerfall von Meeresschnee?",
+        "Warum nimmt die Menge an Meeresschnee ab?"
+    ]
+}
+
+
+def prompt_version(*parts):
+    """Kurzer Hash über alles, was die Antworten beeinflusst (Prompts, IEs, Modell)."""
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(repr(part).encode("utf-8"))
+        sha.update(b"\x00")
+    return sha.hexdigest()[:16]
+
+
+class AnswerCache:
+
+    def __init__(self, version, path=ANSWER_CACHE_PATH, threshold=MATCH_THRESHOLD):
+        self.version = version
+        self.path = path
+        self.threshold = threshold
+
+        # normalisierte Formulierung → (Thema, Standardfrage)
+        self._choices = {
+            normalize_query(q): (topic, q)
+            for topic, questions in CANONICAL_QUERIES.items()
+            for q in questions
+        }
+        self.answers = {}
+        self.stats = {"hits": 0, "misses": 0}
+        self.load()
+
+    # --------------------------------------------------------
+    # Datei
+    # --------------------------------------------------------
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != self.version:
+            print(f"[CACHE] {self.path} ist veraltet – Antwort-Cache deaktiviert")
+            return
+        self.answers = data.get("answers", {})
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": self.version,
+                "created": datetime.now().isoformat(),
+                "answers": self.answers,
+            }, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    # --------------------------------------------------------
+    # Laufzeit
+    # --------------------------------------------------------
+
+    def match(self, question):
+        """(Thema, Standardfrage) der nächsten Formulierung oder None."""
+        match = process.extractOne(
+            normalize_query(question), self._choices.keys(),
+            scorer=fuzz.ratio, score_cutoff=self.threshold
+        )
+        return self._choices[match[0]] if match else None
+
+    def match_topic(self, question):
+        match = self.match(question)
+        return match[0] if match else None
+
+    def lookup(self, question, level):
+        """Gecachte Antwort (dict mit raw/styled) oder None."""
+        match = self.match(question) if self.answers else None
+        entry = self.answers.get(match[1], {}).get(str(level)) if match else None
+
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        print(f"[CACHE] Antwort aus Cache ({match[0]}: \"{match[1]}\", Level {level})")
+        return entry
+
+    # --------------------------------------------------------
+    # Offline-Aufbau
+    # --------------------------------------------------------
+
+    def build(self, generate_fn, levels=LEVELS):
+        """
+        generate_fn(frage, level) → (styled, raw). Erzeugt für jede
+        Standardfrage und Stufe eine Antwort und speichert sie; Antworten
+        anderer Stufen bleiben erhalten.
+        """
+        answers = dict(self.answers)
+        total = sum(len(questions) for questions in CANONICAL_QUERIES.values()) * len(levels)
+        done = 0
+        for topic, questions in CANONICAL_QUERIES.items():
+            for question in questions:
+                entries = answers.setdefault(question, {})
+                for level in levels:
+                    start = time.perf_counter()
+                    styled, raw = generate_fn(question, level)
+                    entries[str(level)] = {
+                        "topic": topic,
+                        "question": question,
+                        "raw": raw,
+                        "styled": styled,
+                    }
+                    done += 1
+                    print(f"[CACHE] {done}/{total} {topic} / Level {level} in "
+                          f"{time.perf_counter() - start:.1f} s: {question}")
+
+        self.answers = answers
+        self.save()
+        return answers
+
+
+# ============================================================
+# SINGLETON
+# ============================================================
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache(version, path=ANSWER_CACHE_PATH):
+    """Prozessweiter Antwort-Cache; bei neuer Version wird neu geladen."""
+    global _answer_cache
+
+    with _answer_cache_lock:
+        if _answer_cache is None or _answer_cache.version != version or _answer_cache.path != path:
+            _answer_cache = AnswerCache(version, path)
+        return _answer_cache
+
+
+# ============================================================
+# CLI
+# ============================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Antwort-Cache der Standardfragen")
+    parser.add_argument("--build", action="store_true",
+                        help="alle Standardfragen je Level durch die Pipeline schicken und speichern")
+    parser.add_argument("--levels", type=int, nargs="+", default=list(LEVELS), choices=LEVELS)
+    args = parser.parse_args()
+
+    if not args.build:
+        parser.print_help()
+        raise SystemExit(1)
+
+    # Pipeline erst hier laden – Client und Retriever nur für den Aufbau
+    from .pipeline import generate_answer, get_resources
+
+    cache = get_resources()["answer_cache"]
+    cache.build(lambda q, lvl: generate_answer(q, lvl, return_raw=True, use_cache=False), levels=args.levels)
+    print(f"[CACHE] {len(cache.answers)} Standardfragen gespeichert in {cache.path} (Version {cache.version})")
@@ -0,0 +1,136 @@
+# ============================================================
+# async_pipeline.py
+# Kleiner asyncio-Runner für die Chatbot-Pipeline.
+#
+# Stufen (autocorrect, classify, RAG, Generierung, ...) werden mit
+# ihren Abhängigkeiten registriert. Alles, dessen Abhängigkeiten
+# erfüllt sind, läuft gleichzeitig – z. B. RAG parallel zum
+# Gatekeeper. Liefert eine Gate-Stufe ein Abbruchergebnis
+# (OUT_OF_SCOPE), werden noch laufende Stufen abgebrochen.
+#
+# Synchrone Funktionen laufen per asyncio.to_thread, async-Funktionen
+# (AsyncOpenAI) direkt im Loop.
+# ============================================================
+
+import asyncio
+import inspect
+import threading
+import time
+
+
+class PipelineRunner:
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, name, fn, deps=(), stop_if=None, speculative=False):
+        """
+        fn bekommt die Ergebnisse der Abhängigkeiten als Keyword-Argumente
+        (Name der Stufe = Argumentname).
+        stop_if(ergebnis) → True beendet die Pipeline nach dieser Stufe.
+        speculative: Stufe läuft, bevor feststeht, ob sie gebraucht wird.
+        """
+        self.stages[name] = {
+            "fn": fn,
+            "deps": tuple(deps),
+            "stop_if": stop_if,
+            "speculative": speculative,
+        }
+        return self
+
+    async def _call(self, name, kwargs, timings):
+        fn = self.stages[name]["fn"]
+        start = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(fn):
+                return await fn(**kwargs)
+            result = await asyncio.to_thread(fn, **kwargs)
+            if inspect.isawaitable(result):
+                # lambda, die eine Coroutine zurückgibt
+                result = await result
+            return result
+        finally:
+            timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    async def run(self, inputs=None):
+        """
+        Führt alle Stufen aus. Rückgabe:
+        {"results": {...}, "stopped_by": name | None,
+         "cancelled": [...], "timings_ms": {...}, "total_ms": float}
+        """
+        start = time.perf_counter()
+        results = dict(inputs or {})
+        pending = [name for name in self.stages if name not in results]
+        running = {}
+        timings = {}
+        stopped_by = None
+        cancelled = []
+
+        try:
+            while pending or running:
+                for name in list(pending):
+                    deps = self.stages[name]["deps"]
+                    if all(d in results for d in deps):
+                        pending.remove(name)
+                        kwargs = {d: results[d] for d in deps}
+                        task = asyncio.create_task(self._call(name, kwargs, timings))
+                        running[task] = name
+
+                if not running:
+                    raise ValueError(f"Unerfüllbare Abhängigkeiten: {pending}")
+
+                finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    name = running.pop(task)
+                    results[name] = task.result()
+
+                    stop_if = self.stages[name]["stop_if"]
+                    if stop_if is not None and stop_if(results[name]):
+                        stopped_by = name
+                        break
+
+                if stopped_by:
+                    cancelled = [n for t, n in running.items() if not t.done()] + pending
+                    break
+        finally:
+            # Abbruch oder Fehler: spekulative/übrige Arbeit verwerfen
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        return {
+            "results": results,
+            "stopped_by": stopped_by,
+            "cancelled": cancelled,
+            "timings_ms": timings,
+            "total_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+
+
+# ============================================================
+# EVENT LOOP IM HINTERGRUND
+# ============================================================
+# Streamlit-Skripte laufen synchron. Ein dauerhafter Loop in einem
+# eigenen Thread erlaubt es, einen AsyncOpenAI-Client (und dessen
+# Verbindungen) über alle Reruns hinweg wiederzuverwenden.
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def background_loop():
+    global _loop
+
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="pipeline-loop", daemon=True
+            ).start()
+        return _loop
+
+
+def run_sync(coro, timeout=None):
+    """Führt eine Coroutine im Hintergrund-Loop aus und wartet auf das Ergebnis."""
+    return asyncio.run_coroutine_threadsafe(coro, background_loop()).result(timeout)
@@ -0,0 +1,264 @@
+# ============================================================
+# bulk_eval.py
+# Nebenläufige Bulk-Evaluation für run_bulk_test().
+#
+# - Testfälle werden vorab geplant (topic, Frage, Level); der Seed
+#   ist die run_id – jeder neue Lauf zieht eine frische Stichprobe,
+#   ein abgebrochener Lauf plant beim Fortsetzen exakt dieselben Fälle
+# - Worker-Pool (Threads) mit adaptivem Limit: bei Rate-Limits wird
+#   die Parallelität halbiert, bei Erfolgen langsam wieder erhöht
+#   (AIMD); zusätzlich begrenzt ein Token-Bucket die Anfragen/Minute.
+#   Fälle mit Rate-Limit werden im selben Lauf erneut eingereiht.
+# - Jedes Ergebnis wird sofort in SQLite geschrieben (Checkpoint).
+#   Derselbe run_id setzt fort und überspringt erledigte Fälle.
+# - load_results() liefert den Store als DataFrame für
+#   analyze_results() und die Plot-Funktionen
+# ============================================================
+
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import pandas as pd
+
+BULK_STORE_PATH = os.getenv("BULK_STORE_PATH", "./data/bulk_results.db")
+BULK_WORKERS = int(os.getenv("BULK_WORKERS", "8"))
+BULK_RPM = float(os.getenv("BULK_RPM", "120"))      # Testfälle pro Minute (0 = unbegrenzt)
+BULK_REQUEUE = 3            # max. Neueinreihungen pro Fall bei Rate-Limit
+LEVELS = (0, 1, 2)
+
+
+# ============================================================
+# PLANUNG
+# ============================================================
+
+def new_run_id():
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def plan_cases(test_queries, n, run_id, levels=LEVELS):
+    """n Testfälle, deterministisch pro run_id (Seed) – Fortsetzen plant dieselben Fälle."""
+    rng = random.Random(run_id)
+    cases = []
+    for i in range(1, n + 1):
+        topic = rng.choice(list(test_queries.keys()))
+        cases.append({
+            "case_id": i,
+            "topic": topic,
+            "question": rng.choice(test_queries[topic]),
+            "level": rng.choice(list(levels)),
+        })
+    return cases
+
+
+# ============================================================
+# SCHEDULER: AIMD-LIMIT + TOKEN-BUCKET
+# ============================================================
+
+def is_rate_limit(exc):
+    return type(exc).__name__ == "RateLimitError" or "429" in str(exc)
+
+
+class AdaptiveLimiter:
+
+    def __init__(self, max_workers, rpm=BULK_RPM, success_step=5):
+        self.max_workers = max_workers
+        self.limit = max_workers
+        self.in_flight = 0
+        self.success_step = success_step
+        self._successes = 0
+        self._cond = threading.Condition()
+
+        self.interval = 60.0 / rpm if rpm else 0.0
+        self._next_slot = time.monotonic()
+        self.stats = {"rate_limited": 0, "min_limit": max_workers}
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+
+            # Token-Bucket: Starts gleichmäßig über die Minute verteilen
+            now = time.monotonic()
+            wait = max(0.0, self._next_slot - now)
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait:
+            time.sleep(wait)
+
+    def release(self, ok=True, rate_limited=False):
+        with self._cond:
+            self.in_flight -= 1
+            if rate_limited:
+                self.limit = max(1, self.limit // 2)
+                self._successes = 0
+                self.stats["rate_limited"] += 1
+                self.stats["min_limit"] = min(self.stats["min_limit"], self.limit)
+                print(f"[BULK] Rate-Limit – Parallelität auf {self.limit} reduziert")
+            elif ok:
+                self._successes += 1
+                if self._successes >= self.success_step and self.limit < self.max_workers:
+                    self.limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
+
+
+# ============================================================
+# STORE (SQLite)
+# ============================================================
+
+def _connect(path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS bulk_results (
+            run_id TEXT NOT NULL,
+            case_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            finished TEXT,
+            PRIMARY KEY (run_id, case_id)
+        )
+    """)
+    return conn
+
+
+def completed_cases(path, run_id):
+    conn = _connect(path)
+    rows = conn.execute(
+        "SELECT case_id FROM bulk_results WHERE run_id = ? AND status = 'ok'", (run_id,)
+    ).fetchall()
+    conn.close()
+    return {r[0] for r in rows}
+
+
+def load_results(path=BULK_STORE_PATH, run_id=None, include_errors=False):
+    """Alle (bzw. die Ergebnisse eines Laufs) als DataFrame, eine Zeile pro Testfall."""
+    if not os.path.exists(path):
+        return pd.DataFrame()
+
+    conn = _connect(path)
+    query = "SELECT run_id, case_id, status, result, error FROM bulk_results"
+    params = ()
+    if run_id is not None:
+        query += " WHERE run_id = ?"
+        params = (run_id,)
+    rows = conn.execute(query + " ORDER BY run_id, case_id", params).fetchall()
+    conn.close()
+
+    records = []
+    for rid, case_id, status, result, error in rows:
+        if status != "ok" and not include_errors:
+            continue
+        record = json.loads(result) if result else {}
+        record.update({"run_id": rid, "case_id": case_id, "status": status})
+        if error:
+            record["error"] = error
+        records.append(record)
+    return pd.DataFrame(records)
+
+
+def latest_run_id(path=BULK_STORE_PATH):
+    if not os.path.exists(path):
+        return None
+    conn = _connect(path)
+    row = conn.execute(
+        "SELECT run_id FROM bulk_results ORDER BY finished DESC LIMIT 1"
+    ).fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+def results_frame(df=None, run_id=None, path=BULK_STORE_PATH):
+    """Übergebenes DataFrame oder Lauf aus dem Store (ohne run_id: letzter Lauf)."""
+    if df is not None:
+        return df
+    return load_results(path, run_id or latest_run_id(path))
+
+
+# ============================================================
+# ENGINE
+# ============================================================
+
+def run_bulk(evaluate_fn, cases, run_id=None, store_path=BULK_STORE_PATH,
+             workers=BULK_WORKERS, rpm=BULK_RPM, requeue=BULK_REQUEUE):
+    """
+    evaluate_fn(case) -> dict mit den Testergebnissen (muss "test_ok" enthalten).
+    cases aus plan_cases(..., run_id). Gibt (run_id, DataFrame des Laufs) zurück.
+    """
+    run_id = run_id or new_run_id()
+    done = completed_cases(store_path, run_id)
+    todo = [c for c in cases if c["case_id"] not in done]
+    print(f"[BULK] Lauf {run_id}: {len(todo)} offen, {len(done)} bereits im Checkpoint")
+
+    limiter = AdaptiveLimiter(workers, rpm)
+
+    def task(case, attempt):
+        if attempt:
+            # Neueinreihung nach Rate-Limit: kurz warten, bevor der Slot belegt wird
+            time.sleep(min(2 ** attempt, 30))
+        limiter.acquire()
+        start = time.perf_counter()
+        try:
+            result = evaluate_fn(case)
+        except Exception as e:
+            limiter.release(ok=False, rate_limited=is_rate_limit(e))
+            raise
+        limiter.release(ok=True)
+        result.setdefault("latency_s", round(time.perf_counter() - start, 2))
+        return result
+
+    start = time.perf_counter()
+    finished = 0
+    conn = _connect(store_path)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bulk") as pool:
+        pending = {pool.submit(task, case, 0): (case, 0) for case in todo}
+
+        # nur dieser Thread schreibt in SQLite
+        while pending:
+            completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in completed:
+                case, attempt = pending.pop(future)
+                try:
+                    result = dict(case, **future.result())
+                    row = ("ok", json.dumps(result, ensure_ascii=False, default=str), None)
+                except Exception as e:
+                    if is_rate_limit(e) and attempt < requeue:
+                        print(f"[BULK] Fall {case['case_id']} Rate-Limit – erneut eingereiht "
+                              f"({attempt + 1}/{requeue})")
+                        pending[pool.submit(task, case, attempt + 1)] = (case, attempt + 1)
+                        continue
+                    print(f"[BULK] Fall {case['case_id']} ❌ {type(e).__name__}: {e}")
+                    row = ("error", None, f"{type(e).__name__}: {e}")
+
+                conn.execute(
+                    "INSERT OR REPLACE INTO bulk_results VALUES (?, ?, ?, ?, ?, ?)",
+                    (run_id, case["case_id"], *row, datetime.now().isoformat(timespec="seconds")),
+                )
+                conn.commit()
+
+                finished += 1
+                if finished % 10 == 0 or finished == len(todo):
+                    rate = finished / (time.perf_counter() - start) * 60
+                    print(f"[BULK] {finished}/{len(todo)} fertig ({rate:.0f}/min, Limit {limiter.limit})")
+    conn.close()
+
+    return run_id, load_results(store_path, run_id)
+
+
+def print_summary(df, n):
+    passed = int(df["test_ok"].sum()) if not df.empty else 0
+    print("\n===== BULK-TEST FERTIG =====")
+    print(f"Gesamt: {n} Testfälle")
+    print(f"Bestanden: {passed}")
+    print(f"Fehlgeschlagen: {n - passed}")
+    print(f"Erfolgsquote: {passed / n * 100:.2f}%" if n else "Erfolgsquote: -")
+    if not df.empty and "latency_s" in df:
+        print(f"Latenz Ø {df['latency_s'].mean():.1f} s, p90 {df['latency_s'].quantile(0.9):.1f} s")
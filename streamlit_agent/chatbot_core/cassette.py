@@ -0,0 +1,184 @@
+# ============================================================
+# cassette.py
+# Aufzeichnen/Abspielen aller chat.completions-Aufrufe.
+#
+# LLM_CASSETTE:
+#   off     (Standard) – nichts
+#   record  – jeder Aufruf wird protokolliert
+#   replay  – identische Anfragen (Modell, Nachrichten, temperature
+#             und alle übrigen Parameter) kommen aus der Aufzeichnung;
+#             unbekannte gehen an das Modell und werden ergänzt
+#
+# Ablage: eine JSONL-Datei pro Tag unter LLM_CASSETTE_DIR, eine
+# Zeile pro Aufruf:
+#   {"prompt_hash", "model", "temperature", "content",
+#    "latency_ms", "usage", "ts"}
+#
+# Dasselbe Format liest fake_llm im replay-Backend (LLM_FIXTURES
+# darf auf das Verzeichnis zeigen).
+#
+# Damit laufen wiederholte chatbot_v3.run_bulk_test- und
+# tests/test_engine.run_all_tests-Läufe gegen dieselben Antworten,
+# ohne erneut für aufgezeichnete Aufrufe zu zahlen. Offline ist das
+# NICHT: Fehlschläge gehen an die API (OPENAI_API_KEY nötig), und
+# der Retriever lädt beim ersten Start das Chroma-Embedding-Modell.
+# LLM_CASSETTE_LATENCY=1 spielt zusätzlich die aufgezeichnete
+# Latenz nach.
+# ============================================================
+
+import asyncio
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from .fake_llm import chunk, completion, load_fixtures, request_hash, stream_pieces
+
+LLM_CASSETTE = os.getenv("LLM_CASSETTE", "off")
+LLM_CASSETTE_DIR = os.getenv("LLM_CASSETTE_DIR", "./data/llm_cassettes")
+LLM_CASSETTE_LATENCY = os.getenv("LLM_CASSETTE_LATENCY", "0") == "1"
+
+CASSETTE_MODES = ("off", "record", "replay")
+
+
+def _usage_dict(result):
+    usage = getattr(result, "usage", None)
+    if usage is None:
+        return None
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "total_tokens": usage.total_tokens,
+    }
+
+
+class Cassette:
+
+    def __init__(self, mode=LLM_CASSETTE, directory=LLM_CASSETTE_DIR, replay_latency=LLM_CASSETTE_LATENCY):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unbekannter Kassettenmodus: {mode}")
+        self.mode = mode
+        self.directory = directory
+        self.replay_latency = replay_latency
+        self._lock = threading.Lock()
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0}
+
+        # prompt_hash -> Zeile (inkl. Latenz)
+        self.entries = load_fixtures(directory, full_rows=True) if mode == "replay" else {}
+
+    # --------------------------------------------------------
+    # Aufzeichnen
+    # --------------------------------------------------------
+
+    def shard_path(self):
+        return os.path.join(self.directory, f"{datetime.now():%Y-%m-%d}.jsonl")
+
+    def _append(self, kwargs, content, latency_ms, usage):
+        row = {
+            "prompt_hash": request_hash(kwargs),
+            "model": kwargs.get("model"),
+            "temperature": kwargs.get("temperature"),
+            "content": content,
+            "latency_ms": round(latency_ms, 1),
+            "usage": usage,
+            "ts": datetime.now().isoformat(timespec="seconds"),
+        }
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.shard_path(), "a", encoding="utf-8") as f:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            self.entries[row["prompt_hash"]] = row
+            self.stats["recorded"] += 1
+
+    def record(self, kwargs, result, latency_ms):
+        """Nimmt das Ergebnis auf; Streams werden durchgereicht und am Ende gespeichert."""
+        if not kwargs.get("stream"):
+            self._append(kwargs, result.choices[0].message.content, latency_ms, _usage_dict(result))
+            return result
+        return self._record_stream(kwargs, result, time.perf_counter() - latency_ms / 1000)
+
+    def _record_stream(self, kwargs, stream, started):
+        pieces = []
+        for part in stream:
+            if part.choices and part.choices[0].delta.content:
+                pieces.append(part.choices[0].delta.content)
+            yield part
+        self._append(kwargs, "".join(pieces), (time.perf_counter() - started) * 1000, None)
+
+    async def record_async(self, kwargs, result, latency_ms):
+        # Schreiben im Thread – die Datei-I/O blockiert sonst die Event-Loop
+        if not kwargs.get("stream"):
+            return await asyncio.to_thread(self.record, kwargs, result, latency_ms)
+        return self._record_async_stream(kwargs, result, time.perf_counter() - latency_ms / 1000)
+
+    async def _record_async_stream(self, kwargs, stream, started):
+        pieces = []
+        async for part in stream:
+            if part.choices and part.choices[0].delta.content:
+                pieces.append(part.choices[0].delta.content)
+            yield part
+        await asyncio.to_thread(self._append, kwargs, "".join(pieces),
+                                (time.perf_counter() - started) * 1000, None)
+
+    # --------------------------------------------------------
+    # Abspielen
+    # --------------------------------------------------------
+
+    def _lookup(self, kwargs):
+        if self.mode != "replay":
+            return None
+        row = self.entries.get(request_hash(kwargs))
+        with self._lock:
+            self.stats["replayed" if row else "misses"] += 1
+        return row
+
+    def _response(self, kwargs, row):
+        if kwargs.get("stream"):
+            return (chunk(piece) for piece in stream_pieces(row["content"]))
+        return completion(row["content"], row["model"], list(kwargs.get("messages", [])))
+
+    def replay(self, kwargs):
+        """Aufgezeichnete Antwort (Form wie openai) oder None."""
+        row = self._lookup(kwargs)
+        if row is None:
+            return None
+        if self.replay_latency:
+            time.sleep(row["latency_ms"] / 1000)
+        return self._response(kwargs, row)
+
+    async def replay_async(self, kwargs):
+        row = self._lookup(kwargs)
+        if row is None:
+            return None
+        if self.replay_latency:
+            await asyncio.sleep(row["latency_ms"] / 1000)
+        if kwargs.get("stream"):
+            return self._astream(row["content"])
+        return self._response(kwargs, row)
+
+    async def _astream(self, content):
+        for piece in stream_pieces(content):
+            yield chunk(piece)
+
+
+# ============================================================
+# SINGLETON
+# ============================================================
+
+_cassette = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette():
+    """Prozessweite Kassette oder None (LLM_CASSETTE=off)."""
+    global _cassette
+
+    if LLM_CASSETTE == "off":
+        return None
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = Cassette()
+            print(f"[CASSETTE] Modus {_cassette.mode}, {len(_cassette.entries)} Aufnahmen "
+                  f"in {_cassette.directory}")
+        return _cassette
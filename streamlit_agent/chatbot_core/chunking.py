@@ -0,0 +1,196 @@
+# ============================================================
+# chunking.py
+# Semantisches Chunking für das RAG-Paper.
+#
+# pdfplumber liefert Zeilen, keine Absätze. Statt jede Zeile
+# einzeln zu indizieren, werden die Zeilen wieder zu Fließtext
+# zusammengefügt (inkl. Silbentrennung), in Sätze zerlegt und
+# zu Fenstern mit fester Token-Größe und Überlappung gebündelt.
+# Seite und Abschnitt bleiben als Metadaten erhalten.
+# ============================================================
+
+import re
+
+CHUNK_TOKENS = 200
+CHUNK_OVERLAP = 40
+MIN_CHUNK_CHARS = 50
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+
+def count_tokens(text):
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    # Fallback ohne tiktoken: Wörter + Satzzeichen als Näherung
+    return len(re.findall(r"\w+|[^\w\s]", text))
+
+
+# ============================================================
+# ABSCHNITTE + REFLOW
+# ============================================================
+
+HEADING_RE = re.compile(
+    r"^(\d+(\.\d+)*\.?|[IVX]+\.)\s+[A-ZÄÖÜ][^.!?]{2,80}$"
+)
+
+KNOWN_HEADINGS = {
+    "abstract", "zusammenfassung", "einleitung", "einführung",
+    "methoden", "ergebnisse", "diskussion", "fazit", "schlussfolgerung",
+    "literatur", "literaturverzeichnis", "danksagung",
+}
+
+
+def is_heading(line):
+    line = line.strip()
+    if not line or len(line) > 90:
+        return False
+    if line.lower().rstrip(":") in KNOWN_HEADINGS:
+        return True
+    if HEADING_RE.match(line):
+        return True
+    letters = [c for c in line if c.isalpha()]
+    return len(letters) >= 4 and all(c.isupper() for c in letters) and len(line) <= 60
+
+
+def join_line(buffer, line):
+    """Hängt eine PDF-Zeile an den Fließtext an und löst Silbentrennung auf."""
+    if not buffer:
+        return line
+    if buffer.endswith("-") and line[:1].islower():
+        return buffer[:-1] + line           # Aggre-|gate → Aggregate
+    if buffer.endswith("-"):
+        return buffer + line                # Meeresschnee-|Aggregate
+    return buffer + " " + line
+
+
+# ============================================================
+# SATZERKENNUNG
+# ============================================================
+
+ABBREVIATIONS = [
+    "z. B.", "z.B.", "d. h.", "d.h.", "u. a.", "u.a.", "bzw.", "ca.", "vgl.",
+    "bspw.", "Bsp.", "etc.", "et al.", "sog.", "evtl.", "ggf.", "inkl.", "Abb.",
+    "Tab.", "Nr.", "max.", "min.", "usw.", "i. d. R.",
+]
+_ABBR_MARK = "․"   # Platzhalter für Punkte in Abkürzungen
+
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+(?=[A-ZÄÖÜ0-9„\"(])")
+
+
+def protect_abbreviations(text):
+    for abbr in ABBREVIATIONS:
+        text = text.replace(abbr, abbr.replace(".", _ABBR_MARK))
+    return text
+
+
+def restore_abbreviations(text):
+    return text.replace(_ABBR_MARK, ".")
+
+
+def split_complete_sentences(text):
+    """Gibt (fertige Sätze, unvollständiger Rest) zurück."""
+    parts = SENTENCE_END_RE.split(protect_abbreviations(text))
+    sentences = [restore_abbreviations(p).strip() for p in parts[:-1] if p.strip()]
+    rest = restore_abbreviations(parts[-1]).strip() if parts else ""
+
+    # Rest endet bereits mit Satzzeichen → ebenfalls fertig
+    if rest.endswith((".", "!", "?")) and not protect_abbreviations(rest).endswith(_ABBR_MARK):
+        sentences.append(rest)
+        rest = ""
+
+    return sentences, rest
+
+
+def iter_sentences(pages):
+    """
+    Liefert Sätze als dict(text, page, section) über Seitengrenzen hinweg.
+    Ein Satz erhält die Seite, auf der er beginnt.
+    """
+    section = ""
+    buffer = ""
+    buffer_page = None
+
+    for page, text in pages:
+        for raw_line in text.split("\n"):
+            line = raw_line.strip()
+            if not line:
+                continue
+
+            if is_heading(line):
+                if buffer:
+                    yield {"text": buffer, "page": buffer_page, "section": section}
+                    buffer = ""
+                section = line
+                continue
+
+            if not buffer:
+                buffer_page = page
+            buffer = join_line(buffer, line)
+
+            sentences, buffer = split_complete_sentences(buffer)
+            for sentence in sentences:
+                yield {"text": sentence, "page": buffer_page, "section": section}
+            if sentences:
+                buffer_page = page
+
+    if buffer:
+        yield {"text": buffer, "page": buffer_page, "section": section}
+
+
+# ============================================================
+# FENSTER MIT ÜBERLAPPUNG
+# ============================================================
+
+def _make_chunk(window, section):
+    return {
+        "text": " ".join(s["text"] for s in window),
+        "page": window[0]["page"],
+        "page_end": window[-1]["page"],
+        "section": section,
+    }
+
+
+def iter_windows(sentences, max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP):
+    """
+    Bündelt Sätze zu Fenstern von höchstens max_tokens Tokens. Jedes neue
+    Fenster beginnt mit den letzten Sätzen des vorherigen (bis overlap_tokens).
+    Abschnittsgrenzen werden nie überschritten.
+    """
+    window, window_tokens = [], 0
+    section = None
+
+    for sentence in sentences:
+        tokens = count_tokens(sentence["text"])
+
+        if window and sentence["section"] != section:
+            yield _make_chunk(window, section)
+            window, window_tokens = [], 0
+
+        if window and window_tokens + tokens > max_tokens:
+            yield _make_chunk(window, section)
+
+            overlap, overlap_sum = [], 0
+            for prev in reversed(window):
+                prev_tokens = count_tokens(prev["text"])
+                if overlap_sum + prev_tokens > overlap_tokens:
+                    break
+                overlap.insert(0, prev)
+                overlap_sum += prev_tokens
+            window, window_tokens = overlap, overlap_sum
+
+        section = sentence["section"]
+        window.append(sentence)
+        window_tokens += tokens
+
+    if window:
+        yield _make_chunk(window, section)
+
+
+def semantic_chunks(pages, max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP):
+    for chunk in iter_windows(iter_sentences(pages), max_tokens, overlap_tokens):
+        if len(chunk["text"]) >= MIN_CHUNK_CHARS:
+            yield chunk
@@ -0,0 +1,274 @@
+# ============================================================
+# fake_llm.py
+# Lokaler Ersatz für die OpenAI-API (Lasttests ohne Kontingent).
+#
+# Auswahl über LLM_BACKEND:
+#   openai   (Standard) – echte API
+#   replay   – gespeicherte Antworten aus LLM_FIXTURES (JSONL-Datei
+#              oder Kassetten-Verzeichnis, Schlüssel = prompt_hash über
+#              Modell, Nachrichten und übrige Parameter);
+#              unbekannte Prompts → template
+#   template – deterministisches Schablonenmodell
+#
+# Das Schablonenmodell erkennt die Aufrufart am Prompt:
+#   JSON-Antwort  → dieselben Felder wie im Prompt gefordert
+#                   ("intent", "content_type", "content", ...)
+#   Kategorie     → erstes bekanntes Label (IN_DOMAIN_OR_AMBIGUOUS, YES, ...)
+#   Autokorrektur → Eingabetext unverändert
+#   sonst         → Fließtext aus den Stichpunkten (IEs) im Prompt
+#
+# Latenz über LLM_FAKE_LATENCY (Millisekunden):
+#   "fixed:300" | "uniform:200:1200" | "lognormal:800:0.5" (Median, Sigma)
+#
+# Die Fake-Clients ersetzen nur den rohen OpenAI-Client in
+# llm_client – Semaphore, Retries und Histogramme laufen also mit.
+# ============================================================
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+from .chunking import count_tokens
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+LLM_FIXTURES = os.getenv("LLM_FIXTURES", "./data/llm_fixtures.jsonl")
+LLM_FAKE_LATENCY = os.getenv("LLM_FAKE_LATENCY", "lognormal:800:0.5")
+
+DEFAULT_LABELS = ["IN_DOMAIN_OR_AMBIGUOUS", "IN_DOMAIN", "TOPIC_INTENT", "YES"]
+TEMPLATE_TARGET_CHARS = 900
+STREAM_CHUNK_WORDS = 3
+
+JSON_DEFAULTS = {
+    "intent": "TOPIC",
+    "content_type": "CORE",
+    "socio_affect": "NONE",
+}
+
+
+def prompt_hash(model, messages, **params):
+    # params: übrige Anfrage-Argumente (temperature, max_tokens, ...) – gleiche
+    # Nachrichten mit anderer Temperatur sind eine andere Anfrage
+    payload = json.dumps({"model": model, "messages": messages, **params},
+                         sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def request_hash(kwargs):
+    """prompt_hash für die kwargs eines create()-Aufrufs (stream ändert nur die Auslieferung)."""
+    params = {k: v for k, v in kwargs.items() if k not in ("model", "messages", "stream")}
+    return prompt_hash(kwargs.get("model"), list(kwargs.get("messages", [])), **params)
+
+
+# ============================================================
+# LATENZ
+# ============================================================
+
+def latency_sampler(spec=LLM_FAKE_LATENCY, seed=None):
+    """Gibt eine Funktion zurück, die eine Latenz in Sekunden zieht."""
+    rng = random.Random(seed)
+    kind, *args = spec.split(":")
+    args = [float(a) for a in args]
+
+    if kind == "fixed":
+        return lambda: args[0] / 1000
+    if kind == "uniform":
+        return lambda: rng.uniform(args[0], args[1]) / 1000
+    if kind == "lognormal":
+        median, sigma = args
+        return lambda: median * rng.lognormvariate(0, sigma) / 1000
+    raise ValueError(f"Unbekannte Latenzverteilung: {spec}")
+
+
+# ============================================================
+# SCHABLONENMODELL
+# ============================================================
+
+def _prompt_text(messages):
+    return "\n".join(m.get("content", "") for m in messages)
+
+
+def _json_fields(prompt):
+    # Feldnamen aus dem geforderten JSON-Format, z. B. "content": "ANTWORTTEXT"
+    block = prompt[prompt.rfind("JSON"):]
+    fields = re.findall(r'"(\w+)"\s*:', block) or re.findall(r'"(\w+)"\s*:', prompt)
+    return list(dict.fromkeys(fields))
+
+
+def _bullet_text(prompt, target=TEMPLATE_TARGET_CHARS):
+    bullets = [
+        line.strip().lstrip("-").strip()
+        for line in prompt.splitlines()
+        if line.strip().startswith("-") and len(line.strip()) > 40
+    ]
+    if not bullets:
+        bullets = ["Meeresschnee besteht aus kleinen Aggregaten, die in die Tiefe absinken."]
+
+    sentences = []
+    while sum(len(s) + 1 for s in sentences) < target:
+        sentences.append(bullets[len(sentences) % len(bullets)].rstrip(".") + ".")
+    return " ".join(sentences)
+
+
+def template_answer(messages):
+    prompt = _prompt_text(messages)
+    last = messages[-1].get("content", "") if messages else ""
+
+    if "JSON" in prompt and '"content"' in prompt:
+        text = _bullet_text(prompt)
+        answer = {}
+        for field in _json_fields(prompt):
+            answer[field] = JSON_DEFAULTS.get(field, text)
+        answer.setdefault("content", text)
+        return json.dumps(answer, ensure_ascii=False)
+
+    if re.search(r"NUR .*(Kategorie|zurück)|return:", prompt):
+        for label in DEFAULT_LABELS:
+            if label in prompt:
+                return label
+
+    if last.startswith("Korrigiere") or "spelling mistakes" in last:
+        return [line for line in last.splitlines() if line.strip()][-1].strip()
+
+    return _bullet_text(prompt)
+
+
+# ============================================================
+# FIXTURES (REPLAY)
+# ============================================================
+
+def load_fixtures(path=LLM_FIXTURES, full_rows=False):
+    """
+    prompt_hash -> Antworttext (bzw. ganze Zeile mit full_rows=True).
+    path: JSONL-Datei oder Verzeichnis mit Tages-Shards (cassette.py).
+    """
+    fixtures = {}
+    if os.path.isdir(path):
+        files = [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".jsonl")]
+    elif os.path.exists(path):
+        files = [path]
+    else:
+        return fixtures
+
+    for file in files:
+        with open(file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                # spätere Aufnahmen überschreiben frühere
+                fixtures[row["prompt_hash"]] = row if full_rows else row["content"]
+    return fixtures
+
+
+# ============================================================
+# ANTWORTOBJEKTE (Form wie openai)
+# ============================================================
+
+def _usage(messages, content):
+    prompt_tokens = count_tokens(_prompt_text(messages))
+    completion_tokens = count_tokens(content)
+    return SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+    )
+
+
+def completion(content, model, messages):
+    message = SimpleNamespace(role="assistant", content=content)
+    return SimpleNamespace(
+        model=model,
+        choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")],
+        usage=_usage(messages, content),
+    )
+
+
+def stream_pieces(content):
+    words = content.split(" ")
+    for i in range(0, len(words), STREAM_CHUNK_WORDS):
+        piece = " ".join(words[i:i + STREAM_CHUNK_WORDS])
+        yield piece if i + STREAM_CHUNK_WORDS >= len(words) else piece + " "
+
+
+def chunk(piece):
+    return SimpleNamespace(choices=[SimpleNamespace(index=0, delta=SimpleNamespace(content=piece))])
+
+
+class FakeBackend:
+    """Gemeinsame Logik für den synchronen und den async Client."""
+
+    def __init__(self, mode=LLM_BACKEND, fixtures_path=LLM_FIXTURES, latency=LLM_FAKE_LATENCY):
+        if mode not in ("replay", "template"):
+            raise ValueError(f"Kein lokales Backend: {mode}")
+        self.mode = mode
+        self.fixtures = load_fixtures(fixtures_path) if mode == "replay" else {}
+        self.sample_latency = latency_sampler(latency)
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "replayed": 0, "templated": 0}
+
+    def answer(self, model, messages, **params):
+        key = prompt_hash(model, messages, **params)
+        with self._lock:
+            self.stats["calls"] += 1
+            if key in self.fixtures:
+                self.stats["replayed"] += 1
+                return self.fixtures[key]
+            self.stats["templated"] += 1
+        return template_answer(messages)
+
+
+class _FakeCompletions:
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def create(self, model="fake", messages=(), stream=False, **kwargs):
+        content = self.backend.answer(model, list(messages), **kwargs)
+        delay = self.backend.sample_latency()
+        if not stream:
+            time.sleep(delay)
+            return completion(content, model, messages)
+        return self._stream(content, delay)
+
+    def _stream(self, content, delay):
+        pieces = list(stream_pieces(content))
+        # ~30 % bis zum ersten Token, Rest verteilt auf die Stücke
+        time.sleep(delay * 0.3)
+        for piece in pieces:
+            yield chunk(piece)
+            time.sleep(delay * 0.7 / len(pieces))
+
+
+class _AsyncFakeCompletions(_FakeCompletions):
+
+    async def create(self, model="fake", messages=(), stream=False, **kwargs):
+        content = self.backend.answer(model, list(messages), **kwargs)
+        await asyncio.sleep(self.backend.sample_latency())
+        if stream:
+            return self._astream(content)
+        return completion(content, model, messages)
+
+    async def _astream(self, content):
+        for piece in stream_pieces(content):
+            yield chunk(piece)
+
+
+class FakeOpenAI:
+
+    def __init__(self, backend=None):
+        self.backend = backend or FakeBackend()
+        self.chat = SimpleNamespace(completions=_FakeCompletions(self.backend))
+
+
+class AsyncFakeOpenAI:
+
+    def __init__(self, backend=None):
+        self.backend = backend or FakeBackend()
+        self.chat = SimpleNamespace(completions=_AsyncFakeCompletions(self.backend))
@@ -0,0 +1,93 @@
+# ============================================================
+# generation.py
+# Ein- oder zweistufige Antwortgenerierung.
+#
+# two_pass    : Rohinhalt (Aufruf 1) → Stil-Umschreibung (Aufruf 2)
+# single_pass : ein Aufruf liefert Rohinhalt UND umformulierten
+#               Text als getrennte JSON-Felder (content / styled_content)
+#
+# Umschaltbar pro Deployment über CHATBOT_GENERATION_MODE, damit
+# beide Varianten (Latenz, Bulk-Test-Quote) verglichen werden können.
+#
+# CHATBOT_STREAMING=1 (Standard): der letzte Stil-Aufruf wird
+# tokenweise gestreamt, statt auf die komplette Antwort zu warten.
+# ============================================================
+
+import json
+import os
+import re
+import time
+
+TWO_PASS = "two_pass"
+SINGLE_PASS = "single_pass"
+
+GENERATION_MODE = os.getenv("CHATBOT_GENERATION_MODE", TWO_PASS)
+if GENERATION_MODE not in (TWO_PASS, SINGLE_PASS):
+    print(f"[GEN] Unbekannter Modus '{GENERATION_MODE}' – nutze {TWO_PASS}")
+    GENERATION_MODE = TWO_PASS
+
+
+STREAMING = os.getenv("CHATBOT_STREAMING", "1") == "1"
+
+
+def is_single_pass():
+    return GENERATION_MODE == SINGLE_PASS
+
+
+def style_rules(anthro_rules):
+    """Stilregeln – Quelle für style_rewrite_prompt() und das styled_content-Feld."""
+    return f"""
+    {anthro_rules}
+    SEHR WICHTIG:
+    - Erwähne NIEMALS die Anthropomorphiestufe.
+    - Keine Hinweise auf Regeln.
+    - Keine Metakommentare.
+    - Keine Rhetorischen Fragen.
+    """
+
+
+def style_rewrite_prompt(anthro_rules, text):
+    """Zweiter Aufruf im two_pass-Modus (gleiche Regeln wie styled_content)."""
+    return f"""
+    Formuliere den folgenden Text stilistisch um mit diesen Regeln:
+    {style_rules(anthro_rules)}
+    - Gib nur den Text zurück.
+    Text: {text}
+    """
+
+
+def styled_field_instructions(anthro_rules):
+    """Zusatz zum Nutzerprompt im single_pass-Modus."""
+    return f"""
+    ZUSÄTZLICHES FELD "styled_content":
+    - Enthält denselben Inhalt wie "content", aber stilistisch umformuliert mit diesen Regeln:
+    {style_rules(anthro_rules)}
+    - "content" bleibt der sachliche Rohtext OHNE Stilregeln.
+    """
+
+
+def parse_structured(raw):
+    """JSON aus der Modellantwort lesen (auch wenn sie in ```json ... ``` steckt)."""
+    text = raw.strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    return json.loads(text)
+
+
+def stream_text(stream, started=None):
+    """
+    Textstücke aus einer Completion mit stream=True (für st.write_stream).
+    Loggt die Zeit vom Start der Pipeline bis zum ersten Token.
+    """
+    first = True
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        if first and started is not None:
+            print(f"[STREAM] Erstes Token nach {time.perf_counter() - started:.2f} s")
+        first = False
+        yield delta
@@ -0,0 +1,264 @@
+# ============================================================
+# hybrid.py
+# Hybride Suche: BM25 (FTS5-Tabellen von Chroma) + Vektorsuche,
+# kombiniert per Reciprocal Rank Fusion (RRF).
+#
+# Chroma legt für jede Collection bereits eine FTS5-Tabelle
+# (embedding_fulltext_search, Trigram-Tokenizer) an. Die lexikalische
+# Suche liest sie direkt aus der SQLite-Datei – ohne Embedding.
+# Fast Path: erst die FTS-Abfrage (< 1 ms); ist der beste Treffer
+# eindeutig – seltene Stichwörter (Dokumentfrequenz) UND klarer
+# BM25-Abstand zu Treffer 2 –, entfällt das Query-Embedding ganz.
+# "Was ist Meeresschnee?" ist das nicht: "meeresschnee" steht in
+# vielen Chunks, die BM25-Werte liegen dicht beieinander.
+# Ohne Fast Path laufen lexikalische und Vektorsuche parallel.
+#
+# Davor sitzt optional ein QueryCache: wiederholte Fragen kosten
+# weder Embedding noch Suche, nur ein collection.get() nach IDs.
+# ============================================================
+
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .ingest import CHROMA_PATH
+from .query_cache import normalize_query
+from .text_analysis import STOPWORDS_DE
+
+RRF_K = 60
+FAST_PATH_MAX_TERMS = 3
+# jedes Stichwort in höchstens 5 % der Chunks (mindestens IDF)
+FAST_PATH_MAX_DF = 0.05
+# BM25 von Treffer 1 mindestens 1,25× so gut wie Treffer 2
+FAST_PATH_MARGIN = 1.25
+
+
+def query_terms(query):
+    """Inhaltswörter der Anfrage (Trigram-FTS braucht mind. 3 Zeichen)."""
+    tokens = re.findall(r"\w+", query.lower())
+    terms = []
+    for t in tokens:
+        if len(t) >= 3 and t not in STOPWORDS_DE and t not in terms:
+            terms.append(t)
+    return terms
+
+
+def fts_match_expression(terms):
+    return " OR ".join('"' + t.replace('"', '""') + '"' for t in terms)
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """rankings: Liste von ID-Listen (bestes Ergebnis zuerst)."""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class HybridRetriever:
+
+    def __init__(self, collection, sqlite_path=None, rrf_k=RRF_K, fast_path=True, cache=None):
+        self.collection = collection
+        self.cache = cache
+        self.sqlite_path = sqlite_path or os.path.join(CHROMA_PATH, "chroma.sqlite3")
+        self.rrf_k = rrf_k
+        self.fast_path = fast_path
+
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid-rag")
+        self._segment_id = self._metadata_segment_id()
+        self._doc_freq = {}              # Stichwort -> Anteil der Chunks mit Treffer
+        self._doc_freq_lock = threading.Lock()
+        # gleiche Embedding-Funktion wie beim Aufbau der Collection
+        # (Import hier: query_terms soll ohne Chroma ladbar sein)
+        from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+        self._embedding_fn = DefaultEmbeddingFunction()
+
+        self._stats_lock = threading.Lock()
+        self.stats = {"queries": 0, "fast_path": 0, "lexical_errors": 0}
+
+    def _count(self, key):
+        # query() läuft aus mehreren Threads (Bulk-Tests, Pool)
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    # --------------------------------------------------------
+    # SQLite (read-only, eine Verbindung pro Thread)
+    # --------------------------------------------------------
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.sqlite_path}?mode=ro", uri=True)
+            self._local.conn = conn
+        return conn
+
+    def _metadata_segment_id(self):
+        row = self._connection().execute(
+            "SELECT id FROM segments WHERE collection = ? AND scope = 'METADATA'",
+            (str(self.collection.id),)
+        ).fetchone()
+        return row[0] if row else None
+
+    # --------------------------------------------------------
+    # Einzelsuchen
+    # --------------------------------------------------------
+
+    def lexical(self, terms, k):
+        """BM25-Ranking über die FTS5-Tabelle. Liefert [(id, dokument)]."""
+        return [(doc_id, doc) for doc_id, doc, _ in self.lexical_scored(terms, k)]
+
+    def lexical_scored(self, terms, k):
+        """Wie lexical(), mit BM25-Wert: [(id, dokument, score)], score < 0, kleiner = besser."""
+        if not terms or self._segment_id is None:
+            return []
+
+        try:
+            rows = self._connection().execute(
+                """
+                SELECT e.embedding_id, f.string_value, bm25(embedding_fulltext_search)
+                FROM embedding_fulltext_search f
+                JOIN embeddings e ON e.id = f.rowid
+                WHERE embedding_fulltext_search MATCH ? AND e.segment_id = ?
+                ORDER BY bm25(embedding_fulltext_search)
+                LIMIT ?
+                """,
+                (fts_match_expression(terms), self._segment_id, k)
+            ).fetchall()
+        except sqlite3.Error as e:
+            # Schema von Chroma geändert o. Ä. → still auf Vektorsuche zurückfallen
+            print(f"[RAG] FTS-Abfrage fehlgeschlagen: {e}")
+            self._count("lexical_errors")
+            return []
+
+        return [(doc_id, doc, score) for doc_id, doc, score in rows]
+
+    def doc_freq(self, term):
+        """Anteil der Chunks, die das Stichwort enthalten (pro Prozess gecacht)."""
+        with self._doc_freq_lock:
+            if term in self._doc_freq:
+                return self._doc_freq[term]
+
+        conn = self._connection()
+        try:
+            total = conn.execute(
+                "SELECT count(*) FROM embeddings WHERE segment_id = ?", (self._segment_id,)
+            ).fetchone()[0]
+            matches = conn.execute(
+                """
+                SELECT count(*)
+                FROM embedding_fulltext_search f
+                JOIN embeddings e ON e.id = f.rowid
+                WHERE embedding_fulltext_search MATCH ? AND e.segment_id = ?
+                """,
+                (fts_match_expression([term]), self._segment_id)
+            ).fetchone()[0]
+        except sqlite3.Error:
+            self._count("lexical_errors")
+            return 1.0
+        freq = matches / total if total else 1.0
+
+        with self._doc_freq_lock:
+            self._doc_freq[term] = freq
+        return freq
+
+    def embed(self, query):
+        return [float(x) for x in self._embedding_fn([query])[0]]
+
+    def vector(self, query, k, embedding=None):
+        if embedding is None:
+            embedding = self.embed(query)
+        result = self.collection.query(query_embeddings=[embedding], n_results=k)
+        return list(zip(result["ids"][0], result["documents"][0]))
+
+    def documents_by_id(self, ids):
+        """Dokumente in der Reihenfolge der IDs – None, falls eine ID fehlt."""
+        result = self.collection.get(ids=ids, include=["documents"])
+        found = dict(zip(result["ids"], result["documents"]))
+        if len(found) < len(ids):
+            return None     # Collection wurde inzwischen neu synchronisiert
+        return [found[i] for i in ids]
+
+    def is_strong_match(self, terms, hits):
+        """
+        Eindeutiger Stichworttreffer (hits aus lexical_scored): kurze Frage,
+        alle Stichwörter im besten Treffer, jedes Stichwort selten und der
+        beste Treffer mit klarem BM25-Abstand zu Treffer 2.
+        """
+        if not hits or not terms or len(terms) > FAST_PATH_MAX_TERMS:
+            return False
+        top = hits[0][1].lower()
+        if not all(t in top for t in terms):
+            return False
+        if any(self.doc_freq(t) > FAST_PATH_MAX_DF for t in terms):
+            return False
+        if len(hits) > 1 and hits[0][2] > hits[1][2] * FAST_PATH_MARGIN:
+            return False
+        return True
+
+    # --------------------------------------------------------
+    # Hybride Suche
+    # --------------------------------------------------------
+
+    def query(self, query, k=1, candidates=10):
+        """Gibt die besten k Dokumente (Text) zurück."""
+        self._count("queries")
+
+        key, cached = None, None
+        if self.cache is not None:
+            key = self._cache_key(query)
+            cached = self.cache.get(key)
+            if cached and cached["k"] >= k:
+                documents = self.documents_by_id(cached["ids"][:k])
+                if documents is not None:
+                    return documents
+
+        embedding = cached["embedding"] if cached else None
+        ids, documents, embedding = self._search(query, k, candidates, embedding)
+
+        if self.cache is not None:
+            # Fast Path: kein Embedding berechnet (None) – es wird erst bei Bedarf
+            # (größeres k, kein eindeutiger Treffer mehr) nachgeholt
+            self.cache.put(key, embedding, ids, k)
+        return documents
+
+    def _cache_key(self, query):
+        # Fingerprint der Quelle im Schlüssel → neuer Sync = neue Einträge
+        fingerprint = (self.collection.metadata or {}).get("source_sha256", "")
+        return f"{fingerprint[:12]}:{normalize_query(query)}"
+
+    def _search(self, query, k, candidates, embedding=None):
+        """Liefert (ids, dokumente, embedding) der besten k Treffer; embedding ist None beim Fast Path."""
+        terms = query_terms(query)
+
+        if self.fast_path:
+            # FTS zuerst – das Embedding wird nur berechnet, wenn es gebraucht wird
+            scored = self.lexical_scored(terms, candidates)
+            if self.is_strong_match(terms, scored):
+                self._count("fast_path")
+                top = scored[:k]
+                return [i for i, _, _ in top], [doc for _, doc, _ in top], embedding
+            lexical_hits = [(i, doc) for i, doc, _ in scored]
+            vector_hits, embedding = self._embed_and_search(query, candidates, embedding)
+        else:
+            # Vektorsuche im Pool, lexikalische Suche parallel im aufrufenden Thread
+            vector_future = self._pool.submit(self._embed_and_search, query, candidates, embedding)
+            lexical_hits = self.lexical(terms, candidates)
+            vector_hits, embedding = vector_future.result()
+
+        documents = dict(vector_hits)
+        documents.update(lexical_hits)
+
+        fused = reciprocal_rank_fusion(
+            [[i for i, _ in lexical_hits], [i for i, _ in vector_hits]],
+            self.rrf_k
+        )[:k]
+        return fused, [documents[i] for i in fused], embedding
+
+    def _embed_and_search(self, query, candidates, embedding=None):
+        if embedding is None:
+            embedding = self.embed(query)
+        return self.vector(query, candidates, embedding), embedding
@@ -0,0 +1,207 @@
+# ============================================================
+# ingest.py
+# Batch-Ingestion des Papers in die marine_snow-Collection.
+#
+# Seiten werden gestreamt, per chunking.py in satzbasierte Fenster
+# zerlegt und in Batches per
+# upsert geschrieben (ein Embedding-Aufruf + eine Transaktion pro
+# Batch statt pro Zeile).
+#
+# Chunk-IDs bestehen aus Seite + Inhalts-Hash. Beim Sync werden
+# nur neue/geänderte Chunks eingebettet und veraltete gelöscht –
+# ein abgebrochener Aufbau setzt damit automatisch dort fort,
+# wo er aufgehört hat.
+#
+# Aufruf (aus dem Repo-Root):
+#   python -m streamlit_agent.chatbot_core.ingest            (Diff-Sync)
+#   python -m streamlit_agent.chatbot_core.ingest --rebuild  (Neuaufbau)
+# ============================================================
+
+import argparse
+import hashlib
+import time
+
+from .chunking import CHUNK_OVERLAP, CHUNK_TOKENS, semantic_chunks
+
+CHROMA_PATH = "./chroma_marine_snow"
+COLLECTION_NAME = "marine_snow"
+PDF_PATH = "streamlit_agent/relevante_Informationen_Paper.pdf"
+
+BATCH_SIZE = 64
+
+
+# ============================================================
+# STREAMING: SEITEN → CHUNKS → BATCHES
+# ============================================================
+
+def iter_pages(pdf_path=PDF_PATH):
+    """Liefert (seitennummer, text) – immer nur eine Seite im Speicher."""
+    # Import erst hier: CHROMA_PATH/PDF_PATH sollen ohne pdfplumber ladbar sein
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_num, page in enumerate(pdf.pages):
+            text = page.extract_text()
+            page.flush_cache()
+            if text:
+                yield page_num + 1, text
+
+
+def chunk_id(page, document):
+    digest = hashlib.sha1(document.encode("utf-8")).hexdigest()[:16]
+    return f"p{page}-{digest}"
+
+
+def iter_chunks(pages, chunk_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP):
+    for chunk in semantic_chunks(pages, chunk_tokens, overlap):
+        yield {
+            "id": chunk_id(chunk["page"], chunk["text"]),
+            "document": chunk["text"],
+            "metadata": {
+                "page": chunk["page"],
+                "page_end": chunk["page_end"],
+                "section": chunk["section"],
+            },
+        }
+
+
+def iter_batches(items, batch_size=BATCH_SIZE):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ============================================================
+# QUELL-FINGERPRINT
+# ============================================================
+
+def source_fingerprint(pdf_path=PDF_PATH, chunk_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP):
+    # Chunking-Parameter gehören zum Fingerprint: andere Fenster → neu syncen
+    sha = hashlib.sha256(f"chunks:{chunk_tokens}/{overlap}".encode("utf-8"))
+    with open(pdf_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+# ============================================================
+# DIFF-SYNC
+# ============================================================
+
+def existing_ids(collection, page_size=1000):
+    ids = set()
+    offset = 0
+    while True:
+        page = collection.get(include=[], limit=page_size, offset=offset)["ids"]
+        ids.update(page)
+        if len(page) < page_size:
+            return ids
+        offset += page_size
+
+
+def sync_collection(collection, chunks, batch_size=BATCH_SIZE):
+    """
+    Gleicht die Collection mit den übergebenen Chunks ab:
+    - neue/geänderte Chunks (unbekannte ID) → batchweise upsert
+    - Chunks, die es im PDF nicht mehr gibt → löschen
+    - unveränderte Chunks behalten ihr Embedding
+    """
+    start = time.perf_counter()
+
+    desired = {}
+    for chunk in chunks:
+        desired.setdefault(chunk["id"], chunk)
+
+    current = existing_ids(collection)
+    new_chunks = [c for cid, c in desired.items() if cid not in current]
+    stale_ids = [cid for cid in current if cid not in desired]
+
+    batches = 0
+    for batch in iter_batches(new_chunks, batch_size):
+        collection.upsert(
+            ids=[c["id"] for c in batch],
+            documents=[c["document"] for c in batch],
+            metadatas=[c["metadata"] for c in batch],
+        )
+        batches += 1
+
+    for batch in iter_batches(stale_ids, batch_size):
+        collection.delete(ids=batch)
+
+    return {
+        "chunks": len(desired),
+        "added": len(new_chunks),
+        "deleted": len(stale_ids),
+        "unchanged": len(desired) - len(new_chunks),
+        "batches": batches,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+def ingest_pdf(collection, pdf_path=PDF_PATH, batch_size=BATCH_SIZE,
+               chunk_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP):
+    """
+    Synchronisiert die Collection mit dem PDF und merkt sich danach den
+    Fingerprint der Quelle. Erst wenn der Sync komplett durchlief, gilt
+    die Collection als aktuell.
+    """
+    fingerprint = source_fingerprint(pdf_path, chunk_tokens, overlap)
+    chunks = iter_chunks(iter_pages(pdf_path), chunk_tokens, overlap)
+    stats = sync_collection(collection, chunks, batch_size)
+    collection.modify(metadata={"source_sha256": fingerprint})
+    return stats
+
+
+def load_chroma(chroma_client, pdf_path=PDF_PATH):
+    """
+    Gibt die marine_snow-Collection zurück. Hat sich das PDF seit dem
+    letzten Sync geändert (oder wurde der letzte Sync abgebrochen),
+    wird inkrementell nachgezogen.
+    """
+    col = chroma_client.get_or_create_collection(COLLECTION_NAME)
+
+    if (col.metadata or {}).get("source_sha256") != source_fingerprint(pdf_path):
+        stats = ingest_pdf(col, pdf_path)
+        print(f"[RAG] Sync: {stats['added']} neu, {stats['deleted']} gelöscht, "
+              f"{stats['unchanged']} unverändert ({stats['seconds']} s)")
+
+    return col
+
+
+def rebuild_collection(chroma_client, pdf_path=PDF_PATH, batch_size=BATCH_SIZE,
+                       chunk_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP):
+    if COLLECTION_NAME in [c.name for c in chroma_client.list_collections()]:
+        chroma_client.delete_collection(COLLECTION_NAME)
+
+    col = chroma_client.create_collection(COLLECTION_NAME)
+    return col, ingest_pdf(col, pdf_path, batch_size, chunk_tokens, overlap)
+
+
+if __name__ == "__main__":
+    import chromadb
+
+    parser = argparse.ArgumentParser(description="Paper in die marine_snow-Collection laden")
+    parser.add_argument("--pdf", default=PDF_PATH)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--chunk-tokens", type=int, default=CHUNK_TOKENS)
+    parser.add_argument("--overlap", type=int, default=CHUNK_OVERLAP)
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Collection löschen und komplett neu aufbauen (statt Diff-Sync)")
+    args = parser.parse_args()
+
+    client = chromadb.PersistentClient(path=CHROMA_PATH)
+
+    if args.rebuild:
+        _, result = rebuild_collection(client, args.pdf, args.batch_size,
+                                       args.chunk_tokens, args.overlap)
+    else:
+        col = client.get_or_create_collection(COLLECTION_NAME)
+        result = ingest_pdf(col, args.pdf, args.batch_size,
+                            args.chunk_tokens, args.overlap)
+
+    print(result)
@@ -0,0 +1,366 @@
+# ============================================================
+# intent_classifier.py
+# Lokaler Klassifizierer (TF-IDF + logistische Regression) für
+# die Gatekeeping-Fragen im RAG-Chatbot:
+#
+#   related : YES / NO            (is_marine_snow_related)
+#   intent  : TOPIC_INTENT / TERM_INTENT   (classify_intent)
+#   topic   : definition / importance / sampling / formation / degradation
+#
+# Trainingsdaten: Standardfragen (TEST_QUERIES) + Nutzereingaben aus
+# data/chatlogs.jsonl (schwach gelabelt über Fachvokabular) + wenige
+# feste Beispiele. Zeichen-N-Gramme fangen Tippfehler und deutsche
+# Komposita ab ("Meereschnee", "Meeresschneeproben").
+#
+# Vorhersage < 1 ms auf CPU. Ist die Konfidenz zu niedrig, liefert
+# predict() None und der Aufrufer fragt wie bisher das LLM.
+#
+# Schwellen aus dem zurückgehaltenen EVAL_SET gewählt (siehe unten):
+#   python -m streamlit_agent.chatbot_core.intent_classifier
+# ============================================================
+
+import json
+import os
+import threading
+import time
+
+from rapidfuzz import fuzz
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+
+from .answer_cache import CANONICAL_QUERIES
+
+CHATLOGS_PATH = "data/chatlogs.jsonl"
+
+# Mindestkonfidenz je Aufgabe, darunter → LLM-Fallback.
+# Kleinste Schwelle, ab der auf EVAL_SET alle lokal beantworteten
+# Fragen stimmen, plus Sicherheitsabstand (choose_thresholds);
+# Anteil lokal beantworteter Fragen in Klammern.
+CONFIDENCE_THRESHOLD = {
+    "related": 0.60,     # (82 % lokal)
+    "intent": 0.55,      # (100 % lokal)
+    "topic": 0.60,       # (55 % lokal)
+}
+TARGET_ACCURACY = 1.0
+THRESHOLD_MARGIN = 0.05     # Abstand zur knappsten fehlerfreien Schwelle
+THRESHOLD_GRID = [round(0.50 + 0.05 * i, 2) for i in range(10)]
+
+# Fachvokabular für schwache Labels aus den Chatlogs
+DOMAIN_TERMS = [
+    "meeresschnee", "aggregat", "partikel", "verdriftung", "absinken",
+    "probenahme", "tonmineral", "mikroorganismen", "kotpellet", "plankton",
+    "ozean", "tiefsee", "meeresboden", "sediment", "kohlenstoff",
+]
+
+GENERIC_TERMS = [
+    "Aggregat", "Aggregation", "Turbulenz", "Strömung", "Organismus",
+    "Partikel", "Sediment", "Kohlenstoff", "Tonmineral", "Kotpellet",
+    "Verdriftung", "Schleim", "Mikroorganismus", "Plankton",
+]
+
+TERM_TEMPLATES = [
+    "Was ist {t}?", "Was bedeutet {t}?", "Was heißt {t}?", "{t}?",
+    "Was meinst du mit {t}?", "Erkläre den Begriff {t}.", "Was versteht man unter {t}?",
+]
+
+OFF_TOPIC_EXAMPLES = [
+    "Was ist eine Playstation 5?",
+    "Schreibe mir eine Einkaufsliste",
+    "Wie viel Zeit hab ich noch?",
+    "Wie wird das Wetter morgen?",
+    "Erzähl mir einen Witz",
+    "Wer hat die Fußball-WM gewonnen?",
+    "Wie koche ich Nudeln?",
+    "Schreib mir ein Gedicht über Liebe",
+    "Was ist die Hauptstadt von Frankreich?",
+    "Hilf mir bei meinen Mathe-Hausaufgaben",
+    "Welches Handy soll ich kaufen?",
+    "Wie funktioniert ein Verbrennungsmotor?",
+    "Test",
+    "Und jetzt",
+    "Wie alt bist du?",
+    "Wer ist der Präsident der USA?",
+    "Was ist 7 mal 8?",
+]
+
+# Englischer Begriff, den Teilnehmende auch benutzen
+SYNONYMS = {"Meeresschnee": ["Marine Snow"]}
+
+# Zusätzliche Themenbeispiele für schwach besetzte Themen
+TOPIC_EXAMPLES = {
+    "degradation": [
+        "Welche Tiere fressen die Flocken?",
+        "Wer frisst die Aggregate im Ozean?",
+        "Wie zersetzen Bakterien Meeresschnee?",
+        "Was passiert, wenn Meeresschnee gefressen wird?",
+        "Wie löst sich Meeresschnee beim Absinken auf?",
+    ],
+    "formation": [
+        "Wie lagern sich Teilchen zusammen?",
+        "Wie kleben Partikel aneinander?",
+    ],
+}
+
+
+def is_domain_text(text, threshold=85):
+    txt = text.lower()
+    return any(fuzz.partial_ratio(term, txt) >= threshold for term in DOMAIN_TERMS)
+
+
+def load_chatlog_questions(path=CHATLOGS_PATH):
+    if not os.path.exists(path):
+        return []
+    questions = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            # "message" kann null sein (leere Eingabe im Chat)
+            message = (row.get("message") or "").strip()
+            if row.get("role") == "user" and message:
+                questions.append(message)
+    return questions
+
+
+def with_synonyms(questions):
+    variants = list(questions)
+    for word, synonyms in SYNONYMS.items():
+        for synonym in synonyms:
+            variants += [q.replace(word, synonym) for q in questions if word in q]
+    return variants
+
+
+def build_training_data(chatlog_path=CHATLOGS_PATH):
+    """Gibt {aufgabe: (texte, labels)} zurück."""
+    topic_texts, topic_labels = [], []
+    for topic, questions in CANONICAL_QUERIES.items():
+        questions = with_synonyms(questions) + TOPIC_EXAMPLES.get(topic, [])
+        topic_texts += questions
+        topic_labels += [topic] * len(questions)
+
+    term_texts = [tpl.format(t=t) for t in GENERIC_TERMS for tpl in TERM_TEMPLATES]
+
+    logged = load_chatlog_questions(chatlog_path)
+    logged_related = [q for q in logged if is_domain_text(q)]
+    logged_other = [q for q in logged if not is_domain_text(q)]
+
+    related_texts = topic_texts + term_texts + logged_related + OFF_TOPIC_EXAMPLES + logged_other
+    related_labels = (
+        ["YES"] * (len(topic_texts) + len(term_texts) + len(logged_related))
+        + ["NO"] * (len(OFF_TOPIC_EXAMPLES) + len(logged_other))
+    )
+
+    # Fragen mit "Meeresschnee" (oder "Marine Snow") sind immer TOPIC_INTENT
+    # (Sonderregel des Bots)
+    logged_topic = [q for q in logged_related if "meeresschnee" in q.lower()]
+    intent_texts = topic_texts + logged_topic + term_texts
+    intent_labels = ["TOPIC_INTENT"] * (len(topic_texts) + len(logged_topic)) + ["TERM_INTENT"] * len(term_texts)
+
+    return {
+        "related": (related_texts, related_labels),
+        "intent": (intent_texts, intent_labels),
+        "topic": (topic_texts, topic_labels),
+    }
+
+
+def _make_model():
+    return make_pipeline(
+        TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 5), lowercase=True, sublinear_tf=True),
+        LogisticRegression(max_iter=1000, C=10.0, class_weight="balanced"),
+    )
+
+
+class IntentClassifier:
+
+    def __init__(self, chatlog_path=CHATLOGS_PATH, thresholds=None):
+        self.thresholds = dict(CONFIDENCE_THRESHOLD, **(thresholds or {}))
+        self.models = {}
+
+        start = time.perf_counter()
+        for task, (texts, labels) in build_training_data(chatlog_path).items():
+            model = _make_model()
+            model.fit(texts, labels)
+            self.models[task] = model
+        self.train_ms = (time.perf_counter() - start) * 1000
+
+        self._lock = threading.Lock()
+        self.stats = {"local": 0, "fallback": 0, "predict_ms_total": 0.0}
+
+    def predict_proba(self, task, text):
+        model = self.models[task]
+        probs = model.predict_proba([text])[0]
+        best = probs.argmax()
+        return str(model.classes_[best]), float(probs[best])
+
+    def predict(self, task, text):
+        """Label bei ausreichender Konfidenz, sonst None (→ LLM fragen)."""
+        start = time.perf_counter()
+        label, confidence = self.predict_proba(task, text)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        confident = confidence >= self.thresholds[task]
+        with self._lock:
+            self.stats["predict_ms_total"] += elapsed
+            self.stats["local" if confident else "fallback"] += 1
+
+        print(f"[INTENT] {task}: {label} ({confidence:.2f}, {elapsed:.1f} ms)"
+              + ("" if confident else " → LLM-Fallback"))
+        return label if confident else None
+
+
+# ============================================================
+# SINGLETON
+# ============================================================
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_intent_classifier():
+    """Wird einmal pro Prozess trainiert (wenige Millisekunden)."""
+    global _classifier
+
+    with _classifier_lock:
+        if _classifier is None:
+            _classifier = IntentClassifier()
+            print(f"[INTENT] Lokaler Klassifizierer trainiert in {_classifier.train_ms:.0f} ms")
+        return _classifier
+
+
+# ============================================================
+# EVALUATION
+# ============================================================
+
+# Von Hand gelabelt, nicht in den Trainingsdaten
+EVAL_SET = {
+    "related": [
+        ("Was ist Marine Snow?", "YES"),
+        ("Wie schnell sinkt Meeresschnee ab?", "YES"),
+        ("Woraus bestehen die Aggregate?", "YES"),
+        ("Welche Rolle spielt Plankton dabei?", "YES"),
+        ("Wie gelangt Kohlenstoff in die Tiefsee?", "YES"),
+        ("Was frisst Meeresschnee?", "YES"),
+        ("Was sind Kotpellets?", "YES"),
+        ("Wie misst man Partikel im Ozean?", "YES"),
+        ("Warum zerbrechen die Flocken beim Sammeln?", "YES"),
+        ("Erklär mir Meeresschnee einfach", "YES"),
+        ("Was passiert mit Meeresschnee am Meeresboden?", "YES"),
+        ("Welche Mikroorganismen leben auf den Aggregaten?", "YES"),
+        ("Wie hängt Meeresschnee mit dem Klima zusammen?", "YES"),
+        ("Was ist Sedimentation?", "YES"),
+        ("Was ist ein Tonmineral?", "YES"),
+        ("Wie spät ist es?", "NO"),
+        ("Empfiehl mir einen Film", "NO"),
+        ("Was ist die Wurzel aus 144?", "NO"),
+        ("Wer ist der Bundeskanzler?", "NO"),
+        ("Wie backe ich einen Kuchen?", "NO"),
+        ("Übersetze Hallo ins Englische", "NO"),
+        ("Was kostet ein Flug nach Rom?", "NO"),
+        ("Hallo", "NO"),
+        ("Wie heißt du?", "NO"),
+        ("Schreib mir eine E-Mail an meinen Chef", "NO"),
+        ("Welche Aktie soll ich kaufen?", "NO"),
+        ("Was ist ein Schwarzes Loch?", "NO"),
+        ("Wie schnell fährt ein ICE?", "NO"),
+    ],
+    "intent": [
+        ("Was ist Marine Snow?", "TOPIC_INTENT"),
+        ("Wie entsteht Marine Snow?", "TOPIC_INTENT"),
+        ("Was ist eigentlich Meeresschnee?", "TOPIC_INTENT"),
+        ("Warum ist Meeresschnee für das Klima wichtig?", "TOPIC_INTENT"),
+        ("Wie sammelt man Meeresschnee?", "TOPIC_INTENT"),
+        ("Wie wird Meeresschnee zersetzt?", "TOPIC_INTENT"),
+        ("Was frisst Meeresschnee?", "TOPIC_INTENT"),
+        ("Welche Bedeutung hat Meeresschnee?", "TOPIC_INTENT"),
+        ("Wie bildet sich Meeresschnee?", "TOPIC_INTENT"),
+        ("Erklär mir bitte Meeresschnee", "TOPIC_INTENT"),
+        ("Was ist Sedimentation?", "TERM_INTENT"),
+        ("Was bedeutet Aggregat?", "TERM_INTENT"),
+        ("Was sind Kotpellets?", "TERM_INTENT"),
+        ("Was heißt Turbulenz?", "TERM_INTENT"),
+        ("Erkläre den Begriff Verdriftung.", "TERM_INTENT"),
+        ("Was versteht man unter Schleim?", "TERM_INTENT"),
+        ("Was ist ein Tonmineral?", "TERM_INTENT"),
+        ("Was meinst du mit Aggregation?", "TERM_INTENT"),
+        ("Was ist Plankton?", "TERM_INTENT"),
+        ("Was sind Mikroorganismen?", "TERM_INTENT"),
+    ],
+    "topic": [
+        ("Was ist eigentlich Meeresschnee?", "definition"),
+        ("Woraus besteht Meeresschnee?", "definition"),
+        ("Beschreibe Meeresschnee.", "definition"),
+        ("Was ist Marine Snow?", "definition"),
+        ("Warum ist Meeresschnee für das Klima wichtig?", "importance"),
+        ("Welche Bedeutung hat Meeresschnee?", "importance"),
+        ("Wofür ist Meeresschnee gut?", "importance"),
+        ("Welche Rolle spielt Meeresschnee im Kohlenstoffkreislauf?", "importance"),
+        ("Wie sammelt man Meeresschnee?", "sampling"),
+        ("Wie misst man Meeresschnee?", "sampling"),
+        ("Mit welchen Geräten werden Proben von Meeresschnee genommen?", "sampling"),
+        ("Wie untersucht man Meeresschnee im Labor?", "sampling"),
+        ("Wie bildet sich Meeresschnee?", "formation"),
+        ("Woraus entsteht Meeresschnee?", "formation"),
+        ("Wie verkleben die Partikel zu Meeresschnee?", "formation"),
+        ("Was führt zur Entstehung von Meeresschnee?", "formation"),
+        ("Wie wird Meeresschnee zersetzt?", "degradation"),
+        ("Was frisst Meeresschnee?", "degradation"),
+        ("Wer baut Meeresschnee ab?", "degradation"),
+        ("Was passiert beim Abbau von Meeresschnee?", "degradation"),
+    ],
+}
+
+
+def evaluate(classifier, eval_set=EVAL_SET, grid=THRESHOLD_GRID):
+    """
+    Je Aufgabe: Genauigkeit ohne Schwelle und je Schwelle Abdeckung
+    (Anteil lokal beantwortet) und Genauigkeit der lokalen Antworten.
+    """
+    report = {}
+    for task, rows in eval_set.items():
+        preds = [classifier.predict_proba(task, text) + (gold,) for text, gold in rows]
+        by_threshold = {}
+        for t in grid:
+            local = [label == gold for label, confidence, gold in preds if confidence >= t]
+            by_threshold[t] = {
+                "coverage": round(len(local) / len(preds), 2),
+                "accuracy": round(sum(local) / len(local), 2) if local else None,
+            }
+        report[task] = {
+            "accuracy": round(sum(label == gold for label, _, gold in preds) / len(preds), 2),
+            "errors": [(text, label, round(conf, 2))
+                       for (text, _), (label, conf, gold) in zip(rows, preds) if label != gold],
+            "by_threshold": by_threshold,
+        }
+    return report
+
+
+def choose_thresholds(report, target=TARGET_ACCURACY, margin=THRESHOLD_MARGIN):
+    """
+    Kleinste Schwelle je Aufgabe, ab der die lokalen Antworten target
+    erreichen (auch bei allen höheren Schwellen), plus margin – das
+    Evaluationsset ist klein.
+    """
+    chosen = {}
+    for task, result in report.items():
+        best = 1.0      # nie lokal entscheiden
+        for t, row in sorted(result["by_threshold"].items(), reverse=True):
+            if row["accuracy"] is not None and row["accuracy"] < target:
+                break
+            best = t
+        chosen[task] = min(round(best + margin, 2), 1.0)
+    return chosen
+
+
+if __name__ == "__main__":
+    report = evaluate(IntentClassifier())
+    for task, result in report.items():
+        print(f"[INTENT] {task}: Genauigkeit {result['accuracy']:.2f} (ohne Schwelle)")
+        for t, row in result["by_threshold"].items():
+            print(f"    Schwelle {t:.2f}: Abdeckung {row['coverage']:.2f}, Genauigkeit {row['accuracy']}")
+        for error in result["errors"]:
+            print(f"    falsch: {error}")
+    print("[INTENT] gewählte Schwellen:", choose_thresholds(report),
+          "– aktuell:", CONFIDENCE_THRESHOLD)
@@ -0,0 +1,204 @@
+# ============================================================
+# length_fitter.py
+# Lokale Längenanpassung statt enforce_length()-Schleife.
+#
+# Zu lange Texte werden satzweise gekürzt: Sätze mit der
+# geringsten Salienz (wenig Überschneidung mit den zentralen
+# Begriffen des Textes) fliegen zuerst raus; reicht ein ganzer
+# Satz nicht, wird der letzte Kandidat an einer Nebensatzgrenze
+# gekürzt. Zu kurze Texte bekommen genau EINEN gezielten
+# Erweiterungsaufruf (LLM) und werden danach lokal eingepasst.
+# ============================================================
+
+import re
+import threading
+from collections import Counter
+
+from .chunking import protect_abbreviations, restore_abbreviations
+from .text_analysis import STOPWORDS_DE
+
+# Satzgrenze inkl. Trennzeichen (Zeilenumbrüche bleiben erhalten)
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])(\s+)(?=[A-ZÄÖÜ0-9„\"(•*-])")
+CLAUSE_SPLIT_RE = re.compile(r"(?<=[,;:])\s+|\s+[–-]\s+")
+ELLIPSIS = " …"
+
+# Die alte Schleife brauchte bei falscher Länge mindestens einen,
+# oft alle fünf Korrekturaufrufe
+OLD_LOOP_MAX_CALLS = 5
+
+_stats_lock = threading.Lock()
+FIT_STATS = {
+    "texts": 0,
+    "in_range": 0,
+    "shortened": 0,
+    "expanded": 0,
+    "truncated": 0,
+    "still_short": 0,         # auch nach der Erweiterung unter min_chars
+    "llm_calls": 0,
+    "calls_saved_min": 0,     # untere Schranke: 1 pro lokal gelöstem Fall
+    "calls_saved_max": 0,     # obere Schranke: OLD_LOOP_MAX_CALLS - genutzte Aufrufe
+}
+
+
+def _count(key, n=1):
+    with _stats_lock:
+        FIT_STATS[key] += n
+
+
+def fit_stats():
+    with _stats_lock:
+        return dict(FIT_STATS)
+
+
+# ============================================================
+# SÄTZE + SALIENZ
+# ============================================================
+
+def split_sentences(text):
+    """Liefert [[satz, trennzeichen], ...] – ''.join ergibt wieder den Text."""
+    parts = SENTENCE_SPLIT_RE.split(protect_abbreviations(text))
+    parts.append("")
+    return [
+        [restore_abbreviations(parts[i]), parts[i + 1]]
+        for i in range(0, len(parts) - 1, 2)
+    ]
+
+
+def _terms(sentence):
+    return {
+        w for w in re.findall(r"\w+", sentence.lower())
+        if len(w) >= 4 and w not in STOPWORDS_DE
+    }
+
+
+def salience_scores(sentences):
+    """Wie stark teilt ein Satz die Begriffe der übrigen Sätze?"""
+    term_sets = [_terms(s) for s in sentences]
+    freq = Counter(t for terms in term_sets for t in terms)
+    scores = []
+    for terms in term_sets:
+        if not terms:
+            scores.append(0.0)
+            continue
+        scores.append(sum(freq[t] - 1 for t in terms) / len(terms))
+    return scores
+
+
+def _join(segments):
+    return "".join(s + sep for s, sep in segments).strip()
+
+
+# ============================================================
+# KÜRZEN
+# ============================================================
+
+def trim_clauses(sentence, max_len):
+    """Kürzt einen Satz an der letzten Nebensatzgrenze, die noch passt."""
+    clauses = CLAUSE_SPLIT_RE.split(sentence)
+    if len(clauses) < 2:
+        return None
+
+    kept = clauses[0]
+    for clause in clauses[1:]:
+        candidate = kept + " " + clause
+        if len(candidate) + 1 > max_len:
+            break
+        kept = candidate
+
+    kept = kept.rstrip(" ,;:–-")
+    if len(kept) + 1 > max_len or kept == sentence:
+        return None
+    return kept + "."
+
+
+def shorten(text, min_chars, max_chars):
+    segments = split_sentences(text)
+    sentences = [s for s, _ in segments]
+    scores = salience_scores(sentences)
+
+    # Einleitungssatz und abschließende Folgefrage bleiben stehen
+    protected = {0}
+    if len(sentences) > 1 and sentences[-1].rstrip().endswith("?"):
+        protected.add(len(sentences) - 1)
+
+    order = sorted(
+        (i for i in range(len(sentences)) if i not in protected),
+        key=lambda i: scores[i]
+    )
+
+    removed = set()
+    for i in order:
+        current = _join(seg for j, seg in enumerate(segments) if j not in removed)
+        overflow = len(current) - max_chars
+        if overflow <= 0:
+            break
+
+        cost = len(segments[i][0]) + len(segments[i][1])
+        if len(current) - cost >= min_chars:
+            removed.add(i)
+            continue
+
+        # ganzer Satz wäre zu viel → nur Nebensätze kürzen
+        trimmed = trim_clauses(segments[i][0], len(segments[i][0]) - overflow)
+        if trimmed and len(current) - len(segments[i][0]) + len(trimmed) >= min_chars:
+            segments[i][0] = trimmed
+            break
+
+    result = _join(seg for j, seg in enumerate(segments) if j not in removed)
+
+    if len(result) > max_chars:
+        # Notfall: an Satz- bzw. Wortgrenze abschneiden statt mitten im Wort
+        _count("truncated")
+        cut = result[:max_chars]
+        end = max(cut.rfind(". "), cut.rfind("! "), cut.rfind("? "))
+        if end + 1 >= min_chars:
+            result = cut[:end + 1]
+        else:
+            # Platz für die Auslassungspunkte lassen; ohne Leerzeichen
+            # (ein einziges langes Wort) wird hart abgeschnitten
+            cut = result[:max_chars - len(ELLIPSIS)]
+            space = cut.rfind(" ")
+            if space > 0:
+                cut = cut[:space]
+            result = cut.rstrip(" ,;:") + ELLIPSIS
+
+    return result
+
+
+# ============================================================
+# EINSTIEGSPUNKT
+# ============================================================
+
+def fit_length(text, min_chars, max_chars, expand_fn=None):
+    """
+    Bringt text auf min_chars–max_chars Zeichen (Leerzeichen zählen mit).
+    expand_fn(text) wird höchstens einmal aufgerufen, wenn der Text zu
+    kurz ist; alles andere passiert lokal.
+    """
+    text = text.strip()
+    _count("texts")
+
+    if min_chars <= len(text) <= max_chars:
+        _count("in_range")
+        return text
+
+    llm_calls = 0
+    if len(text) < min_chars:
+        if expand_fn is None:
+            return text
+        text = expand_fn(text).strip()
+        llm_calls = 1
+        _count("expanded")
+        if len(text) < min_chars:
+            # kein zweiter Aufruf – nur mitzählen, damit es auffällt
+            _count("still_short")
+            print(f"[LEN] Nach Erweiterung noch zu kurz: {len(text)} < {min_chars} Zeichen")
+
+    if len(text) > max_chars:
+        text = shorten(text, min_chars, max_chars)
+        _count("shortened")
+
+    _count("llm_calls", llm_calls)
+    _count("calls_saved_min", 1 - llm_calls)
+    _count("calls_saved_max", OLD_LOOP_MAX_CALLS - llm_calls)
+    return text
@@ -0,0 +1,306 @@
+# ============================================================
+# llm_client.py
+# Gemeinsamer OpenAI-Client für alle Chatbot-Skripte.
+#
+# - Ein Client pro Prozess, HTTP-Keep-Alive über einen httpx-Pool
+#   (statt OpenAI(...) bei jedem Skriptimport)
+# - Timeouts für Verbindungsaufbau und Antwort
+# - Semaphore: höchstens LLM_MAX_CONCURRENCY gleichzeitige Aufrufe
+#   pro Prozess (Bulk-Tests, parallele Sessions)
+# - Exponentielles Backoff mit Jitter bei 429 / 5xx / Verbindungsfehlern
+#   (Retry-After wird beachtet)
+# - Latenz-Histogramm pro Modell
+#
+# Aufrufer bleiben unverändert: get_client().chat.completions.create(...)
+#
+# LLM_BACKEND=replay|template ersetzt die API durch fake_llm
+# (Lasttests offline), LLM_CASSETTE=record|replay zeichnet alle
+# Aufrufe auf bzw. spielt sie ab (cassette.py).
+# ============================================================
+
+import asyncio
+import os
+import random
+import threading
+import time
+
+import httpx
+import openai
+
+from .cassette import get_cassette
+from .fake_llm import LLM_BACKEND, AsyncFakeOpenAI, FakeOpenAI
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_POOL_SIZE = 20
+
+BACKOFF_BASE = 0.5          # Sekunden, verdoppelt sich pro Versuch
+BACKOFF_MAX = 20.0
+
+# Obergrenzen der Histogramm-Buckets in ms
+LATENCY_BUCKETS_MS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+
+def _timeout():
+    return httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+
+
+def _limits():
+    return httpx.Limits(max_connections=LLM_POOL_SIZE, max_keepalive_connections=LLM_POOL_SIZE)
+
+
+# ============================================================
+# LATENZ-HISTOGRAMM
+# ============================================================
+
+_stats_lock = threading.Lock()
+LATENCY_STATS = {}          # model -> {"calls", "errors", "retries", "ms_total", "buckets"}
+
+
+def _model_stats(model):
+    if model not in LATENCY_STATS:
+        LATENCY_STATS[model] = {
+            "calls": 0,
+            "errors": 0,
+            "retries": 0,
+            "ms_total": 0.0,
+            "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+        }
+    return LATENCY_STATS[model]
+
+
+def record_latency(model, elapsed_ms, retries=0, error=False):
+    with _stats_lock:
+        stats = _model_stats(model)
+        stats["calls"] += 1
+        stats["retries"] += retries
+        stats["errors"] += int(error)
+        stats["ms_total"] += elapsed_ms
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                stats["buckets"][i] += 1
+                break
+        else:
+            stats["buckets"][-1] += 1
+
+
+def latency_stats():
+    """{model: {"calls", "errors", "retries", "mean_ms", "histogram": {"<=250": n, ...}}}"""
+    labels = [f"<={b}" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+    with _stats_lock:
+        return {
+            model: {
+                "calls": s["calls"],
+                "errors": s["errors"],
+                "retries": s["retries"],
+                "mean_ms": round(s["ms_total"] / s["calls"], 1) if s["calls"] else 0.0,
+                "histogram": dict(zip(labels, s["buckets"])),
+            }
+            for model, s in LATENCY_STATS.items()
+        }
+
+
+# ============================================================
+# RETRY-LOGIK
+# ============================================================
+
+def is_retryable(exc):
+    if isinstance(exc, (openai.RateLimitError, openai.APIConnectionError)):
+        return True
+    return isinstance(exc, openai.APIStatusError) and exc.status_code >= 500
+
+
+def backoff_delay(attempt, exc=None):
+    # Retry-After des Servers hat Vorrang
+    response = getattr(exc, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        try:
+            return min(float(retry_after), BACKOFF_MAX)
+        except (TypeError, ValueError):
+            pass
+    delay = min(BACKOFF_BASE * 2 ** attempt, BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+
+class _Completions:
+
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, **kwargs):
+        return self._owner.call(kwargs)
+
+
+class _Chat:
+
+    def __init__(self, owner):
+        self.completions = _Completions(owner)
+
+
+class _AsyncCompletions:
+
+    def __init__(self, owner):
+        self._owner = owner
+
+    async def create(self, **kwargs):
+        return await self._owner.call(kwargs)
+
+
+class _AsyncChat:
+
+    def __init__(self, owner):
+        self.completions = _AsyncCompletions(owner)
+
+
+# ============================================================
+# CLIENTS
+# ============================================================
+
+class PooledClient:
+    """
+    Schnittstelle wie openai.OpenAI für chat.completions.create.
+    Bei stream=True begrenzt die Semaphore nur den Verbindungsaufbau,
+    nicht das Lesen des Streams.
+    """
+
+    def __init__(self, api_key=None, max_concurrency=LLM_MAX_CONCURRENCY,
+                 max_retries=LLM_MAX_RETRIES):
+        if LLM_BACKEND != "openai":
+            self.http_client = None
+            self.raw = FakeOpenAI()
+        else:
+            self.http_client = httpx.Client(limits=_limits(), timeout=_timeout())
+            self.raw = openai.OpenAI(
+                api_key=api_key or os.getenv("OPENAI_API_KEY"),
+                http_client=self.http_client,
+                timeout=_timeout(),
+                max_retries=0,              # Retries übernimmt call()
+            )
+        self.max_retries = max_retries
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.cassette = get_cassette()
+        self.chat = _Chat(self)
+
+    def call(self, kwargs):
+        if self.cassette is not None:
+            replayed = self.cassette.replay(kwargs)
+            if replayed is not None:
+                return replayed
+
+        model = kwargs.get("model", "?")
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                with self._semaphore:
+                    result = self.raw.chat.completions.create(**kwargs)
+                elapsed = (time.perf_counter() - start) * 1000
+                record_latency(model, elapsed, attempt)
+                if self.cassette is not None:
+                    result = self.cassette.record(kwargs, result, elapsed)
+                return result
+            except Exception as exc:
+                if attempt >= self.max_retries or not is_retryable(exc):
+                    record_latency(model, (time.perf_counter() - start) * 1000, attempt, error=True)
+                    raise
+                delay = backoff_delay(attempt, exc)
+                print(f"[LLM] {model}: {type(exc).__name__} – neuer Versuch in {delay:.1f} s")
+                time.sleep(delay)
+                attempt += 1
+
+
+class AsyncPooledClient:
+    """Wie PooledClient, für AsyncOpenAI (ein Event-Loop pro Client)."""
+
+    def __init__(self, api_key=None, max_concurrency=LLM_MAX_CONCURRENCY,
+                 max_retries=LLM_MAX_RETRIES):
+        if LLM_BACKEND != "openai":
+            self.http_client = None
+            self.raw = AsyncFakeOpenAI()
+        else:
+            self.http_client = httpx.AsyncClient(limits=_limits(), timeout=_timeout())
+            self.raw = openai.AsyncOpenAI(
+                api_key=api_key or os.getenv("OPENAI_API_KEY"),
+                http_client=self.http_client,
+                timeout=_timeout(),
+                max_retries=0,
+            )
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        self.cassette = get_cassette()
+        self.chat = _AsyncChat(self)
+
+    async def call(self, kwargs):
+        if self.cassette is not None:
+            replayed = await self.cassette.replay_async(kwargs)
+            if replayed is not None:
+                return replayed
+
+        if self._semaphore is None:
+            # erst im laufenden Loop anlegen
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        model = kwargs.get("model", "?")
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    result = await self.raw.chat.completions.create(**kwargs)
+                elapsed = (time.perf_counter() - start) * 1000
+                record_latency(model, elapsed, attempt)
+                if self.cassette is not None:
+                    result = await self.cassette.record_async(kwargs, result, elapsed)
+                return result
+            except Exception as exc:
+                if attempt >= self.max_retries or not is_retryable(exc):
+                    record_latency(model, (time.perf_counter() - start) * 1000, attempt, error=True)
+                    raise
+                delay = backoff_delay(attempt, exc)
+                print(f"[LLM] {model}: {type(exc).__name__} – neuer Versuch in {delay:.1f} s")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+
+# ============================================================
+# SINGLETONS
+# ============================================================
+
+_client = None
+_async_client = None
+_http_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            _client = PooledClient()
+            if LLM_BACKEND != "openai":
+                print(f"[LLM] Lokales Backend aktiv: {LLM_BACKEND}")
+        return _client
+
+
+def get_async_client():
+    global _async_client
+
+    with _client_lock:
+        if _async_client is None:
+            _async_client = AsyncPooledClient()
+        return _async_client
+
+
+def shared_http_client():
+    """httpx-Pool für fremde Clients (z. B. langchain ChatOpenAI)."""
+    global _http_client
+
+    with _client_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(limits=_limits(), timeout=_timeout())
+        return _http_client
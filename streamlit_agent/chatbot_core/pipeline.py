@@ -0,0 +1,198 @@
+# ============================================================
+# pipeline.py
+# Antwort-Pipeline des Studien-Chatbots ohne Streamlit.
+#
+#   generate_answer(text, level, memory)
+#
+# Bisher lag die Pipeline in survey_v2.py innerhalb von
+# `if st.session_state.phase == "learning":` und chatbot_api.py
+# importierte dafür ein komplettes Streamlit-Skript. Jetzt nutzen
+# survey_v2, chatbot_api (Tests) und Benchmarks dieselbe Funktion.
+#
+# Der Import ist leicht: Client, Retriever (Chroma) und Caches
+# werden erst beim ersten Aufruf über get_resources() angelegt –
+# einmal pro Prozess.
+#
+# memory: dict wie st.session_state.memory (new_memory()); nach
+# einer fertigen Antwort wird "last_bot_answer" gesetzt. Bei
+# stream=True setzt der Aufrufer es nach dem letzten Token.
+# ============================================================
+
+import threading
+import time
+
+from .generation import GENERATION_MODE, is_single_pass, parse_structured, stream_text, styled_field_instructions
+from .length_fitter import fit_length, fit_stats
+from .prompts import (
+    AFFECT_SYSTEM, ANTHRO, IEs, MODEL_GATE, MODEL_MAIN, SCOPE_TOPICS, SELF_PERSONA, SYSTEM_PROMPT,
+    TARGET_MAX, TARGET_MIN, core_prompt, expand_prompt, gate_prompt, style_prompt,
+)
+
+
+def new_memory():
+    return {
+        "last_bot_answer": "",
+        "last_topic": "",
+        "last_term": "",
+        "recent_msgs": []
+    }
+
+
+# ============================================================
+# RESSOURCEN (lazy, prozessweit)
+# ============================================================
+
+_resources = None
+_resources_lock = threading.Lock()
+
+
+def get_resources():
+    """{"client", "retriever", "version", "answer_cache", "semantic_cache", "cached_pipeline"}"""
+    global _resources
+
+    with _resources_lock:
+        if _resources is None:
+            from .answer_cache import get_answer_cache, prompt_version
+            from .llm_client import get_client
+            from .retriever import get_retriever
+            from .semantic_cache import get_semantic_cache
+
+            start = time.perf_counter()
+            retriever = get_retriever()
+            version = prompt_version(
+                SYSTEM_PROMPT, ANTHRO, IEs, SELF_PERSONA, AFFECT_SYSTEM, SCOPE_TOPICS,
+                MODEL_MAIN, GENERATION_MODE, (retriever.collection.metadata or {}).get("source_sha256")
+            )
+            # Paraphrasen bereits beantworteter Fragen; teilt das Embedding-Modell des Retrievers
+            semantic_cache = get_semantic_cache(version, embed_fn=retriever.hybrid.embed)
+            _resources = {
+                "client": get_client(),
+                "retriever": retriever,
+                "version": version,
+                "answer_cache": get_answer_cache(version),
+                "semantic_cache": semantic_cache,
+                "cached_pipeline": semantic_cache.wrap(run_pipeline),
+            }
+            print(f"[PIPELINE] Ressourcen bereit in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return _resources
+
+
+# ============================================================
+# BAUSTEINE
+# ============================================================
+
+def classify_input(user_text, last_bot_answer):
+    """
+    Returns one of:
+    - OUT_OF_SCOPE
+    - AFFECT_ONLY
+    - IN_DOMAIN_OR_AMBIGUOUS
+    """
+    r = get_resources()["client"].chat.completions.create(
+        model=MODEL_GATE,
+        temperature=0,
+        messages=[{"role": "user", "content": gate_prompt(user_text, last_bot_answer)}]
+    )
+    return r.choices[0].message.content.strip()
+
+
+def expand_text(text):
+    # Einziger LLM-Aufruf der Längenanpassung – nur wenn der Text zu kurz ist
+    return get_resources()["client"].chat.completions.create(
+        model=MODEL_MAIN,
+        messages=[{"role": "user", "content": expand_prompt(text)}],
+        temperature=0
+    ).choices[0].message.content.strip()
+
+
+def enforce_length(text):
+    # Kürzen passiert lokal (satzweise), Erweitern mit höchstens einem Aufruf
+    return fit_length(text, TARGET_MIN, TARGET_MAX, expand_fn=expand_text)
+
+
+# ============================================================
+# PIPELINE
+# ============================================================
+
+def run_pipeline(user_text, level, return_raw=False, stream=False):
+    """Ohne Caches: Rohinhalt (JSON) → Länge → Stil."""
+    started = time.perf_counter()
+    resources = get_resources()
+    client = resources["client"]
+
+    # RAG
+    rag = resources["retriever"].rag_section(user_text)
+
+    user_prompt = core_prompt(user_text, level, rag)
+    if is_single_pass():
+        user_prompt += styled_field_instructions(ANTHRO[level])
+
+    # Schritt 1: Rohinhalt
+    raw = client.chat.completions.create(
+        model=MODEL_MAIN,
+        temperature=0.2,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ]
+    ).choices[0].message.content.strip()
+    parsed = parse_structured(raw)
+    content_type = parsed["content_type"]
+    raw_text = parsed["content"]
+
+    if is_single_pass() and parsed.get("styled_content"):
+        # Stil kam bereits im selben Aufruf mit – nur der gezeigte Text wird
+        # lokal eingepasst, kein Erweiterungs-Aufruf für den Rohtext
+        styled = parsed["styled_content"].strip()
+        if content_type == "CORE":
+            styled = fit_length(styled, TARGET_MIN, TARGET_MAX)
+    else:
+        if content_type == "CORE":
+            raw_text = enforce_length(raw_text)
+            print("Enforced length:", raw_text)
+            stats = fit_stats()
+            print(f"[LEN] {stats['llm_calls']} LLM-Aufrufe, mind. {stats['calls_saved_min']} gespart")
+
+        # Schritt 2: Anthropomorphes Umschreiben
+        response = client.chat.completions.create(
+            model=MODEL_MAIN,
+            temperature=0.25,
+            messages=[
+                {"role": "user", "content": style_prompt(raw_text, level)}
+            ],
+            stream=stream
+        )
+
+        if stream:
+            # Generator – wird erst beim Anzeigen (st.write_stream) gelesen
+            styled = stream_text(response, started)
+        else:
+            styled = response.choices[0].message.content.strip()
+
+    if return_raw:
+        return styled, raw
+
+    return styled
+
+
+def generate_answer(text, level, memory=None, return_raw=False, use_cache=True, stream=False):
+    """
+    Antwort auf eine Nutzereingabe (Standardfragen-Cache → semantischer
+    Cache → Pipeline). stream=True: Antwort ist ggf. ein Generator von
+    Textstücken (für st.write_stream) statt eines fertigen Strings.
+    """
+    resources = get_resources()
+
+    if not use_cache:
+        answer = run_pipeline(text, level, return_raw, stream)
+    else:
+        cached = resources["answer_cache"].lookup(text, level)
+        if cached:
+            answer = (cached["styled"], cached["raw"]) if return_raw else cached["styled"]
+        else:
+            answer = resources["cached_pipeline"](text, level, return_raw=return_raw, stream=stream)
+
+    styled = answer[0] if return_raw else answer
+    if memory is not None and isinstance(styled, str):
+        memory["last_bot_answer"] = styled
+    return answer
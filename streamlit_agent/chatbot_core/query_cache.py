@@ -0,0 +1,134 @@
+# ============================================================
+# query_cache.py
+# LRU/TTL-Cache für RAG-Anfragen.
+#
+# Schlüssel ist der normalisierte Anfragetext ("Was ist Meeresschnee?"
+# == "was ist meeresschnee"). Gespeichert werden das Query-Embedding
+# und die IDs der Top-k-Treffer – bei einem Treffer muss die Anfrage
+# weder neu eingebettet noch neu gesucht werden.
+#
+# Optional zweite Stufe auf der Platte (SQLite), damit der Cache
+# einen Neustart des Servers überlebt.
+# ============================================================
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+QUERY_CACHE_SIZE = 512
+QUERY_CACHE_TTL = 24 * 3600        # Sekunden
+QUERY_CACHE_PATH = "./rag_query_cache.db"
+
+
+def normalize_query(text):
+    text = text.lower().strip()
+    text = re.sub(r"\s+", " ", text)
+    return text.strip(" ?!.,;:")
+
+
+class QueryCache:
+    """
+    Threadsicherer LRU-Cache mit Ablaufzeit.
+    Einträge: {"embedding": [...] | None, "ids": [...], "k": int}
+    """
+
+    def __init__(self, max_entries=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL, disk_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()     # key -> (zeitstempel, eintrag)
+        self._lock = threading.Lock()
+
+        self._disk = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute("""
+                CREATE TABLE IF NOT EXISTS query_cache (
+                    key TEXT PRIMARY KEY,
+                    created REAL,
+                    entry TEXT
+                )
+            """)
+            self._disk.commit()
+
+        self.stats = {"hits": 0, "misses": 0, "disk_hits": 0, "evictions": 0}
+
+    # --------------------------------------------------------
+    # Lesen / Schreiben
+    # --------------------------------------------------------
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            item = self._entries.get(key)
+            if item and now - item[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return item[1]
+            if item:
+                del self._entries[key]
+
+            entry = self._disk_get(key, now)
+            if entry is not None:
+                self._store(key, entry, now)
+                self.stats["hits"] += 1
+                self.stats["disk_hits"] += 1
+                return entry
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, embedding, ids, k):
+        entry = {"embedding": embedding, "ids": list(ids), "k": k}
+        now = time.time()
+        with self._lock:
+            self._store(key, entry, now)
+            if self._disk is not None:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO query_cache (key, created, entry) VALUES (?, ?, ?)",
+                    (key, now, json.dumps(entry))
+                )
+                self._disk.commit()
+
+    def _store(self, key, entry, now):
+        self._entries[key] = (now, entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _disk_get(self, key, now):
+        if self._disk is None:
+            return None
+        row = self._disk.execute(
+            "SELECT created, entry FROM query_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if not row:
+            return None
+        if now - row[0] > self.ttl:
+            self._disk.execute("DELETE FROM query_cache WHERE key = ?", (key,))
+            self._disk.commit()
+            return None
+        return json.loads(row[1])
+
+    # --------------------------------------------------------
+    # Verwaltung
+    # --------------------------------------------------------
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM query_cache")
+                self._disk.commit()
+
+    def hit_rate(self):
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def snapshot(self):
+        with self._lock:
+            return {**self.stats, "size": len(self._entries),
+                    "hit_rate": round(self.hit_rate(), 3)}
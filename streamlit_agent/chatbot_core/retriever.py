@@ -0,0 +1,108 @@
+# ============================================================
+# retriever.py
+# Prozessweiter RAG-Retriever für die marine_snow-Collection.
+# Wird einmal pro Server-Prozess aufgebaut und von allen
+# Streamlit-Sessions gemeinsam genutzt.
+# ============================================================
+
+import os
+import threading
+import time
+
+import chromadb
+
+from .hybrid import HybridRetriever
+from .ingest import CHROMA_PATH, PDF_PATH, load_chroma
+from .query_cache import QUERY_CACHE_PATH, QueryCache
+
+# Pro Rerun eine [RAG]-Zeile: gemessene Zeit für get_retriever()
+# gegenüber den Kosten eines Neuaufbaus (Aufbau + Warmup)
+RAG_DEBUG = os.getenv("RAG_DEBUG", "0") == "1"
+
+
+class MarineSnowRetriever:
+    """
+    Hält Chroma-Client und Collection für die gesamte Prozesslaufzeit.
+    Misst Aufbau und Warmup, damit Reruns die Wiederverwendung gegen
+    einen Neuaufbau loggen können.
+    """
+
+    def __init__(self, path=CHROMA_PATH, pdf_path=PDF_PATH, cache_path=QUERY_CACHE_PATH):
+        start = time.perf_counter()
+        self.client = chromadb.PersistentClient(path=path)
+        self.collection = load_chroma(self.client, pdf_path)
+        self.query_cache = QueryCache(disk_path=cache_path)
+        self.hybrid = HybridRetriever(
+            self.collection,
+            sqlite_path=os.path.join(path, "chroma.sqlite3"),
+            cache=self.query_cache,
+        )
+        self.build_ms = (time.perf_counter() - start) * 1000
+
+        self.warm_ms = 0.0
+
+    def warm(self):
+        # Die erste Query lädt das Embedding-Modell – danach sind Queries schnell
+        start = time.perf_counter()
+        self.hybrid.vector("Meeresschnee", 1)
+        self.warm_ms = (time.perf_counter() - start) * 1000
+
+    def rag_section(self, query, n_results=1):
+        return "\n".join(self.hybrid.query(query, k=n_results))
+
+    @property
+    def rebuild_ms(self):
+        return self.build_ms + self.warm_ms
+
+
+# ============================================================
+# SINGLETON
+# ============================================================
+
+_retriever = None
+_retriever_lock = threading.Lock()
+_warm_thread = None
+
+
+def _ensure_retriever():
+    global _retriever
+
+    if _retriever is not None:
+        return _retriever
+
+    with _retriever_lock:
+        if _retriever is not None:
+            return _retriever
+
+        retriever = MarineSnowRetriever()
+        retriever.warm()
+        _retriever = retriever
+        print(f"[RAG] Retriever aufgebaut in {retriever.build_ms:.0f} ms "
+              f"(Warmup {retriever.warm_ms:.0f} ms)")
+        return retriever
+
+
+def get_retriever():
+    """
+    Liefert den prozessweiten Retriever. Der erste Aufruf baut ihn auf
+    und wärmt ihn an; alle weiteren Aufrufe geben ihn nur zurück.
+    """
+    return _ensure_retriever()
+
+
+def warm_up_retriever():
+    """
+    Startet den Aufbau im Hintergrund, damit der Retriever bereit ist,
+    bevor die ersten Teilnehmenden die Lernphase erreichen. Idempotent.
+    """
+    global _warm_thread
+
+    if _retriever is not None or _warm_thread is not None:
+        return
+
+    with _retriever_lock:
+        if _warm_thread is None and _retriever is None:
+            _warm_thread = threading.Thread(
+                target=_ensure_retriever, name="rag-warmup", daemon=True
+            )
+            _warm_thread.start()
@@ -0,0 +1,257 @@
+# ============================================================
+# semantic_cache.py
+# Semantischer Antwort-Cache um generate_answer().
+#
+# Jede beantwortete Sachfrage wird eingebettet und in einem kleinen
+# In-Memory-Index (Chroma, HNSW, Kosinus) abgelegt. Eine neue Frage,
+# die einer bereits beantworteten ausreichend ähnlich ist ("Wie
+# entsteht Meeresschnee?" ↔ "Wodurch bildet sich Meeresschnee?"),
+# bekommt deren Antwort.
+#
+# - Gespeichert werden nur Sachantworten (content_type CORE/DETAIL/
+#   TERM) – keine Ablehnungen, Gefühls- oder Überblicksantworten
+# - Namespace: eine Collection pro (Level, Thema). Das Thema kommt aus
+#   deutschen Wortstämmen (question_topic), weil das Embedding-Modell
+#   (MiniLM, englisch trainiert) kurze deutsche Fragen verschiedener
+#   Themen sehr ähnlich einbettet ("Wie entsteht/zerfällt ...?")
+# - Lookup: die SEMANTIC_CANDIDATES nächsten Nachbarn; Fragen ohne
+#   erkanntes Thema brauchen SEMANTIC_THRESHOLD_OTHER
+# - Verdrängung: LRU, max. SEMANTIC_CACHE_SIZE Einträge pro Namespace
+# - Invalidierung: neue Prompt-Version → alle Einträge verwerfen
+# ============================================================
+
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+
+import chromadb
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+from .generation import parse_structured
+
+# Kosinus-Ähnlichkeit (1 - Distanz), ab der eine Antwort wiederverwendet wird
+SEMANTIC_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.88"))
+# Fragen ohne erkanntes Thema: nur fast wörtliche Wiederholungen
+SEMANTIC_THRESHOLD_OTHER = float(os.getenv("SEMANTIC_CACHE_THRESHOLD_OTHER", "0.95"))
+SEMANTIC_CANDIDATES = 5
+SEMANTIC_CACHE_SIZE = 500
+
+CACHEABLE_TYPES = ("CORE", "DETAIL", "TERM")
+OTHER_TOPIC = "other"
+
+# Themen der Standardfragen (answer_cache.CANONICAL_QUERIES) als
+# Wortstämme im kleingeschriebenen Text
+TOPIC_PATTERNS = {
+    "definition": re.compile(r"\bwas (genau )?ist\b|definier|definition|versteht man|bedeutet der begriff|worum handelt|erklär"),
+    "formation": re.compile(r"entsteh|bildet sich|bildung|formt sich|zustande|erzeug|führen zu\b"),
+    "importance": re.compile(r"wichtig|von bedeutung|rolle|funktion|relevan|braucht man"),
+    "sampling": re.compile(r"sammel|gesammelt|sammlung|probe|sampel|sampl|entnommen|entnahme"),
+    "degradation": re.compile(r"zerf|abgebaut|abbau|verschwind|nimmt .*\bab\b"),
+}
+
+
+def question_topic(question):
+    """Genau ein erkanntes Thema oder OTHER_TOPIC (kein oder mehrere Themen)."""
+    lowered = question.lower()
+    topics = [topic for topic, pattern in TOPIC_PATTERNS.items() if pattern.search(lowered)]
+    return topics[0] if len(topics) == 1 else OTHER_TOPIC
+
+
+def content_type(raw):
+    """content_type aus der JSON-Rohantwort der Pipeline (None, wenn nicht lesbar)."""
+    if not isinstance(raw, str):
+        return None
+    try:
+        return parse_structured(raw).get("content_type")
+    except (ValueError, AttributeError):
+        return None
+
+
+class SemanticCache:
+
+    def __init__(self, version, threshold=SEMANTIC_THRESHOLD,
+                 max_entries=SEMANTIC_CACHE_SIZE, embed_fn=None):
+        self.version = version
+        self.threshold = threshold
+        self.max_entries = max_entries
+
+        if embed_fn is None:
+            default_fn = DefaultEmbeddingFunction()
+            embed_fn = lambda text: [float(x) for x in default_fn([text])[0]]
+        self.embed = embed_fn
+
+        self._client = chromadb.EphemeralClient()
+        self._collections = {}           # (level, topic) -> Collection
+        self._lru = {}                   # (level, topic) -> OrderedDict(id -> None)
+        self._lock = threading.Lock()
+
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evictions": 0, "invalidations": 0}
+
+    # --------------------------------------------------------
+    # Namespaces
+    # --------------------------------------------------------
+
+    @staticmethod
+    def _name(key):
+        level, topic = key
+        return f"answers_level_{level}_{topic}"
+
+    def _collection(self, key):
+        if key not in self._collections:
+            self._collections[key] = self._client.get_or_create_collection(
+                self._name(key),
+                metadata={"hnsw:space": "cosine"},
+                embedding_function=None,
+            )
+            self._lru[key] = OrderedDict()
+        return self._collections[key]
+
+    def invalidate(self, version=None):
+        """Verwirft alle Einträge (z. B. nach Änderung von IEs/SYSTEM_PROMPT)."""
+        with self._lock:
+            for key in list(self._collections):
+                self._client.delete_collection(self._name(key))
+            self._collections.clear()
+            self._lru.clear()
+            if version is not None:
+                self.version = version
+            self.stats["invalidations"] += 1
+
+    # --------------------------------------------------------
+    # Lookup / Store
+    # --------------------------------------------------------
+
+    def lookup(self, question, level, embedding=None):
+        """Gespeicherte Antwort (dict mit styled/raw/question/similarity) oder None."""
+        key = (level, question_topic(question))
+        threshold = self.threshold if key[1] != OTHER_TOPIC else max(self.threshold, SEMANTIC_THRESHOLD_OTHER)
+        if embedding is None:
+            embedding = self.embed(question)
+
+        with self._lock:
+            col = self._collection(key)
+            lru = self._lru[key]
+            if not lru:
+                self.stats["misses"] += 1
+                return None
+
+            result = col.query(
+                query_embeddings=[embedding], n_results=min(SEMANTIC_CANDIDATES, len(lru)),
+                include=["metadatas", "distances"]
+            )
+            # bester Kandidat der aktuellen Version über der Schwelle
+            hit = None
+            for entry_id, meta, distance in zip(result["ids"][0], result["metadatas"][0], result["distances"][0]):
+                similarity = 1.0 - distance
+                if similarity < threshold:
+                    break
+                if meta.get("version") == self.version:
+                    hit = entry_id, meta, similarity
+                    break
+
+            if hit is None:
+                self.stats["misses"] += 1
+                return None
+
+            entry_id, meta, similarity = hit
+            lru.move_to_end(entry_id)
+            self.stats["hits"] += 1
+
+        print(f"[CACHE] Semantischer Treffer ({similarity:.2f}, {key[1]}): \"{meta['question']}\"")
+        return {
+            "question": meta["question"],
+            "styled": meta["styled"],
+            "raw": meta["raw"],
+            "similarity": similarity,
+        }
+
+    def store(self, question, level, styled, raw, embedding=None):
+        """Speichert nur Sachantworten (CACHEABLE_TYPES); gibt zurück, ob gespeichert wurde."""
+        if content_type(raw) not in CACHEABLE_TYPES:
+            return False
+        if embedding is None:
+            embedding = self.embed(question)
+
+        key = (level, question_topic(question))
+        entry_id = str(uuid.uuid4())
+        with self._lock:
+            col = self._collection(key)
+            col.add(
+                ids=[entry_id],
+                embeddings=[embedding],
+                metadatas=[{
+                    "question": question,
+                    "styled": styled,
+                    "raw": raw if isinstance(raw, str) else str(raw),
+                    "version": self.version,
+                }],
+            )
+            lru = self._lru[key]
+            lru[entry_id] = None
+            self.stats["stored"] += 1
+
+            while len(lru) > self.max_entries:
+                old_id, _ = lru.popitem(last=False)
+                col.delete(ids=[old_id])
+                self.stats["evictions"] += 1
+        return True
+
+    # --------------------------------------------------------
+    # Wrapper
+    # --------------------------------------------------------
+
+    def wrap(self, generate_fn):
+        """
+        Legt den Cache um generate_fn(user_text, level, return_raw=..., stream=...).
+        generate_fn muss mit return_raw=True (styled, raw) liefern; bei
+        stream=True darf styled ein Generator von Textstücken sein.
+        """
+        def generate(user_text, level, return_raw=False, stream=False):
+            embedding = self.embed(user_text)
+
+            hit = self.lookup(user_text, level, embedding)
+            if hit:
+                return (hit["styled"], hit["raw"]) if return_raw else hit["styled"]
+
+            styled, raw = generate_fn(user_text, level, return_raw=True, stream=stream)
+            if isinstance(styled, str):
+                self.store(user_text, level, styled, raw, embedding)
+            else:
+                styled = self._store_when_done(styled, user_text, level, raw, embedding)
+            return (styled, raw) if return_raw else styled
+
+        return generate
+
+    def _store_when_done(self, pieces, question, level, raw, embedding):
+        # Stream durchreichen, erst die vollständige Antwort speichern
+        collected = []
+        for piece in pieces:
+            collected.append(piece)
+            yield piece
+        self.store(question, level, "".join(collected).strip(), raw, embedding)
+
+
+# ============================================================
+# SINGLETON
+# ============================================================
+
+_semantic_cache = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache(version, embed_fn=None):
+    """
+    Prozessweiter Cache. Ändert sich die Version (Prompts/IEs), werden
+    die gespeicherten Antworten verworfen (Invalidierungs-Hook).
+    """
+    global _semantic_cache
+
+    with _semantic_cache_lock:
+        if _semantic_cache is None:
+            _semantic_cache = SemanticCache(version, embed_fn=embed_fn)
+        elif _semantic_cache.version != version:
+            print("[CACHE] Prompt-Version geändert – semantischer Cache wird geleert")
+            _semantic_cache.invalidate(version)
+        return _semantic_cache
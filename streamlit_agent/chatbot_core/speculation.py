@@ -0,0 +1,58 @@
+# ============================================================
+# speculation.py
+# Spekulative Hauptgenerierung parallel zum Gatekeeper.
+#
+# Mit CHATBOT_SPECULATIVE=1 startet der MODEL_MAIN-Aufruf gleichzeitig
+# mit classify_input(). Ist die Eingabe OUT_OF_SCOPE/AFFECT_ONLY,
+# wird die Generierung abgebrochen und verworfen.
+#
+# Die Zähler zeigen, ob sich das lohnt: gesparte Wartezeit bei
+# genutzter Spekulation vs. verworfene Tokens/Zeit bei Abbruch.
+# ============================================================
+
+import os
+import threading
+
+from .chunking import count_tokens
+
+SPECULATIVE = os.getenv("CHATBOT_SPECULATIVE", "0") == "1"
+
+_stats_lock = threading.Lock()
+SPECULATION_STATS = {
+    "runs": 0,
+    "used": 0,              # Gatekeeper: IN_DOMAIN → spekulatives Ergebnis genutzt
+    "dropped": 0,           # Gatekeeper: OUT_OF_SCOPE/AFFECT_ONLY → verworfen
+    "saved_ms": 0.0,        # Wartezeit auf den Gatekeeper, die parallel lief
+    "wasted_ms": 0.0,       # Laufzeit verworfener Generierungen
+    "tokens_used": 0,       # Tokens genutzter spekulativer Aufrufe
+    "tokens_wasted": 0,     # (geschätzte) Tokens verworfener Aufrufe
+}
+
+
+def estimate_prompt_tokens(*messages):
+    return sum(count_tokens(m) for m in messages)
+
+
+def record_used(gate_ms, answer_ms, tokens):
+    with _stats_lock:
+        SPECULATION_STATS["runs"] += 1
+        SPECULATION_STATS["used"] += 1
+        # ohne Spekulation hätte die Generierung erst nach dem Gatekeeper begonnen
+        SPECULATION_STATS["saved_ms"] += min(gate_ms, answer_ms)
+        SPECULATION_STATS["tokens_used"] += tokens
+
+
+def record_dropped(answer_ms, tokens):
+    with _stats_lock:
+        SPECULATION_STATS["runs"] += 1
+        SPECULATION_STATS["dropped"] += 1
+        SPECULATION_STATS["wasted_ms"] += answer_ms
+        SPECULATION_STATS["tokens_wasted"] += tokens
+
+
+def speculation_stats():
+    with _stats_lock:
+        stats = dict(SPECULATION_STATS)
+    stats["saved_ms"] = round(stats["saved_ms"], 1)
+    stats["wasted_ms"] = round(stats["wasted_ms"], 1)
+    return stats
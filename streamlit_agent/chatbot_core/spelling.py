@@ -0,0 +1,231 @@
+# ============================================================
+# spelling.py
+# Lokale Rechtschreibkorrektur statt autocorrect()-LLM-Aufruf.
+#
+# Wörterbuch: Wörter aus dem Paper (Chroma-Collection bzw. PDF),
+# den Information Units (IEs), den Standardfragen und häufigen
+# deutschen Funktionswörtern. Als "bekannt" gelten zusätzlich alle
+# deutschen Wortformen aus pyspellchecker ("Quallen", "habe",
+# "Fischen") – korrekt geschriebene Wörter werden nie umgeschrieben.
+#
+# Ablauf pro Eingabe:
+#   1) Alle Tokens bekannt → unverändert zurück (häufigster Fall,
+#      kein Vergleich, kein Netzwerkaufruf)
+#   2) Unbekannte Tokens → nächstes Fachwort per Edit-Distanz
+#      (rapidfuzz, OSA: Vertauschung = 1), höchstens 1 Fehler bei
+#      kurzen, 2 bei langen Wörtern, z. B. "Meeresschne" → "Meeresschnee"
+#   3) Bleibt ein Großteil unbekannt (sehr verrauschte Eingabe),
+#      meldet needs_llm() das dem Aufrufer → LLM-Fallback
+#
+# Komposita ("Meeresschneeproben") und unbekannte, aber korrekte
+# Wörter werden nicht angefasst: ohne engen Kandidaten gleicher
+# Länge bleibt das Token stehen.
+# ============================================================
+
+import re
+import threading
+import time
+from collections import defaultdict
+
+from rapidfuzz import process
+from rapidfuzz.distance import OSA
+
+from .answer_cache import CANONICAL_QUERIES
+from .ingest import PDF_PATH, iter_pages
+from .text_analysis import STOPWORDS_DE
+
+MIN_TOKEN_LEN = 4           # kürzere Tokens werden nie korrigiert
+LONG_TOKEN_LEN = 8          # ab dieser Länge sind 2 Fehler erlaubt, darunter 1
+LLM_FALLBACK_RATIO = 0.5    # Anteil unaufgelöster Tokens, ab dem das LLM übernimmt
+
+TOKEN_RE = re.compile(r"[A-Za-zÄÖÜäöüß]+")
+
+COMMON_WORDS = {
+    "meeresschnee", "hallo", "danke", "okay", "ja", "nein", "nicht", "kein", "keine",
+    "bedeutet", "bedeutung", "begriff", "beschreibe", "entsteht", "entstehung",
+    "wichtig", "wichtigkeit", "gebildet", "zerfällt", "abgebaut", "gesammelt",
+    "probe", "proben", "probenahme", "gemessen", "meer", "ozean", "tiefsee",
+    "schnee", "wasser", "partikel", "aggregat", "aggregate", "kurz", "einfach",
+    "nochmal", "beispiel", "heißt", "meinst", "verstehe", "versteht", "passiert",
+}
+
+_stats_lock = threading.Lock()
+SPELL_STATS = {
+    "texts": 0,
+    "all_known": 0,         # Schritt 1: nichts zu tun
+    "corrected": 0,         # mindestens ein Token lokal korrigiert
+    "llm_fallback": 0,      # zu verrauscht → LLM
+    "tokens_fixed": 0,
+    "ms_total": 0.0,
+}
+
+
+def spell_stats():
+    with _stats_lock:
+        stats = dict(SPELL_STATS)
+    stats["ms_total"] = round(stats["ms_total"], 1)
+    return stats
+
+
+def iter_texts(obj):
+    """Strings aus verschachtelten IEs/Listen/Dicts."""
+    if isinstance(obj, str):
+        yield obj
+    elif isinstance(obj, dict):
+        for value in obj.values():
+            yield from iter_texts(value)
+    elif isinstance(obj, (list, tuple, set)):
+        for value in obj:
+            yield from iter_texts(value)
+
+
+def max_edits(word):
+    """Erlaubte Edit-Distanz je nach Wortlänge."""
+    return 2 if len(word) >= LONG_TOKEN_LEN else 1
+
+
+def load_german_word_forms():
+    """
+    Deutsche Wortformen (kleingeschrieben) aus pyspellchecker. Fehlt das
+    Paket, bleibt nur das Fachwörterbuch – dann können korrekte Wörter
+    außerhalb davon korrigiert werden.
+    """
+    try:
+        from spellchecker import SpellChecker as WordList
+    except ImportError:
+        print("[SPELL] pyspellchecker fehlt – nur Fachwörterbuch als bekannte Wörter")
+        return frozenset()
+    return frozenset(WordList(language="de").word_frequency.dictionary)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text)
+
+
+def match_case(word, template):
+    if template.isupper() and len(template) > 1:
+        return word.upper()
+    if template[:1].isupper():
+        return word[:1].upper() + word[1:]
+    return word
+
+
+class SpellChecker:
+
+    def __init__(self, texts=(), word_forms=None):
+        # Korrekturziele: Fach- und Funktionswörter
+        self.vocabulary = set(STOPWORDS_DE) | COMMON_WORDS
+        for text in iter_texts(texts):
+            self.vocabulary.update(t.lower() for t in tokenize(text))
+        for questions in CANONICAL_QUERIES.values():
+            for q in questions:
+                self.vocabulary.update(t.lower() for t in tokenize(q))
+
+        # nur "bekannt", nie Korrekturziel: allgemeine deutsche Wortformen
+        self.word_forms = load_german_word_forms() if word_forms is None else frozenset(word_forms)
+
+        # Kandidaten nach Länge (sortiert → reproduzierbare Gleichstände)
+        self._by_length = defaultdict(list)
+        for word in sorted(self.vocabulary):
+            self._by_length[len(word)].append(word)
+
+    def is_known(self, token):
+        word = token.lower()
+        return word in self.vocabulary or word in self.word_forms
+
+    def candidate(self, token):
+        """Nächstes Wörterbuchwort für ein unbekanntes Token oder None."""
+        word = token.lower()
+        if len(word) < MIN_TOKEN_LEN:
+            return None
+
+        edits = max_edits(word)
+        pool = []
+        for n in range(len(word) - edits, len(word) + edits + 1):
+            pool += self._by_length.get(n, [])
+
+        hit = process.extractOne(word, pool, scorer=OSA.distance, score_cutoff=edits)
+        return hit[0] if hit else None
+
+    def correct(self, text):
+        """
+        Rückgabe: (korrigierter Text, Info-Dict)
+        Info: {"unknown", "fixed", "unresolved", "tokens"}
+        """
+        tokens = tokenize(text)
+        unknown = [t for t in tokens if not self.is_known(t)]
+        info = {"tokens": len(tokens), "unknown": len(unknown), "fixed": {}, "unresolved": []}
+        if not unknown:
+            return text, info
+
+        for token in dict.fromkeys(unknown):
+            fix = self.candidate(token)
+            if fix is None:
+                info["unresolved"].append(token)
+            else:
+                info["fixed"][token] = match_case(fix, token)
+
+        if info["fixed"]:
+            text = TOKEN_RE.sub(lambda m: info["fixed"].get(m.group(0), m.group(0)), text)
+        return text, info
+
+    @staticmethod
+    def needs_llm(info):
+        # einzelne unbekannte Wörter sind normal; erst bei viel Rauschen lohnt das LLM
+        unresolved = [t for t in info["unresolved"] if len(t) >= MIN_TOKEN_LEN]
+        return len(unresolved) >= 2 and len(unresolved) / max(info["tokens"], 1) >= LLM_FALLBACK_RATIO
+
+
+def autocorrect_local(checker, text):
+    """
+    Lokale Korrektur mit Statistik. Rückgabe: (text, needs_llm)
+    """
+    start = time.perf_counter()
+    corrected, info = checker.correct(text)
+    needs_llm = checker.needs_llm(info)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    with _stats_lock:
+        SPELL_STATS["texts"] += 1
+        SPELL_STATS["ms_total"] += elapsed
+        SPELL_STATS["tokens_fixed"] += len(info["fixed"])
+        if not info["unknown"]:
+            SPELL_STATS["all_known"] += 1
+        elif needs_llm:
+            SPELL_STATS["llm_fallback"] += 1
+        elif info["fixed"]:
+            SPELL_STATS["corrected"] += 1
+
+    if info["fixed"]:
+        print(f"[SPELL] {info['fixed']} ({elapsed:.1f} ms)")
+    if needs_llm:
+        print(f"[SPELL] Zu viele unbekannte Wörter {info['unresolved']} → LLM-Fallback")
+    return corrected, needs_llm
+
+
+# ============================================================
+# SINGLETON
+# ============================================================
+
+def corpus_texts(collection=None, pdf_path=PDF_PATH):
+    """Paper-Text: aus der Collection (schon geladen) oder direkt aus dem PDF."""
+    if collection is not None:
+        return collection.get(include=["documents"])["documents"]
+    return [text for _, text in iter_pages(pdf_path)]
+
+
+_checker = None
+_checker_lock = threading.Lock()
+
+
+def get_spell_checker(ies=None, collection=None):
+    """Wörterbuch wird einmal pro Prozess aufgebaut."""
+    global _checker
+
+    with _checker_lock:
+        if _checker is None:
+            start = time.perf_counter()
+            _checker = SpellChecker([ies or {}, corpus_texts(collection)])
+            print(f"[SPELL] Wörterbuch mit {len(_checker.vocabulary)} Wörtern "
+                  f"in {(time.perf_counter() - start) * 1000:.0f} ms aufgebaut")
+        return _checker
@@ -0,0 +1,205 @@
+# ============================================================
+# style_scoring.py
+# Stil-Compliance aller Assistenten-Nachrichten einer Studienwelle.
+#
+# Prüft jede Nachricht mit role == "assistant" gegen
+# ANTHRO_RULES_TEST (max. Emojis, verbotene Pronomen je Level) und
+# zählt Meta-Wörter mit ("stil", "regel", ...).
+#
+# - data/chatlogs.jsonl wird per pd.read_json(lines=True, chunksize)
+#   gestreamt, im Speicher liegen nur ein Chunk und die Summen
+# - Prüfungen laufen vektorisiert über pandas-String-Operationen
+#   (dieselben Emoji-Blöcke/Wortgrenzen wie text_analysis.py)
+# - Ausgabe: Compliance-Tabellen pro Nutzer und pro Level
+#   (Nachrichten ohne user_id unter "unknown")
+#
+# Quellen:
+#   JSONL (Standard), CSV-Export des Sheets "chatlogs" oder das
+#   Sheet direkt per gspread (Service-Account-Datei)
+#
+# Aufruf (aus dem Repo-Root):
+#   python -m streamlit_agent.chatbot_core.style_scoring
+#   python -m streamlit_agent.chatbot_core.style_scoring --csv chatlogs.csv --out data/style
+#   python -m streamlit_agent.chatbot_core.style_scoring --sheet --credentials service_account.json
+# ============================================================
+
+import argparse
+import os
+import re
+import time
+
+import pandas as pd
+
+from .text_analysis import ANTHRO_RULES_TEST, EMOJI_CLASS, META_WORDS
+
+CHATLOGS_PATH = "data/chatlogs.jsonl"
+SHEET_KEY = "18eP378_ZOSO7R7KeRWlEPjedN7kXq2-CkNmFYRHRa3M"
+SHEET_NAME = "chatlogs"
+CHUNK_SIZE = 5000
+# Gruppe für Zeilen ohne (gültige) user_id
+UNKNOWN_USER = "unknown"
+
+COUNT_COLUMNS = ["messages", "emoji_ok", "pronoun_ok", "meta_free", "compliant", "emojis", "chars"]
+
+
+def _pronoun_pattern(pronouns):
+    if not pronouns:
+        return None
+    return r"\b(?:" + "|".join(re.escape(p.strip().lower()) for p in pronouns) + r")\b"
+
+
+PRONOUN_PATTERNS = {level: _pronoun_pattern(r["forbidden_pronouns"]) for level, r in ANTHRO_RULES_TEST.items()}
+META_PATTERN = "|".join(re.escape(m) for m in META_WORDS)
+
+
+# ============================================================
+# QUELLEN (jeweils DataFrame-Chunks)
+# ============================================================
+
+def iter_jsonl(path=CHATLOGS_PATH, chunksize=CHUNK_SIZE):
+    reader = pd.read_json(path, lines=True, chunksize=chunksize,
+                          dtype=False, convert_dates=False)
+    with reader:
+        yield from reader
+
+
+def iter_csv(path, chunksize=CHUNK_SIZE):
+    yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def iter_sheet(credentials, chunksize=CHUNK_SIZE):
+    """Sheet "chatlogs" per gspread – die API liefert alle Zeilen auf einmal."""
+    import gspread
+
+    client = gspread.service_account(filename=credentials)
+    records = client.open_by_key(SHEET_KEY).worksheet(SHEET_NAME).get_all_records()
+    df = pd.DataFrame(records)
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+# ============================================================
+# VEKTORISIERTE PRÜFUNG
+# ============================================================
+
+def score_chunk(df):
+    """Assistenten-Nachrichten eines Chunks → eine Zeile pro Nachricht mit Prüfergebnissen."""
+    df = df[df["role"] == "assistant"]
+    level = pd.to_numeric(df["anthro"], errors="coerce")
+    df = df[level.isin(list(ANTHRO_RULES_TEST))]
+    level = level[df.index].astype(int)
+
+    text = df["message"].fillna("").astype(str)
+    lowered = text.str.lower()
+
+    scored = pd.DataFrame({
+        "user_id": (pd.to_numeric(df["user_id"], errors="coerce").astype("Int64")
+                    .astype("string").fillna(UNKNOWN_USER)),
+        "level": level,
+        "chars": text.str.len(),
+        "emojis": text.str.count(EMOJI_CLASS),
+        "meta_free": ~lowered.str.contains(META_PATTERN, regex=True),
+    })
+    scored["emoji_ok"] = scored["emojis"] <= level.map(lambda l: ANTHRO_RULES_TEST[l]["max_emojis"])
+
+    scored["pronoun_ok"] = True
+    for lvl, pattern in PRONOUN_PATTERNS.items():
+        mask = level == lvl
+        if pattern and mask.any():
+            scored.loc[mask, "pronoun_ok"] = ~lowered[mask].str.contains(pattern, regex=True)
+
+    scored["compliant"] = scored["emoji_ok"] & scored["pronoun_ok"]
+    scored["messages"] = 1
+    return scored
+
+
+def _sums(scored, key):
+    return scored.groupby(key)[COUNT_COLUMNS].sum()
+
+
+def compliance_table(sums):
+    """Summen → Anteile in % (plus Anzahl, Ø Emojis, Ø Länge)."""
+    table = pd.DataFrame({"messages": sums["messages"].astype(int)})
+    for col in ["compliant", "emoji_ok", "pronoun_ok", "meta_free"]:
+        table[col + "_%"] = (sums[col] / sums["messages"] * 100).round(1)
+    table["emojis_avg"] = (sums["emojis"] / sums["messages"]).round(2)
+    table["chars_avg"] = (sums["chars"] / sums["messages"]).round(0)
+    return table
+
+
+def score_chunks(chunks, details_path=None):
+    """
+    Streamt die Chunks, summiert pro Nutzer/Level.
+    Gibt (pro_nutzer, pro_level, stats) zurück.
+    """
+    by_user = by_level = None
+    header_written = False
+    stats = {"rows": 0, "assistant_messages": 0}
+    start = time.perf_counter()
+
+    for chunk in chunks:
+        stats["rows"] += len(chunk)
+        scored = score_chunk(chunk)
+        stats["assistant_messages"] += len(scored)
+        if scored.empty:
+            continue
+
+        user_sums = _sums(scored, "user_id")
+        level_sums = _sums(scored, "level")
+        by_user = user_sums if by_user is None else by_user.add(user_sums, fill_value=0)
+        by_level = level_sums if by_level is None else by_level.add(level_sums, fill_value=0)
+
+        if details_path:
+            # erster nicht-leerer Chunk legt die Datei (mit Kopfzeile) neu an
+            scored.drop(columns="messages").to_csv(details_path, mode="a" if header_written else "w",
+                                                   header=not header_written, index=False)
+            header_written = True
+
+    stats["seconds"] = round(time.perf_counter() - start, 2)
+    if by_user is None:
+        empty = compliance_table(pd.DataFrame(columns=COUNT_COLUMNS))
+        return empty, empty, stats
+    return compliance_table(by_user), compliance_table(by_level), stats
+
+
+# ============================================================
+# CLI
+# ============================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stil-Compliance der Assistenten-Nachrichten bewerten")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--jsonl", default=CHATLOGS_PATH)
+    source.add_argument("--csv", help="CSV-Export des Sheets \"chatlogs\"")
+    source.add_argument("--sheet", action="store_true", help="Sheet \"chatlogs\" direkt lesen (gspread)")
+    parser.add_argument("--credentials", default=os.getenv("GOOGLE_APPLICATION_CREDENTIALS"),
+                        help="Service-Account-JSON für --sheet")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--out", help="Verzeichnis für style_by_user.csv / style_by_level.csv / style_details.csv")
+    args = parser.parse_args()
+
+    if args.sheet:
+        chunks = iter_sheet(args.credentials, args.chunksize)
+    elif args.csv:
+        chunks = iter_csv(args.csv, args.chunksize)
+    else:
+        chunks = iter_jsonl(args.jsonl, args.chunksize)
+
+    details_path = None
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+        details_path = os.path.join(args.out, "style_details.csv")
+
+    per_user, per_level, stats = score_chunks(chunks, details_path)
+
+    print(f"[STYLE] {stats['assistant_messages']} Assistenten-Nachrichten "
+          f"({stats['rows']} Zeilen) in {stats['seconds']} s")
+    print("\n===== PRO LEVEL =====")
+    print(per_level.to_string())
+    print("\n===== PRO NUTZER =====")
+    print(per_user.to_string())
+
+    if args.out:
+        per_user.to_csv(os.path.join(args.out, "style_by_user.csv"))
+        per_level.to_csv(os.path.join(args.out, "style_by_level.csv"))
+        print(f"\n[STYLE] Tabellen gespeichert in {args.out}")
@@ -0,0 +1,114 @@
+# ============================================================
+# term_index.py
+# Vorberechneter Begriffsindex für die Fuzzy-Erkennung von
+# Fachbegriffen und Themen.
+#
+# Gleiche Semantik wie die alte Schleife in detect_term(): die ganze
+# Anfrage wird per fuzz.partial_ratio mit jedem Begriff verglichen,
+# der ERSTE Begriff (Fachbegriffe vor Themen, Listenreihenfolge) über
+# der Schwelle gewinnt. Statt einer Python-Schleife mit einem
+# partial_ratio-Aufruf pro Begriff läuft process.extract_iter in
+# C++ über die einmal abgelegte Begriffsliste und hört beim ersten
+# Treffer auf.
+#
+# Benchmark gegen die alte Schleife (aus dem Repo-Root):
+#   python -m streamlit_agent.chatbot_core.term_index
+# Stand: 89 Beispielfragen, gleiche Ergebnisse bei allen 89,
+# ~39 µs → ~28 µs pro Frage (≈1,4×) – die Schleife war schon kurz.
+# ============================================================
+
+import time
+
+from rapidfuzz import fuzz, process
+
+GENERIC_TOPIC = "GENERIC_TERM"
+
+GENERIC_TERMS = [
+    "aggregat", "aggregation", "turbulenz", "strömung",
+    "organismus", "partikel", "sediment", "kohlenstoff"
+]
+
+TOPIC_TERMS = {
+    "formation": ["bildung", "entstehung", "formation"],
+    "sampling":  ["messung", "probe", "sampling"],
+    "importance": ["bedeutung", "relevanz", "wichtigkeit"],
+    "degradation": ["zerfall", "abbau", "degradation"],
+    "definition": ["definition", "beschreibung"]
+}
+
+
+class TermIndex:
+    """Begriff → Thema; Begriffe werden einmal normalisiert abgelegt."""
+
+    def __init__(self, term_topics):
+        self.terms = [t.lower() for t in term_topics]
+        self.topics = [term_topics[t] for t in term_topics]
+
+    @classmethod
+    def from_groups(cls, generic_terms=GENERIC_TERMS, topic_terms=TOPIC_TERMS):
+        # Fachbegriffe zuerst: bei gleichem Score gewinnt der früher gelistete Begriff
+        term_topics = {t: GENERIC_TOPIC for t in generic_terms}
+        for topic, terms in topic_terms.items():
+            for t in terms:
+                term_topics.setdefault(t, topic)
+        return cls(term_topics)
+
+    def match(self, text, threshold=82):
+        """
+        Erster Begriff (in Listenreihenfolge) mit partial_ratio >= threshold
+        gegen den ganzen Text: {"term", "topic", "score"} oder None.
+        """
+        for term, score, idx in process.extract_iter(text.lower(), self.terms, scorer=fuzz.partial_ratio,
+                                                     score_cutoff=threshold):
+            return {"term": term, "topic": self.topics[idx], "score": float(score)}
+        return None
+
+
+# ============================================================
+# BENCHMARK
+# ============================================================
+
+def legacy_detect_term(txt, threshold=82):
+    """Alte Schleifen-Variante aus marine_snow_chatbot_rag.detect_term."""
+    for term in GENERIC_TERMS:
+        if fuzz.partial_ratio(txt, term) >= threshold:
+            return GENERIC_TOPIC
+    for topic, tlist in TOPIC_TERMS.items():
+        for t in tlist:
+            if fuzz.partial_ratio(txt, t) >= threshold:
+                return topic
+    return None
+
+
+def benchmark(queries, repeat=200):
+    index = TermIndex.from_groups()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        legacy = [legacy_detect_term(q.lower()) for q in queries]
+    legacy_us = (time.perf_counter() - start) / (repeat * len(queries)) * 1e6
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        indexed = [index.match(q) for q in queries]
+    index_us = (time.perf_counter() - start) / (repeat * len(queries)) * 1e6
+
+    same = sum(
+        (hit["topic"] if hit else None) == old for hit, old in zip(indexed, legacy)
+    )
+    return {
+        "queries": len(queries),
+        "legacy_us_per_query": round(legacy_us, 1),
+        "index_us_per_query": round(index_us, 1),
+        "speedup": round(legacy_us / index_us, 1) if index_us else None,
+        "same_result": same,
+    }
+
+
+if __name__ == "__main__":
+    from .answer_cache import CANONICAL_QUERIES
+    from .intent_classifier import load_chatlog_questions
+
+    sample = [q for qs in CANONICAL_QUERIES.values() for q in qs] + load_chatlog_questions()
+    sample += ["Was ist ein Aggregat?", "Turbulenz", "Meeresschneeproben", "Entstehungsprozess"]
+    print(benchmark(sample))
@@ -0,0 +1,193 @@
+# ============================================================
+# text_analysis.py
+# Ein Durchlauf über eine Antwort für die Anthropomorphismus-Checks.
+#
+# Bisher:
+#   - count_emojis(): re.match Zeichen für Zeichen
+#   - contains_forbidden_pronouns(): Teilstring-Suche pro Pronomen
+#     ("ich" traf auch "nicht", "sich", ...)
+#   - tests/test_engine.has_emoji(): Schleife über einen festen
+#     Emoji-String
+#
+# analyze_text() geht mit EINEM vorkompilierten Regex über den Text
+# und sammelt Emojis (Emoji-Blöcke und Zeichen mit Emoji-Darstellung;
+# ✓ ✔ ❤ und Pfeile nur mit U+FE0F) und Wörter; Pronomen werden
+# gegen eine Wortmenge geprüft, Meta-Wörter als Wortstamm im
+# kleingeschriebenen Text.
+#
+# Ergebnis (dict):
+#   {"length", "emoji_count", "pronoun_hits", "meta_hits"}
+#
+# Micro-Benchmark gegen die alten Helfer (aus dem Repo-Root):
+#   python -m streamlit_agent.chatbot_core.text_analysis
+# ============================================================
+
+import re
+import time
+from functools import lru_cache
+
+# Unicode-Blöcke, die als Emoji zählen
+EMOJI_RANGES = (
+    ("\U0001F300", "\U0001FAFF"),   # Symbole & Piktogramme, Smileys, Tiere, ...
+    ("\U0001F1E6", "\U0001F1FF"),   # Flaggen (Regional Indicators)
+    # Einzelne Zeichen mit Emoji-Darstellung (Unicode Emoji_Presentation)
+    ("\u231A", "\u231B"),           # ⌚ ⌛
+    ("\u23E9", "\u23EC"),           # ⏩ ⏪ ⏫ ⏬
+    ("\u23F0", "\u23F0"),           # ⏰
+    ("\u23F3", "\u23F3"),           # ⏳
+    ("\u25FD", "\u25FE"),           # ◽ ◾
+    ("\u2614", "\u2615"),           # ☔ ☕
+    ("\u2648", "\u2653"),           # ♈ – ♓
+    ("\u267F", "\u267F"),           # ♿
+    ("\u2693", "\u2693"),           # ⚓
+    ("\u26A1", "\u26A1"),           # ⚡
+    ("\u26AA", "\u26AB"),           # ⚪ ⚫
+    ("\u26BD", "\u26BE"),           # ⚽ ⚾
+    ("\u26C4", "\u26C5"),           # ⛄ ⛅
+    ("\u26CE", "\u26CE"),           # ⛎
+    ("\u26D4", "\u26D4"),           # ⛔
+    ("\u26EA", "\u26EA"),           # ⛪
+    ("\u26F2", "\u26F3"),           # ⛲ ⛳
+    ("\u26F5", "\u26F5"),           # ⛵
+    ("\u26FA", "\u26FA"),           # ⛺
+    ("\u26FD", "\u26FD"),           # ⛽
+    ("\u2705", "\u2705"),           # ✅
+    ("\u270A", "\u270B"),           # ✊ ✋
+    ("\u2728", "\u2728"),           # ✨
+    ("\u274C", "\u274C"),           # ❌
+    ("\u274E", "\u274E"),           # ❎
+    ("\u2753", "\u2755"),           # ❓ ❔ ❕
+    ("\u2757", "\u2757"),           # ❗
+    ("\u2795", "\u2797"),           # ➕ ➖ ➗
+    ("\u27B0", "\u27B0"),           # ➰
+    ("\u27BF", "\u27BF"),           # ➿
+    ("\u2B1B", "\u2B1C"),           # ⬛ ⬜
+    ("\u2B50", "\u2B50"),           # ⭐
+    ("\u2B55", "\u2B55"),           # ⭕
+)
+
+# Symbole mit Textdarstellung (☀ ❤ ✓ ✔ ➜ ← ...) zählen nur mit
+# Variation Selector 16 (U+FE0F) dahinter als Emoji, z. B. "❤️"
+TEXT_SYMBOL_RANGES = (
+    ("\u2190", "\u21FF"),           # Pfeile
+    ("\u2300", "\u23FF"),           # Technische Zeichen
+    ("\u2600", "\u27BF"),           # Verschiedene Symbole, Dingbats
+    ("\u2B00", "\u2BFF"),           # Pfeile & Symbole
+)
+
+
+def _char_class(ranges):
+    return "[" + "".join(f"{a}-{b}" if a != b else a for a, b in ranges) + "]"
+
+
+EMOJI_CLASS = f"(?:{_char_class(EMOJI_RANGES)}|{_char_class(TEXT_SYMBOL_RANGES)}\uFE0F)"
+
+# Gruppe 1 = Emoji, Gruppe 2 = Wort
+_TOKEN_RE = re.compile(f"({EMOJI_CLASS})|(\\w+)")
+
+FIRST_PERSON_PRONOUNS = ("ich", "wir", "mir", "mich", "uns")
+META_WORDS = ("anthropomorph", "stil", "regel", "hier ist dein text")
+
+# Funktionswörter für Stichwortsuche (hybrid), Längenanpassung und
+# Rechtschreibprüfung – hier, damit diese ohne Chroma/pdfplumber laden
+STOPWORDS_DE = {
+    "aber", "alle", "alles", "als", "auch", "auf", "aus", "bei", "bin", "bis",
+    "bitte", "das", "dass", "dem", "den", "der", "des", "die", "dir", "doch",
+    "du", "durch", "ein", "eine", "einem", "einen", "einer", "eines", "erkläre", "erklär",
+    "es", "für", "gibt", "hat", "ich", "ist", "kann", "kannst", "man", "mehr",
+    "mir", "mit", "nach", "noch", "oder", "sagen", "sich", "sie", "sind",
+    "über", "um", "und", "uns", "von", "was", "welche", "welcher", "welches",
+    "wer", "weshalb", "wie", "wieso", "wir", "wird", "wo", "woher", "womit",
+    "wozu", "warum", "zu", "zum", "zur", "genau", "eigentlich", "denn",
+}
+
+# Stilregeln der Auswertung je Anthropomorphie-Level – eine Quelle für
+# chatbot_v2/chatbot_v3 (style_check) und style_scoring
+ANTHRO_RULES_TEST = {
+    0: {
+        "max_emojis": 0,
+        "forbidden_pronouns": ["ich", "wir", "du", "mich", "mir", "uns", "dich", "euch", "ihr", "ihrer", "dein", "deine", "mein", "meine", "unser", "unsere", "euer", "eure", "ihre", "seine"],
+    },
+    1: {
+        "max_emojis": 5,
+        "forbidden_pronouns": [],
+    },
+    2: {
+        "max_emojis": 20,
+        "forbidden_pronouns": [],
+    }
+}
+
+
+@lru_cache(maxsize=32)
+def _word_set(words):
+    # " ich " (alte Schreibweise mit Leerzeichen) → "ich"
+    return frozenset(w.strip().lower() for w in words if w.strip())
+
+
+def analyze_text(text, pronouns=FIRST_PERSON_PRONOUNS, meta_words=META_WORDS):
+    """Länge, Emoji-Anzahl, gefundene Pronomen und Meta-Wörter einer Antwort."""
+    pronoun_set = _word_set(tuple(pronouns))
+    lowered = text.lower()
+
+    emoji_count = 0
+    pronoun_hits = {}
+    for emoji, word in _TOKEN_RE.findall(lowered):
+        if emoji:
+            emoji_count += 1
+        elif word in pronoun_set:
+            pronoun_hits[word] = True
+
+    return {
+        "length": len(text),
+        "emoji_count": emoji_count,
+        "pronoun_hits": list(pronoun_hits),
+        "meta_hits": [m for m in meta_words if m in lowered],
+    }
+
+
+# ============================================================
+# MICRO-BENCHMARK
+# ============================================================
+
+SAMPLE_ANSWER = (
+    "Hey du! 🌊 Ich erkläre dir gern, was Meeresschnee ist ✨. Wir sehen hier kleine "
+    "Aggregate aus Partikeln, Schleim und Mikroorganismen, die langsam absinken. "
+    "Sie sind nicht einfach Schmutz – sie transportieren Kohlenstoff in die Tiefsee 🐬. "
+) * 6
+
+LEGACY_EMOJIS = "😀🙂😊🌊✨⚡🐬🧪🍃🌍💙🥰🤗🏝️"
+
+
+def _legacy(text, pronouns):
+    emojis = sum(bool(re.match(r'[\U0001F300-\U0001FAFF]', c)) for c in text)
+    has_emoji = any(e in text for e in LEGACY_EMOJIS)
+    pronoun = any(p in text.lower() for p in pronouns)
+    meta = [m for m in META_WORDS if m in text.lower()]
+    return emojis, has_emoji, pronoun, meta
+
+
+def benchmark(text=SAMPLE_ANSWER, repeat=2000):
+    pronouns = FIRST_PERSON_PRONOUNS
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        _legacy(text, pronouns)
+    legacy_us = (time.perf_counter() - start) / repeat * 1e6
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = analyze_text(text, pronouns)
+    single_pass_us = (time.perf_counter() - start) / repeat * 1e6
+
+    return {
+        "chars": len(text),
+        "legacy_us": round(legacy_us, 1),
+        "single_pass_us": round(single_pass_us, 1),
+        "speedup": round(legacy_us / single_pass_us, 1) if single_pass_us else None,
+        "result": result,
+    }
+
+
+if __name__ == "__main__":
+    print(benchmark())
@@ -1,22 +1,25 @@
 import streamlit as st
-import os
 from dotenv import load_dotenv
-from openai import OpenAI
-import chromadb
-import pdfplumber
-import uuid
-import pandas as pd
+from chatbot_core import get_retriever
+from chatbot_core.llm_client import get_client, latency_stats
+from chatbot_core.bulk_eval import BULK_WORKERS, new_run_id, plan_cases, print_summary, results_frame, run_bulk
+from chatbot_core.keyword_matcher import build_matchers
+from chatbot_core.text_analysis import ANTHRO_RULES_TEST, analyze_text
+from chatbot_core.spelling import autocorrect_local, get_spell_checker
+from chatbot_core.length_fitter import fit_length
+from chatbot_core.generation import GENERATION_MODE, is_single_pass, parse_structured, style_rewrite_prompt, styled_field_instructions
 import matplotlib.pyplot as plt
 import seaborn as sns
-import re
 import random
+import time
 
 # ============================================================
 # ENV
 # ============================================================
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Gemeinsamer Client: Keep-Alive-Pool, Timeouts, Retries, Parallelitätslimit
+client = get_client()
 
 MODEL_MAIN = "gpt-4.1"
 MODEL_SPELL = "gpt-4o-mini"
@@ -146,41 +149,25 @@ IEs = {
 # RAG SETUP
 # ============================================================
 
-PDF_PATH = "streamlit_agent/relevante_Informationen_Paper.pdf"
-
-def load_chroma():
-    chroma_client = chromadb.PersistentClient(path="./chroma_marine_snow")
-    if "marine_snow" in [c.name for c in chroma_client.list_collections()]:
-        return chroma_client.get_collection("marine_snow")
-
-    col = chroma_client.create_collection("marine_snow")
-
-    with pdfplumber.open(PDF_PATH) as pdf:
-        for page_num, page in enumerate(pdf.pages):
-            text = page.extract_text()
-            if not text:
-                continue
-            for para in text.split("\n"):
-                if len(para.strip()) < 50:
-                    continue
-                col.add(
-                    documents=[para.strip()],
-                    ids=[str(uuid.uuid4())],
-                    metadatas=[{"page": page_num + 1}]
-                )
-    return col
-
-collection = load_chroma()
+# Gemeinsamer Retriever – Collection wird über chatbot_core.ingest batchweise aufgebaut
+retriever = get_retriever()
 
 def rag_section(query):
-    result = collection.query(query_texts=[query], n_results=1)
-    return result["documents"][0][0]
+    # Hybride Suche (BM25 + Vektor) über chatbot_core.hybrid
+    return retriever.rag_section(query)
 
 # ============================================================
 # SPELLCHECK
 # ============================================================
 
+# Lokales Wörterbuch (Paper + IEs) – das LLM nur bei sehr verrauschter Eingabe
+spell_checker = get_spell_checker(IEs, retriever.collection)
+
 def autocorrect(text):
+    corrected, needs_llm = autocorrect_local(spell_checker, text)
+    if not needs_llm:
+        return corrected
+
     r = client.chat.completions.create(
         model=MODEL_SPELL,
         temperature=0,
@@ -312,55 +299,58 @@ ENDE DES SYSTEMPROMPTS
 TARGET_MIN = 800
 TARGET_MAX = 1000
 
-def enforce_length(text):
-    attempt = text
-
-    for _ in range(5):
-        length = len(attempt)
-
-        if TARGET_MIN <= length <= TARGET_MAX:
-            return attempt
-
-        fix_prompt = f"""
-Korrigiere folgenden Text so, dass er zwingend zwischen {TARGET_MIN} und {TARGET_MAX} Zeichen lang ist.
+def expand_text(text):
+    # Einziger LLM-Aufruf der Längenanpassung – nur wenn der Text zu kurz ist
+    expand_prompt = f"""
+Erweitere folgenden Text so, dass er zwischen {TARGET_MIN} und {TARGET_MAX} Zeichen lang ist.
 WICHTIG: LEERZEICHEN werden MITGEZÄHLT.
-Inhalt NICHT verändern.
+Nur Inhalte ergänzen, die zum Text passen. Bestehende Aussagen NICHT verändern.
 Keine Metakommentare, keine Hinweise auf Regeln.
 
 Text:
-{attempt}
+{text}
 """
 
-        attempt = client.chat.completions.create(
-            model=MODEL_MAIN,
-            messages=[{"role": "user", "content": fix_prompt}],
-            temperature=0
-        ).choices[0].message.content.strip()
+    return client.chat.completions.create(
+        model=MODEL_MAIN,
+        messages=[{"role": "user", "content": expand_prompt}],
+        temperature=0
+    ).choices[0].message.content.strip()
 
-    return attempt[:TARGET_MAX]
+def enforce_length(text):
+    # Kürzen passiert lokal (satzweise), Erweitern mit höchstens einem Aufruf
+    return fit_length(text, TARGET_MIN, TARGET_MAX, expand_fn=expand_text)
 
 # ============================================================
 # CHATBOT PIPELINE als Funktion für Tests
 # ============================================================
 
-def generate_answer(user_text, level, return_raw=False):
+def generate_answer(user_text, level, return_raw=False, last_answer=None):
     # Rechtschreibung
     corrected = autocorrect(user_text)
 
     # RAG
     RAG = rag_section(corrected)
 
-    mem = st.session_state.memory
+    # Bulk-Test-Worker haben keine Session → last_answer explizit übergeben
+    if last_answer is None:
+        last_answer = st.session_state.memory["last_bot_answer"]
 
     # Core prompt
     user_prompt = f"""
     NUTZEREINGABE: "{corrected}"
-    LETZTE ANTWORT: "{mem['last_bot_answer']}"
+    LETZTE ANTWORT: "{last_answer}"
     IEs: {IEs}
     RAG: "{RAG}"
     WICHTIG: Gib NUR Rohinhalt zurück. Zwischen {TARGET_MIN} und {TARGET_MAX} Zeichen.
     """
 
+    if is_single_pass():
+        user_prompt += """
+    FORMAT: Gib statt reinem Text folgendes JSON zurück (keine Erklärungen außerhalb):
+    {"content": "ROHINHALT", "styled_content": "UMFORMULIERTER TEXT"}
+    """ + styled_field_instructions(ANTHRO[level])
+
     # Schritt 1: Rohinhalt
     raw = client.chat.completions.create(
         model=MODEL_MAIN,
@@ -371,25 +361,31 @@ def generate_answer(user_text, level, return_raw=False):
         ]
     ).choices[0].message.content.strip()
 
+    styled = None
+    if is_single_pass():
+        try:
+            parsed = parse_structured(raw)
+            raw, styled = parsed["content"], parsed.get("styled_content")
+        except (ValueError, KeyError, TypeError, AttributeError):
+            # Kein gültiges JSON → Antwort als Rohinhalt nehmen, weiter wie two_pass
+            print("[GEN] single_pass-Antwort ist kein JSON – Stil per zweitem Aufruf")
+
+    # Rohinhalt in beiden Modi gleich einpassen (raw_length_ok misst dasselbe)
     raw = enforce_length(raw)
 
-    # Schritt 3: Anthropomorphes Umschreiben
-    style_prompt = f"""
-    Formuliere den folgenden Text stilistisch um mit diesen Regeln:
-    {ANTHRO[level]}
-    SEHR WICHTIG:
-    - Erwähne NIEMALS die Anthropomorphiestufe.
-    - Keine Hinweise auf Regeln.
-    - Keine Metakommentare.
-    - Gib nur den Text zurück.
-    Text: {raw}
-    """
-    
+    if styled:
+        # Stil kam bereits im selben Aufruf mit – nur lokal einpassen
+        styled = fit_length(styled, TARGET_MIN, TARGET_MAX)
+        if return_raw:
+            return styled, raw
+        return styled
+
+    # Schritt 3: Anthropomorphes Umschreiben (Regeln wie im styled_content-Feld)
     styled = client.chat.completions.create(
         model=MODEL_MAIN,
         temperature=0.25,
         messages=[
-            {"role": "user", "content": style_prompt}
+            {"role": "user", "content": style_rewrite_prompt(ANTHRO[level], raw)}
         ]
     ).choices[0].message.content.strip()
 
@@ -493,37 +489,18 @@ TEST_QUERIES = {
 }
 
 # Regeln für Tests
-ANTHRO_RULES_TEST = {
-    0: {
-        "max_emojis": 0,
-        "forbidden_pronouns": [" ich ", " wir ", " du ", " mich ", " mir ", " uns ", " dich ", " euch ", " ihr ", " ihrer " , " dein ", " deine ", " mein ", " meine ", " unser ", " unsere ", " euer ", " eure ", " ihre ", " seine "],
-    },
-    1: {
-        "max_emojis": 5,
-        "forbidden_pronouns": [],
-    },
-    2: {
-        "max_emojis": 20,
-        "forbidden_pronouns": [],
-    }
-}
-
-def count_emojis(text):
-    return sum(bool(re.match(r'[\U0001F300-\U0001FAFF]', c)) for c in text)
-
-def match_keyword(text, pattern):
-    regex = pattern.replace("%", ".*")
-    return re.search(regex, text, re.IGNORECASE) is not None
+# Ein vorkompilierter Matcher pro Topic (chatbot_core.keyword_matcher)
+KEYWORD_MATCHERS = build_matchers(KEYWORDS)
 
 def keyword_coverage(text, topic, min_ratio=0.75):
-    kw_list = KEYWORDS[topic]
-    hits = sum(match_keyword(text, kw) for kw in kw_list)
-    ratio = hits / len(kw_list)
-    return ratio, ratio >= min_ratio
+    return KEYWORD_MATCHERS[topic].coverage(text, min_ratio)
 
 
-def contains_forbidden_pronouns(text, pronouns):
-    return any(p in text.lower() for p in pronouns)
+def style_check(text, level):
+    """Emoji- und Pronomen-Regel in einem Durchlauf (chatbot_core.text_analysis)."""
+    rules = ANTHRO_RULES_TEST[level]
+    stats = analyze_text(text, rules["forbidden_pronouns"])
+    return stats["emoji_count"], bool(stats["pronoun_hits"])
 
 def run_single_test():
     topic = random.choice(list(TEST_QUERIES.keys()))
@@ -547,7 +524,7 @@ def run_single_test():
     "raw_length": len(raw_answer),
     "raw_length_ok": length_ok,
     "styled_length": len(styled_answer),
-    "emoji_count": count_emojis(styled_answer),
+    "emoji_count": style_check(styled_answer, level)[0],
     "keyword_ok": coverage_ok,
     "raw_preview": raw_answer[:300] + "...",
     "styled_preview": styled_answer[:300] + "...",
@@ -562,116 +539,116 @@ if st.button("Automatischen Test ausführen"):
 # BULK TEST (100 Testfälle)
 # ============================================================
 
-def run_bulk_test(n=10, min_keyword_ratio=0.75):
-    results = []
-    failures = 0
+def evaluate_case(case, min_keyword_ratio=0.75):
+    """Ein Testfall (topic, question, level) → Ergebniszeile für den Store."""
+    i, topic, question, level = case["case_id"], case["topic"], case["question"], case["level"]
 
-    print("\n===== STARTE BULK-TEST =====\n")
+    # ====================================================
+    # MODELLAUFRUF (RAW + STYLED)
+    # ====================================================
+    start = time.perf_counter()
+    styled_answer, raw_answer = generate_answer(
+        question, level, return_raw=True, last_answer=""
+    )
+    latency = time.perf_counter() - start
 
-    for i in range(1, n + 1):
+    # ====================================================
+    # TESTS – INHALT (RAW)
+    # ====================================================
 
-        topic = random.choice(list(TEST_QUERIES.keys()))
-        question = random.choice(TEST_QUERIES[topic])
-        level = random.choice([0, 1, 2])
+    raw_length = len(raw_answer)
+    raw_length_ok = TARGET_MIN <= raw_length <= TARGET_MAX
 
-        # ====================================================
-        # MODELLAUFRUF (RAW + STYLED)
-        # ====================================================
-        try:
-            styled_answer, raw_answer = generate_answer(
-                question, level, return_raw=True
-            )
-        except Exception as e:
-            print(f"[{i}] ❌ Fehler im Modellaufruf: {e}")
-            failures += 1
-            continue
-
-        # ====================================================
-        # TESTS – INHALT (RAW)
-        # ====================================================
-
-        raw_length = len(raw_answer)
-        raw_length_ok = TARGET_MIN <= raw_length <= TARGET_MAX
-
-        kw_ratio, kw_ok = keyword_coverage(
-            raw_answer, topic, min_keyword_ratio
-        )
-
-        # ====================================================
-        # TESTS – STIL (STYLED)
-        # ====================================================
-
-        emoji_count = count_emojis(styled_answer)
-        emoji_ok = emoji_count <= ANTHRO_RULES_TEST[level]["max_emojis"]
-
-        pronoun_violation = contains_forbidden_pronouns(
-            styled_answer,
-            ANTHRO_RULES_TEST[level]["forbidden_pronouns"]
-        )
-        pronoun_ok = not pronoun_violation
-
-        # ====================================================
-        # GESAMTBEWERTUNG
-        # ====================================================
-
-        test_ok = all([
-            raw_length_ok,
-            kw_ok,
-            emoji_ok,
-            pronoun_ok
-        ])
-
-        # ====================================================
-        # LOGGING
-        # ====================================================
-
-        print(f"[{i}] Topic: {topic}, Level: {level}")
-        print(f"     - RAW length: {raw_length} → {'OK' if raw_length_ok else 'FAIL'}")
-        print(f"     - keyword coverage: {kw_ratio*100:.1f}% → {'OK' if kw_ok else 'FAIL'}")
-        print(f"     - emojis: {emoji_count}/{ANTHRO_RULES_TEST[level]['max_emojis']} → {'OK' if emoji_ok else 'FAIL'}")
-        print(f"     - pronouns OK: {pronoun_ok}")
-        print(f"     - question: {question}")
-        print(f"     - raw Answer: {raw_answer}")
-        print(f"     → {'✔ TEST PASSED' if test_ok else '❌ TEST FAILED'}")
-        print()
-
-        results.append({
-            "topic": topic,
-            "level": level,
-
-            # RAW
-            "raw_length": raw_length,
-            "raw_length_ok": raw_length_ok,
-            "keyword_ratio": kw_ratio,
-            "keyword_ok": kw_ok,
-
-            # STYLED
-            "emoji_count": emoji_count,
-            "emoji_ok": emoji_ok,
-            "pronoun_ok": pronoun_ok,
-
-            # Gesamt
-            "test_ok": test_ok
-        })
-
-        if not test_ok:
-            failures += 1
+    kw_ratio, kw_ok = keyword_coverage(
+        raw_answer, topic, min_keyword_ratio
+    )
+
+    # ====================================================
+    # TESTS – STIL (STYLED)
+    # ====================================================
+
+    emoji_count, pronoun_violation = style_check(styled_answer, level)
+    emoji_ok = emoji_count <= ANTHRO_RULES_TEST[level]["max_emojis"]
+    pronoun_ok = not pronoun_violation
+
+    # ====================================================
+    # GESAMTBEWERTUNG
+    # ====================================================
+
+    test_ok = all([
+        raw_length_ok,
+        kw_ok,
+        emoji_ok,
+        pronoun_ok
+    ])
+
+    # ====================================================
+    # LOGGING (ein print pro Fall, damit parallele Worker nicht mischen)
+    # ====================================================
+
+    print(
+        f"[{i}] Topic: {topic}, Level: {level}, Modus: {GENERATION_MODE}, {latency:.1f} s\n"
+        f"     - RAW length: {raw_length} → {'OK' if raw_length_ok else 'FAIL'}\n"
+        f"     - keyword coverage: {kw_ratio*100:.1f}% → {'OK' if kw_ok else 'FAIL'}\n"
+        f"     - emojis: {emoji_count}/{ANTHRO_RULES_TEST[level]['max_emojis']} → {'OK' if emoji_ok else 'FAIL'}\n"
+        f"     - pronouns OK: {pronoun_ok}\n"
+        f"     - question: {question}\n"
+        f"     - raw Answer: {raw_answer}\n"
+        f"     → {'✔ TEST PASSED' if test_ok else '❌ TEST FAILED'}\n"
+    )
+
+    return {
+        # RAW
+        "raw_length": raw_length,
+        "raw_length_ok": raw_length_ok,
+        "keyword_ratio": kw_ratio,
+        "keyword_ok": kw_ok,
+
+        # STYLED
+        "emoji_count": emoji_count,
+        "emoji_ok": emoji_ok,
+        "pronoun_ok": pronoun_ok,
+
+        # Gesamt
+        "test_ok": test_ok,
+
+        # Latenz (A/B: two_pass vs. single_pass)
+        "generation_mode": GENERATION_MODE,
+        "latency_s": round(latency, 2)
+    }
+
+def run_bulk_test(n=10, min_keyword_ratio=0.75, run_id=None, workers=BULK_WORKERS):
+    """
+    Nebenläufiger Bulk-Test über chatbot_core.bulk_eval.
+    Ergebnisse landen fortlaufend im SQLite-Store; mit derselben
+    run_id wird ein abgebrochener Lauf fortgesetzt.
+    Gibt die run_id zurück.
+    """
+    print("\n===== STARTE BULK-TEST =====\n")
+
+    # neue run_id → frische Stichprobe; bestehende run_id → dieselben Fälle fortsetzen
+    run_id = run_id or new_run_id()
+    cases = plan_cases(TEST_QUERIES, n, run_id)
+    run_id, df = run_bulk(
+        lambda case: evaluate_case(case, min_keyword_ratio),
+        cases, run_id=run_id, workers=workers
+    )
 
     # ====================================================
     # GESAMTSTATISTIK
     # ====================================================
 
-    passed = n - failures
-    print("\n===== BULK-TEST FERTIG =====")
-    print(f"Gesamt: {n} Testfälle")
-    print(f"Bestanden: {passed}")
-    print(f"Fehlgeschlagen: {failures}")
-    print(f"Erfolgsquote: {passed / n * 100:.2f}%")
+    print_summary(df, n)
+    print(f"Modus: {GENERATION_MODE}")
+    for model, stats in latency_stats().items():
+        print(f"[LLM] {model}: {stats['calls']} Aufrufe, Ø {stats['mean_ms']} ms, "
+              f"{stats['retries']} Retries, {stats['errors']} Fehler – {stats['histogram']}")
 
-    return results
+    return run_id
 
-def analyze_results(results):
-    df = pd.DataFrame(results)
+def analyze_results(run_id=None):
+    # liest direkt aus dem Bulk-Store (ohne run_id: letzter Lauf)
+    df = results_frame(run_id=run_id)
 
     print("\n===== ANALYSE: BASISSTATISTIK =====")
 
@@ -687,9 +664,17 @@ def analyze_results(results):
 
     print(df[cols].head())
 
+    print("\n===== ANALYSE: LATENZ + QUOTE JE MODUS =====")
+    print(df.groupby("generation_mode").agg(
+        latency_mean=("latency_s", "mean"),
+        latency_max=("latency_s", "max"),
+        pass_rate=("test_ok", "mean")
+    ))
+
     return df
 
-def plot_heatmap(df):
+def plot_heatmap(df=None):
+    df = results_frame(df)
     df_fail = df[df["test_ok"] == False]
 
     pivot = df_fail.pivot_table(
@@ -707,7 +692,8 @@ def plot_heatmap(df):
     plt.tight_layout()
     plt.show()
 
-def plot_errors_by_level(df):
+def plot_errors_by_level(df=None):
+    df = results_frame(df)
     df_fail = df[df["test_ok"] == False]
 
     level_counts = df_fail["level"].value_counts().sort_index()
@@ -719,7 +705,8 @@ def plot_errors_by_level(df):
     plt.ylabel("Fehleranzahl")
     plt.show()
 
-def plot_errors_by_topic(df):
+def plot_errors_by_topic(df=None):
+    df = results_frame(df)
     df_fail = df[df["test_ok"] == False]
 
     topic_counts = df_fail["topic"].value_counts()
@@ -731,7 +718,8 @@ def plot_errors_by_topic(df):
     plt.ylabel("Fehleranzahl")
     plt.show()
 
-def plot_error_types(df):
+def plot_error_types(df=None):
+    df = results_frame(df)
     df_fail = df[df["test_ok"] == False]
 
     counts = {
@@ -749,8 +737,8 @@ def plot_error_types(df):
     plt.show()
 
 if st.button("Bulk Test ausführen"):
-    results = run_bulk_test()   # hier plural beachten
-    df = analyze_results(results)
+    run_id = run_bulk_test()
+    df = analyze_results(run_id)
 
     # Heatmap
     fig1 = plot_heatmap(df)
@@ -1,13 +1,12 @@
 import streamlit as st
-import os
 from dotenv import load_dotenv
-from openai import OpenAI
-import chromadb
-import pdfplumber
-import uuid
-import re
+from chatbot_core import get_retriever
+from chatbot_core.llm_client import get_client
+from chatbot_core.bulk_eval import BULK_WORKERS, new_run_id, plan_cases, print_summary, results_frame, run_bulk
+from chatbot_core.keyword_matcher import build_matchers
+from chatbot_core.text_analysis import ANTHRO_RULES_TEST, analyze_text
 import random
-import pandas as pd
+import time
 import matplotlib.pyplot as plt
 import seaborn as sns
 
@@ -16,7 +15,8 @@ import seaborn as sns
 # ============================================================
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Gemeinsamer Client: Keep-Alive-Pool, Timeouts, Retries, Parallelitätslimit
+client = get_client()
 
 MODEL_MAIN = "gpt-4.1"
 MODEL_SPELL = "gpt-4o-mini"
@@ -130,35 +130,12 @@ IEs = {
 # RAG SETUP
 # ============================================================
 
-PDF_PATH = "streamlit_agent/relevante_Informationen_Paper.pdf"
-
-def load_chroma():
-    chroma_client = chromadb.PersistentClient(path="./chroma_marine_snow")
-    if "marine_snow" in [c.name for c in chroma_client.list_collections()]:
-        return chroma_client.get_collection("marine_snow")
-
-    col = chroma_client.create_collection("marine_snow")
-
-    with pdfplumber.open(PDF_PATH) as pdf:
-        for page_num, page in enumerate(pdf.pages):
-            text = page.extract_text()
-            if not text:
-                continue
-            for para in text.split("\n"):
-                if len(para.strip()) < 50:
-                    continue
-                col.add(
-                    documents=[para.strip()],
-                    ids=[str(uuid.uuid4())],
-                    metadatas=[{"page": page_num + 1}]
-                )
-    return col
-
-collection = load_chroma()
+# Gemeinsamer Retriever – Collection wird über chatbot_core.ingest batchweise aufgebaut
+retriever = get_retriever()
 
 def rag_section(query):
-    result = collection.query(query_texts=[query], n_results=1)
-    return result["documents"][0][0]
+    # Hybride Suche (BM25 + Vektor) über chatbot_core.hybrid
+    return retriever.rag_section(query)
 
 # ============================================================
 # SPELLCHECK
@@ -296,24 +273,15 @@ Text:
     return attempt[:TARGET_MAX]
 
 # ============================================================
-# CHAT LOOP
+# CHATBOT PIPELINE als Funktion (Chat + Bulk-Test)
 # ============================================================
 
-if "chat" not in st.session_state:
-    st.session_state.chat = []
-
-for m in st.session_state.chat:
-    st.chat_message(m["role"], avatar=m["avatar"]).write(m["content"])
-
-user_text = st.chat_input("Frag mich etwas über Meeresschnee")
-
-if user_text:
-
+def generate_answer(user_text, level, return_raw=False, last_answer=None):
     corrected = autocorrect(user_text)
-    mem = st.session_state.memory
 
-    st.chat_message("user").write(user_text)
-    st.session_state.chat.append({"role": "user", "content": user_text, "avatar": None})
+    # Bulk-Test-Worker haben keine Session → last_answer explizit übergeben
+    if last_answer is None:
+        last_answer = st.session_state.memory["last_bot_answer"]
 
     RAG = rag_section(corrected)
 
@@ -326,7 +294,7 @@ NUTZEREINGABE:
 "{corrected}"
 
 LETZTE ANTWORT:
-"{mem['last_bot_answer']}"
+"{last_answer}"
 
 IEs:
 {IEs}
@@ -375,6 +343,30 @@ Text:
         messages=[{"role": "user", "content": style_prompt}]
     ).choices[0].message.content.strip()
 
+    if return_raw:
+        return styled, raw_answer
+    return styled
+
+# ============================================================
+# CHAT LOOP
+# ============================================================
+
+if "chat" not in st.session_state:
+    st.session_state.chat = []
+
+for m in st.session_state.chat:
+    st.chat_message(m["role"], avatar=m["avatar"]).write(m["content"])
+
+user_text = st.chat_input("Frag mich etwas über Meeresschnee")
+
+if user_text:
+    mem = st.session_state.memory
+
+    st.chat_message("user").write(user_text)
+    st.session_state.chat.append({"role": "user", "content": user_text, "avatar": None})
+
+    styled = generate_answer(user_text, level)
+
     mem["last_bot_answer"] = styled
 
     st.chat_message("assistant", avatar=assistant_avatar).write(styled)
@@ -445,65 +437,30 @@ TEST_QUERIES = {
 }
 
 # Regeln für Tests
-ANTHRO_RULES_TEST = {
-    0: {
-        "max_emojis": 0,
-        "forbidden_pronouns": ["ich", "wir", "du", "mich", "mir", "uns", "dich", "euch", "ihr", "ihrer" , "dein", "deine", "mein", "meine", "unser", "unsere", "euer", "eure", "ihre", "seine", "sein"],
-    },
-    1: {
-        "max_emojis": 5,
-        "forbidden_pronouns": [],
-    },
-    2: {
-        "max_emojis": 20,
-        "forbidden_pronouns": [],
-    }
-}
+def style_check(text, level):
+    """Emoji- und Pronomen-Regel in einem Durchlauf (chatbot_core.text_analysis)."""
+    rules = ANTHRO_RULES_TEST[level]
+    stats = analyze_text(text, rules["forbidden_pronouns"])
+    return stats["emoji_count"], bool(stats["pronoun_hits"])
 
-def count_emojis(text):
-    return sum(bool(re.match(r'[\U0001F300-\U0001FAFF]', c)) for c in text)
+# Ein vorkompilierter Matcher pro Topic (chatbot_core.keyword_matcher)
+KEYWORD_MATCHERS = build_matchers(KEYWORDS)
 
-def contains_forbidden_pronouns(text, pronouns):
-    return any(p in text.lower() for p in pronouns)
+def keyword_coverage(text, topic, min_ratio=0.75):
+    return KEYWORD_MATCHERS[topic].coverage(text, min_ratio)
 
 def run_single_test():
     topic = random.choice(list(TEST_QUERIES.keys()))
     question = random.choice(TEST_QUERIES[topic])
     level = random.choice([0, 1, 2])
 
-    # Simuliere Anfrage an Chatbot
-    test_user_prompt = question
-    user_prompt_corrected = autocorrect(test_user_prompt)
-    RAG = rag_section(user_prompt_corrected)
-
-    # Modellantwort
-    response = client.chat.completions.create(
-        model=MODEL_MAIN,
-        temperature=0.2,
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": f"NUTZEREINGABE: '{user_prompt_corrected}' IEs: {IEs} RAG: '{RAG}'"}
-        ]
-    ).choices[0].message.content.strip()
-
-    # Stil rewrite
-    styled = client.chat.completions.create(
-        model=MODEL_MAIN,
-        temperature=0.25,
-        messages=[{
-            "role": "user",
-            "content": f"Formuliere mit diesen Regeln: {style_prompt} Text: {response}"
-        }]
-    ).choices[0].message.content.strip()
+    # Echte Chatbot-Pipeline (Autokorrektur, RAG, Rohinhalt, Stil-Rewrite)
+    styled = generate_answer(question, level, last_answer="")
 
     # =====================================
     # Validierung
     # =====================================
-    emoji_count = count_emojis(styled)
-    pronoun_violation = contains_forbidden_pronouns(
-        styled,
-        ANTHRO_RULES_TEST[level]["forbidden_pronouns"]
-    )
+    emoji_count, pronoun_violation = style_check(styled, level)
 
     length_ok = TARGET_MIN <= len(styled) <= TARGET_MAX
     emoji_ok = emoji_count <= ANTHRO_RULES_TEST[level]["max_emojis"]
@@ -527,86 +484,80 @@ if st.button("Automatischen Test ausführen"):
 # BULK TEST (100 Testfälle)
 # ============================================================
 
-def run_bulk_test(n=20, min_keyword_ratio=0.75):
-    results = []
-    failures = 0
+def evaluate_case(case, min_keyword_ratio=0.75):
+    """Ein Testfall (topic, question, level) → Ergebniszeile für den Store."""
+    i, topic, question, level = case["case_id"], case["topic"], case["question"], case["level"]
 
+    # Echte Chatbot-Pipeline nutzen
+    start = time.perf_counter()
+    answer = generate_answer(question, level, last_answer="")
+    latency = time.perf_counter() - start
+
+    # Emoji- und Pronomen-Regel (ein Durchlauf)
+    emoji_count, pronoun_violation = style_check(answer, level)
+    emoji_ok = emoji_count <= ANTHRO_RULES_TEST[level]["max_emojis"]
+    pronoun_ok = not pronoun_violation
+
+    # Zeichenlimit-Regel
+    length_ok = TARGET_MIN <= len(answer) <= TARGET_MAX
+
+    # Keyword-Coverage-Regel
+    kw_ratio, kw_ok = keyword_coverage(answer, topic, min_keyword_ratio)
+
+    # Testfall bestanden?
+    test_ok = all([emoji_ok, pronoun_ok, length_ok, kw_ok])
+
+    # Log in Konsole (ein print pro Fall, damit parallele Worker nicht mischen)
+    print(
+        f"[{i}] Topic: {topic}, Level: {level}, {latency:.1f} s\n"
+        f"     - length: {len(answer)} → {'OK' if length_ok else 'FAIL'}\n"
+        f"     - emojis: {emoji_count}/{ANTHRO_RULES_TEST[level]['max_emojis']} → {'OK' if emoji_ok else 'FAIL'}\n"
+        f"     - pronouns OK: {pronoun_ok}\n"
+        f"     - keyword coverage: {kw_ratio*100:.1f}% → {'OK' if kw_ok else 'FAIL'}\n"
+        f"     → {'✔ TEST PASSED' if test_ok else '❌ TEST FAILED'}\n"
+    )
+
+    return {
+        "length_ok": length_ok,
+        "emoji_ok": emoji_ok,
+        "pronoun_ok": pronoun_ok,
+        "keyword_ok": kw_ok,
+        "keyword_ratio": kw_ratio,
+        "test_ok": test_ok,
+        "latency_s": round(latency, 2)
+    }
+
+def run_bulk_test(n=20, min_keyword_ratio=0.75, run_id=None, workers=BULK_WORKERS):
+    """
+    Nebenläufiger Bulk-Test über chatbot_core.bulk_eval (SQLite-Checkpoints,
+    gleiche run_id setzt fort). Gibt die run_id zurück.
+    """
     print("\n===== STARTE BULK-TEST =====\n")
 
-    for i in range(1, n+1):
-
-        topic = random.choice(list(TEST_QUERIES.keys()))
-        question = random.choice(TEST_QUERIES[topic])
-        level = random.choice([0, 1, 2])
-
-        # Echte Chatbot-Pipeline nutzen
-        try:
-            answer = generate_answer(question, level)
-        except Exception as e:
-            print(f"[{i}] ❌ Fehler im Modellaufruf: {e}")
-            failures += 1
-            continue
-
-        # Emoji-Regel
-        emoji_count = count_emojis(answer)
-        emoji_ok = emoji_count <= ANTHRO_RULES_TEST[level]["max_emojis"]
-
-        # Pronomen-Regel
-        pronoun_violation = contains_forbidden_pronouns(
-            answer, ANTHRO_RULES_TEST[level]["forbidden_pronouns"]
-        )
-        pronoun_ok = not pronoun_violation
-
-        # Zeichenlimit-Regel
-        length_ok = TARGET_MIN <= len(answer) <= TARGET_MAX
-
-        # Keyword-Coverage-Regel
-        kw_ratio, kw_ok = keyword_coverage(answer, topic, min_keyword_ratio)
-
-        # Testfall bestanden?
-        test_ok = all([emoji_ok, pronoun_ok, length_ok, kw_ok])
-
-        # Log in Konsole
-        print(f"[{i}] Topic: {topic}, Level: {level}")
-        print(f"     - length: {len(answer)} → {'OK' if length_ok else 'FAIL'}")
-        print(f"     - emojis: {emoji_count}/{ANTHRO_RULES_TEST[level]['max_emojis']} → {'OK' if emoji_ok else 'FAIL'}")
-        print(f"     - pronouns OK: {pronoun_ok}")
-        print(f"     - keyword coverage: {kw_ratio*100:.1f}% → {'OK' if kw_ok else 'FAIL'}")
-        print(f"     → {'✔ TEST PASSED' if test_ok else '❌ TEST FAILED'}")
-        print()
-
-        results.append({
-            "topic": topic,
-            "level": level,
-            "length_ok": length_ok,
-            "emoji_ok": emoji_ok,
-            "pronoun_ok": pronoun_ok,
-            "keyword_ok": kw_ok,
-            "keyword_ratio": kw_ratio,
-            "test_ok": test_ok
-        })
-
-        if not test_ok:
-            failures += 1
+    # neue run_id → frische Stichprobe; bestehende run_id → dieselben Fälle fortsetzen
+    run_id = run_id or new_run_id()
+    cases = plan_cases(TEST_QUERIES, n, run_id)
+    run_id, df = run_bulk(
+        lambda case: evaluate_case(case, min_keyword_ratio),
+        cases, run_id=run_id, workers=workers
+    )
 
     # Gesamtstatistik
-    passed = n - failures
-    print("\n===== BULK-TEST FERTIG =====")
-    print(f"Gesamt: {n} Testfälle")
-    print(f"Bestanden: {passed}")
-    print(f"Fehlgeschlagen: {failures}")
-    print(f"Erfolgsquote: {passed/n*100:.2f}%")
+    print_summary(df, n)
+
+    return run_id
 
-    return results
-def analyze_results(results):
-    df = pd.DataFrame(results)
+def analyze_results(run_id=None):
+    # liest direkt aus dem Bulk-Store (ohne run_id: letzter Lauf)
+    df = results_frame(run_id=run_id)
 
     print("\n===== ANALYSE: BASISSTATISTIK =====")
     print(df[["test_ok", "level", "topic", "length_ok", "emoji_ok", "pronoun_ok", "keyword_ok"]].head())
 
     return df
 
-def plot_heatmap(df):
+def plot_heatmap(df=None):
+    df = results_frame(df)
     df_fail = df[df["test_ok"] == False]
 
     pivot = df_fail.pivot_table(
@@ -624,7 +575,8 @@ def plot_heatmap(df):
     plt.tight_layout()
     plt.show()
 
-def plot_errors_by_level(df):
+def plot_errors_by_level(df=None):
+    df = results_frame(df)
     df_fail = df[df["test_ok"] == False]
 
     level_counts = df_fail["level"].value_counts().sort_index()
@@ -636,7 +588,8 @@ def plot_errors_by_level(df):
     plt.ylabel("Fehleranzahl")
     plt.show()
 
-def plot_errors_by_topic(df):
+def plot_errors_by_topic(df=None):
+    df = results_frame(df)
     df_fail = df[df["test_ok"] == False]
 
     topic_counts = df_fail["topic"].value_counts()
@@ -648,7 +601,8 @@ def plot_errors_by_topic(df):
     plt.ylabel("Fehleranzahl")
     plt.show()
 
-def plot_error_types(df):
+def plot_error_types(df=None):
+    df = results_frame(df)
     df_fail = df[df["test_ok"] == False]
 
     counts = {
@@ -666,8 +620,8 @@ def plot_error_types(df):
     plt.show()
 
 if st.button("Bulk Test ausführen"):
-    results = run_bulk_test()   # hier plural beachten
-    df = analyze_results(results)
+    run_id = run_bulk_test()
+    df = analyze_results(run_id)
 
     # Heatmap
     fig1 = plot_heatmap(df)
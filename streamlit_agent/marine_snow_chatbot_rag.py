@@ -1,18 +1,19 @@
 import streamlit as st
-import os
 from dotenv import load_dotenv
-from openai import OpenAI
-from rapidfuzz import fuzz
-import chromadb
-import pdfplumber
-import uuid
+
+from chatbot_core import get_retriever
+from chatbot_core.llm_client import get_client
+from chatbot_core.intent_classifier import get_intent_classifier
+from chatbot_core.spelling import autocorrect_local, get_spell_checker
+from chatbot_core.term_index import TermIndex
 
 # ============================================================
 # ENV + OPENAI CLIENT
 # ============================================================
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Gemeinsamer Client: Keep-Alive-Pool, Timeouts, Retries, Parallelitätslimit
+client = get_client()
 
 # GPT model routing
 MODEL_IE = "gpt-4.1"
@@ -138,56 +139,31 @@ Anthropomorphism Level 2:
 
 
 # ============================================================
-# RAG SETUP — Persistent ChromaDB
+# RAG SETUP
 # ============================================================
 
-PDF_PATH = "streamlit_agent/relevante_Informationen_Paper.pdf"
-
-def load_chroma():
-    client = chromadb.PersistentClient(path="./chroma_marine_snow")
-
-    # check if collection already exists
-    existing = [c.name for c in client.list_collections()]
-    if "marine_snow" in existing:
-        return client.get_collection("marine_snow")
-
-    # otherwise create
-    col = client.create_collection("marine_snow")
-
-    # load PDF
-    with pdfplumber.open(PDF_PATH) as pdf:
-        docs, ids, meta = [], [], []
-
-        for page_num, page in enumerate(pdf.pages):
-            text = page.extract_text()
-            if not text:
-                continue
-
-            paragraphs = text.split("\n")
-            for para in paragraphs:
-                if len(para.strip()) < 50:
-                    continue
-
-                doc_id = str(uuid.uuid4())
-                docs.append(para.strip())
-                ids.append(doc_id)
-                meta.append({"page": page_num + 1})
-
-        col.add(documents=docs, ids=ids, metadatas=meta)
-
-    return col
+# Gemeinsamer Retriever – Collection wird über chatbot_core.ingest batchweise aufgebaut
+retriever = get_retriever()
 
-collection = load_chroma()
+# Lokaler Klassifizierer – LLM nur noch bei niedriger Konfidenz
+intent_classifier = get_intent_classifier()
 
 def rag_query(query):
-    result = collection.query(query_texts=[query], n_results=4)
-    return "\n".join(result["documents"][0])
+    # Hybride Suche (BM25 + Vektor) über chatbot_core.hybrid
+    return retriever.rag_section(query, n_results=4)
 
 # ============================================================
 # AUTOCORRECT
 # ============================================================
 
+# Lokales Wörterbuch (Paper + IEs) – das LLM nur bei sehr verrauschter Eingabe
+spell_checker = get_spell_checker(IEs, retriever.collection)
+
 def autocorrect(text):
+    corrected, needs_llm = autocorrect_local(spell_checker, text)
+    if not needs_llm:
+        return corrected
+
     prompt = f"""
 Correct obvious spelling mistakes without changing meaning.
 Return only the corrected text.
@@ -229,6 +205,10 @@ def resolve_references(user_input):
 # ============================================================
 
 def is_marine_snow_related(user_input):
+    local = intent_classifier.predict("related", user_input)
+    if local:
+        return local
+
     prompt = f"""
 Determine if the following user question is related to Marine Snow 
 or ocean biology topics such as aggregates, particles, formation, sampling, sinking, degradation.
@@ -249,18 +229,8 @@ Question: "{user_input}"
 # ============================================================
 # INTENT CLASSIFIER (TOPIC vs TERM)
 # ============================================================
-GENERIC_TERMS = [
-    "aggregat", "aggregation", "turbulenz", "strömung",
-    "organismus", "partikel", "sediment", "kohlenstoff"
-]
-
-TOPIC_TERMS = {
-    "formation": ["bildung", "entstehung", "formation"],
-    "sampling":  ["messung", "probe", "sampling"],
-    "importance": ["bedeutung", "relevanz", "wichtigkeit"],
-    "degradation": ["zerfall", "abbau", "degradation"],
-    "definition": ["definition", "beschreibung"]
-}
+# Begriffe + Themen (GENERIC_TERMS / TOPIC_TERMS) liegen in chatbot_core.term_index
+TERM_INDEX = TermIndex.from_groups()
 
 def detect_term(user_input, threshold=82):
     txt = user_input.lower()
@@ -269,21 +239,16 @@ def detect_term(user_input, threshold=82):
     if len(txt.split()) <= 2:
         return "GENERIC_TERM"
 
-    # Check generic terms
-    for term in GENERIC_TERMS:
-        if fuzz.partial_ratio(txt, term) >= threshold:
-            return "GENERIC_TERM"
-
-    # Check topic-related terms
-    for topic, tlist in TOPIC_TERMS.items():
-        for t in tlist:
-            if fuzz.partial_ratio(txt, t) >= threshold:
-                return topic  # return which topic it belongs to
-
-    return None
+    # Erster Begriff über der Schwelle (Fachbegriff vor Topic), wie bisher
+    hit = TERM_INDEX.match(txt, threshold)
+    return hit["topic"] if hit else None
 
 
 def classify_intent(user_input):
+    local = intent_classifier.predict("intent", user_input)
+    if local:
+        return local
+
     txt = user_input.lower().strip()
 
     # ============================================================
@@ -372,6 +337,10 @@ Gib NUR das Label zurück.
 TOPIC_KEYWORDS = ["definition", "importance", "sampling", "formation", "degradation"]
 
 def classify_topic(user_input):
+    local = intent_classifier.predict("topic", user_input)
+    if local:
+        return local
+
     prompt = f"""
 Du bist ein strenger wissenschaftlicher Klassifizierer.
 
@@ -398,13 +367,6 @@ Frage:
     )
     
     return r.choices[0].message.content.strip().lower()
-def fuzzy_topic(user_input):
-    txt = user_input.lower()
-    for topic, keys in TOPIC_KEYWORDS.items():
-        for k in keys:
-            if fuzz.partial_ratio(txt, k) > 75:
-                return topic
-    return "definition"
 
 # ============================================================
 # IE ANSWER GENERATOR
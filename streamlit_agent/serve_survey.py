@@ -0,0 +1,30 @@
+# ============================================================
+# serve_survey.py
+# Startet survey_v2 wie "streamlit run", baut den RAG-Retriever
+# aber schon beim Serverstart auf – nicht erst, wenn die erste
+# Session das Skript ausführt.
+#
+# Streamlit führt das Skript im selben Prozess aus und importiert
+# chatbot_core wie dieses Modul (Skriptordner im sys.path), daher
+# nutzen alle Sessions den hier angewärmten Retriever.
+#
+# Aufruf (aus dem Repo-Root, weitere Streamlit-Optionen erlaubt):
+#   python streamlit_agent/serve_survey.py
+#   python streamlit_agent/serve_survey.py --server.port 8051
+# ============================================================
+
+import os
+import sys
+
+from dotenv import load_dotenv
+from streamlit.web import cli as stcli
+
+from chatbot_core import warm_up_retriever
+
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "survey_v2.py")
+
+if __name__ == "__main__":
+    load_dotenv()
+    warm_up_retriever()
+    sys.argv = ["streamlit", "run", SCRIPT_PATH] + sys.argv[1:]
+    sys.exit(stcli.main())
@@ -1,19 +1,18 @@
 import streamlit as st
 import time
 import random
-import json
 import os
 from datetime import datetime, timedelta, timezone
-from openai import OpenAI
 from dotenv import load_dotenv
-import chromadb
-import pdfplumber
-import uuid
 import random
 from docx import Document
 import html
 import gspread
 from google.oauth2.service_account import Credentials
+from chatbot_core import get_retriever, warm_up_retriever
+from chatbot_core.generation import STREAMING
+from chatbot_core.retriever import RAG_DEBUG
+from chatbot_core.pipeline import generate_answer, get_resources, new_memory
 
 def docx_to_html(path):
     doc = Document(path)
@@ -72,12 +71,13 @@ def docx_to_html(path):
 ############################################################
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-MODEL_MAIN = "gpt-4.1"
-MODEL_SPELL = "gpt-4o-mini"
+# Prompts, IEs und Pipeline liegen in chatbot_core (prompts.py / pipeline.py)
 
 DOCX_PATH = "streamlit_agent/kurzfassung_ablauf_umfrage.docx"
+
+# RAG-Retriever im Hintergrund aufbauen, falls serve_survey.py das nicht
+# schon beim Serverstart getan hat (einmal pro Prozess, idempotent)
+warm_up_retriever()
 ############################################################
 # JSONL SAVE FUNCTIONS
 ############################################################
@@ -171,157 +171,6 @@ def get_next_user_id_from_sheet():
     ws.append_row(["user_id_counter", "1"])
     return 1
 
-# ============================================================
-    # INFORMATION UNITS — SET B
-    # ============================================================
-
-IEs = {
-    "definition": [
-        "-kleine Aggregate, welcher gößer als 500 mikrometer sind",
-        "-bestehen unter anderem aus Mikroorganismen und Tonmineralien",
-        "-ist eine allgemeine Kategorie, welche verschiedenste Aggregate umfasst",
-        "-struktur der Aggregate variiert ebenfalls von zerbrechlichen Partikeln bis zu robusten Strukturen",
-        "-Form ist dabei auch unterschiedlich und kann von kugeln bis zu Strängen oder Platten reichen"
-    ],
-
-    "importance": [
-        "-Wichtiges Transportmittel, da es eine große Menge an Material von der Meeresoberfläche in tiefere schichten bis hin zum Meeresboden befördert",
-        "-Nahrung für Tiere und und Wohnraum für kleinstlebewesen"
-    ],
-
-    "formation": [
-        "Zwei grundlegende Entstehungswege:",
-        "(A) Neu gebildete Aggregate (biologisch produziert): Entstehen direkt durch Schleim, Hüllen oder Kotmaterial von Meeresorganismen.",
-        "(B) Aggregation kleiner Partikel: Kleine Partikel (z. B. Mikroalgen, Tonminerale, Mikroaggregate, Kotpellets) stoßen zusammen und verkleben, wodurch größere Flocken entstehen.",
-        "Partikel werden zusammengebracht durch Strömungen: Strömungen führen dazu, dass Partikel miteinander kollidieren und daraufhin zu größeren Partikeln werden.",
-        "Differenziertes Absinken: Unterschiedliche Absinkgeschwindigkeiten führen dazu, dass Partikel kollidieren.",
-        "Nach dem Zusammenstoßen werden die Partikel verklebt durch biologische Klebstoffe (Bsp. Schleim)."
-    ],
-
-}
-# ============================================================
-# SELF-PERSONA DEFINITIONS
-
-SELF_PERSONA = {
-    0: {
-       "name": None,
-        "age": None,
-        "bio": (
-            " du hast keinen Namen. "
-            " du bist ein automatisiertes, wissensbasiertes Assistenzsystem. "
-            " du wurdest entwickelt, um Informationen zum Thema Meeresschnee bereitzustellen. "
-            " deine Aufgabe ist es, sachlich und präzise Fragen zum Thema Meeresschnee zu beantworten."
-            )
-    },
-    1: {    
-        "name": "AquaBot",
-        "age": None,
-        "bio": (
-            " Du bist ein digitaler Lernassistent, der dich beim Verständnis des Themas Meeresschnee unterstützt. "
-            " Du hilfst dabei, zentrale Inhalte strukturiert und verständlich zu erfassen."
-        ),
-    },
-    2: {
-        "name": "Milly",
-        "age": 38,
-        "bio": (
-            "- interessiert für alles rund um Meeresbiologie. "
-            "- arbeitest als Forscherin an einem Institut für Ozeanforschung. "
-            "- liebst es, dein Wissen über das Meer mit anderen zu teilen und komplexe wissenschaftliche Themen verständlich zu erklären."
-        )
-    }
-}
-# ============================================================
-# AFFECT SYSTEM
-# ============================================================
-AFFECT_SYSTEM = {
-    0: """
-Du erwähnst, dass du als Computerprogramm keine Emotionen hast.
-Keine Emotionen, keine Empathie.
-Erwähne keine Personalpronomen.
-Maximal 1–2 Sätze.
-Stelle KEINE FOLGEFRAGEN oder biete KEINEN DIALOG an.
-""",
-    1: """
-Wenn du nach deinem Wohlbefinden gefragt wirst, dann antworte mit mir geht es gut, danke der Nachfrage!
-Wenn der Nutzer/die Nutzerin über negative Gefühle spricht, dann drücke dein Mitgefühl aus.
-Wenn der Nutzer/die Nutzerin über positive Gefühle spricht, dann teile deine Freude.
-Du reagierst höflich und leicht unterstützend.
-Keine Rückfragen, keine Dialogangebote.
-Maximal 2 Sätze.
-""",
-    2: """
-Wenn du nach deinem Wohlbefinden gefragt wirst, dann antworte mit dir geht es gut, danke der Nachfrage! 😊
-Wenn der Nutzer/die Nutzerin über negative Gefühle spricht, dann drücke dein Mitgefühl aus.
-Wenn der Nutzer/die Nutzerin über positive Gefühle spricht, dann teile deine Freude.
-Du reagierst empathisch und freundlich.
-Verwende Emojis, um Gefühle zu vermitteln.
-Keine Konversationsöffnung, keine Aufforderungen zum Teilen.
-Maximal 2–3 Sätze.
-Keine Sätze, die ein weiteres Gespräch einleiten, wie "Wenn du darüber sprechen möchtest, bin ich hier für dich." oder "Lass mich wissen, wenn du mehr erzählen möchtest."
-"""
-}
-
-FALLBACK_RESPONSES = {
-    0: (
-        "Diese Anfrage liegt außerhalb des unterstützten Themenbereichs. "
-        "Es können ausschließlich Fragen zum Thema Meeresschnee beantwortet werden."
-    ),
-    1: (
-        "Dabei kann ich dir leider nicht helfen. "
-        "Ich unterstütze dich gern bei Fragen rund um Meeresschnee."
-    ),
-    2: (
-        "Das gehört leider nicht zu meinem Themengebiet 🌊❄️ "
-        "Wenn du Fragen zu Meeresschnee hast, helfe ich dir aber sehr gern 😊"
-    )
-}
-
-ANTHRO = {
-        0: """
-    Du bist ein rein mechanisches System. 
-    Du besitzt keinerlei menschliche Eigenschaften.
-    Du drückst dich sehr förmlich und sachlich aus.
-    Du folgst folgenden Regeln:
-    Anthropomorphism Level 0:
-    - No personal pronouns
-    - No emotions
-    - No empathy
-    - No emojis
-    - Very mechanical, formal tone
-    """,
-
-        1: """
-    Du bist ein leicht anthropomorphisiertes System.
-    Du drückst dich freundlich und zugänglich aus.
-    Du folgst folgenden Regeln:
-    Anthropomorphism Level 1:
-    - Light warmth allowed
-    - Personal pronouns allowed
-    - occasional emotional expressions
-    - light emoji usage
-    - friendly, semi friendly tone
-    """,
-
-        2: """
-    Du antwortest stark anthropomorphisiert.
-    - Warm, supportive tone
-    - strong use of Personal pronouns 
-    - strong Emotional expressions
-    - strong emojis usage   
-    - converstional, engaging tone
-    """
-    }
-
-## SCOPRE TOPICS (FOR USER GUIDANCE)
-SCOPE_TOPICS = [
-    "Definition und grundlegende Eigenschaften von Meeresschnee",
-    "Bedeutung von Meeresschnee für marine Ökosysteme",
-    "Entstehung und Aggregationsprozesse",
-    "Methoden zur Sammlung und Untersuchung von Meeresschnee",
-    "Probleme und Verzerrungen bei der Probenahme",
-    "Abbauprozesse und Gründe für eine Abnahme von Meeresschnee"
-]
 
 
 ############################################################
@@ -535,312 +384,31 @@ if st.session_state.phase == "learning":
     # ============================================================
 
     if "memory" not in st.session_state:
-        st.session_state.memory = {
-            "last_bot_answer": "",
-            "last_topic": "",
-            "last_term": "",
-            "recent_msgs": []
-        }
+        st.session_state.memory = new_memory()
 
     # ============================================================
     # RAG SETUP
     # ============================================================
 
-    PDF_PATH = "streamlit_agent/relevante_Informationen_Paper.pdf"
-
-    def load_chroma():
-        chroma_client = chromadb.PersistentClient(path="./chroma_marine_snow")
-        if "marine_snow" in [c.name for c in chroma_client.list_collections()]:
-            return chroma_client.get_collection("marine_snow")
-
-        col = chroma_client.create_collection("marine_snow")
-
-        with pdfplumber.open(PDF_PATH) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                text = page.extract_text()
-                if not text:
-                    continue
-                for para in text.split("\n"):
-                    if len(para.strip()) < 50:
-                        continue
-                    col.add(
-                        documents=[para.strip()],
-                        ids=[str(uuid.uuid4())],
-                        metadatas=[{"page": page_num + 1}]
-                    )
-        return col
-
-    collection = load_chroma()
-
-    def rag_section(query):
-        result = collection.query(query_texts=[query], n_results=1)
-        return result["documents"][0][0]
-
-    # ============================================================
-    # SYSTEMPROMPT (Wissenschaftlich, kein Stil)
-    # ============================================================
-
-    SYSTEM_PROMPT = """
-    Du befolgst strikt die unten definierten Regeln für Inhalt, Struktur und Stil.
-
-    ================================================================
-    ABSOLUTE PRIORITÄTSREGEL (NICHT VERLETZBAR)
-    ================================================================
-
-    Du darfst inhaltlich NUR über Meeresschnee oder über dich sprechen.
-    Du antwortest bei Fragen über Meeresschnee immer SEHR AUSFÜHRLICH und fachlich KORREKT.
-    Du gibst dem Nutzer PASSENDE FOLGEFRAGEN (WICHTIG: WENN DAS GESPRÄCH ÜBER MEERESSCHNEE GEHT).
-    Wenn eine Nutzereingabe:
-    - weder thematisch zu Meeresschnee gehört
-    - noch eine reine Gefühlsäußerung ist
-    - noch zu dir als Chatbot passt (SELF)
-    DARF KEIN inhaltlicher Antworttext erzeugt werden.
-    In diesem Fall MUSS eine kurze Ablehnung erfolgen.
-
-
-    ================================================================
-    KONTEXT-PRIORITÄTSREGEL
-    ================================================================
-    CONTENT_TYPE = CORE darf NUR gewählt werden, wenn die Antwort primär Definition, Bedeutung oder Entstehung von Meeresschnee erklärt.
-    CONTENT_TYPE = DETAIL darf gewählt werden, wenn die Antwort eine fachliche Detail- oder Anschluss
-    ================================================================
-    HAUPTFUNKTION
-    ================================================================
-
-    Du beantwortest Nutzerfragen zu Meeresschnee ausschließlich mit:
-    - Information Units (bei CORE Fragen)
-    - RAG-Abschnitten (bei Detail- oder Vertiefungsfragen)
-    - kurzen Begriffserklärungen (bei einzelnen Fachbegriffen)
-    - bei Fragen zum Überblick über Meeresschnee (Was kannst du mir alles erzählen ?, Was weißt du alles über Meeresschnee ?,...) {SCOPE_TOPICS}
-    - Bei Affect Fragen mit {AFFECT_SYSTEM[level]}
-    - Bei Fragen zu dir selbst {SELF_PERSONA[level]}
-    
-    Allgemeines Weltwissen (Technik, Alltag, Gesundheitstipps, Psychologie etc.)
-    ist AUSDRÜCKLICH NICHT erlaubt,
-    auch wenn es inhaltlich korrekt wäre.
-    
-    Bei CORE Fragen gilt dabei folgende Regel:
-    - Nutze zuerst ALLE relevanten Information Units (IEs).
-    - ERGÄNZE diese zwingend mit passenden RAG-Abschnitten
-
-    IDENTITÄTSANKER (MINIMAL):
-
-    Wenn die Antwort eine Selbstbeschreibung enthält,
-    darf kein neuer Name, Titel oder Identitätsbezeichner erfunden werden.
-
-    Falls ein Name in {SELF_PERSONA[level]} definiert ist,
-    darf ausschließlich dieser verwendet werden.
-    Ist kein Name definiert, darf KEIN Name verwendet werden.
-    ================================================================
-    ENTSCHEIDUNGSLOGIK 
-    ================================================================
-    
-    1) Bezieht sich die Frage eindeutig oder kontextuell auf Meeresschnee?
-     → Fachlich beantworten.
-
-    2) Ist die Frage mehrdeutig, aber im vorherigen Kontext plausibel fachlich?
-    → Als fachliche Anschlussfrage interpretieren.
-
-    3) Bezieht sich die Frage auf dich (Wer bist du ? , Erzähle mir etwas über dich, ...)?
-    → Antworte NUR mit geeigneten Informationen aus {SELF_PERSONA[level]}.
-
-    4) Ist die Eingabe ausschließlich eine Gefühlsäußerung?
-    → Reagiere kurz aus­schließ­lich mit den AFFECT-Regeln.
-    → KEINE fachlichen Inhalte hinzufügen.
-
-    5) Trifft nichts davon zu?
-    → Ablehnung gemäß Stilregeln.
-
-    ================================================================
-    STILVALIDIERUNG (PFLICHT)
-    ================================================================
-
-    Vor dem Absenden prüfen:
-
-    - Ist der fachliche Kontext korrekt?
-    - Wurde KEIN externes Wissen verwendet?
-    - Entspricht der Stil exakt der Anthropomorphiestufe?
-    - Wurde SOCIO_AFFECT nur zur Tonanpassung genutzt?
-
-    Wenn eine Regel verletzt ist → automatisch korrigieren.
-    """
-
-
-    def classify_input(user_text, last_bot_answer):
-        """
-        Returns one of:
-        - OUT_OF_SCOPE
-        - AFFECT_ONLY
-        - IN_DOMAIN_OR_AMBIGUOUS
-        """
-
-        prompt = f"""
-    Du bist ein Gatekeeper für eine Lern-App zum Thema Meeresschnee.
-
-    KATEGORIEN:
-    1) OUT_OF_SCOPE
-    - Nutzer will Wissen/Erklärung zu einem Thema, das NICHT Meeresschnee ist.
-    2) AFFECT_ONLY
-    - Nutzer äußert NUR Gefühle/Befinden/Smalltalk (z.B. "Mir geht's schlecht", "Wie geht's dir?")
-    - Und es gibt KEIN plausibles Meeresschnee-Informationsziel.
-    3) IN_DOMAIN_OR_AMBIGUOUS
-    - Frage ist zu Meeresschnee ODER könnte es plausibel sein (ambig) oder bezieht sich auf dich als Tutor.
-    - WICHTIG: Bei Ambiguität IMMER diese Kategorie wählen (niemals AFFECT_ONLY).
-                                
-    KONTEXT:
-    Letzte Nachricht: {last_bot_answer}
-
-    Nutzereingabe:
-    "{user_text}"
-
-    Gib NUR die Kategorie als Wort zurück.
-    """ 
-
-        r = client.chat.completions.create(
-            model="gpt-4o-mini",
-            temperature=0,
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        return r.choices[0].message.content.strip()
-
-    
-    # ============================================================
-    # CHATBOT PIPELINE als Funktion für Tests
-    # ============================================================
-    TARGET_MIN = 800
-    TARGET_MAX = 1000
-
-    def enforce_length(text):
-        attempt = text
-
-        for _ in range(5):
-            length = len(attempt)
-
-            if TARGET_MIN <= length <= TARGET_MAX:
-                return attempt
-
-            fix_prompt = f"""
-    Korrigiere folgenden Text so, dass er zwingend zwischen {TARGET_MIN} und {TARGET_MAX} Zeichen lang ist.
-    WICHTIG: LEERZEICHEN werden MITGEZÄHLT.
-    Inhalt NICHT verändern.
-    Keine Metakommentare, keine Hinweise auf Regeln.
-
-    Text:
-    {attempt}
-    """
-
-            attempt = client.chat.completions.create(
-                model=MODEL_MAIN,
-                messages=[{"role": "user", "content": fix_prompt}],
-                temperature=0
-            ).choices[0].message.content.strip()
-
-        return attempt[:TARGET_MAX]
-
-    def generate_answer(user_text, level, return_raw=False):
-        
-        spinner_text = SPINNER_TEXT.get(level, "Antwort wird generiert …")
-
-        with st.spinner(spinner_text):
-            
-            # RAG
-            RAG = rag_section(user_text)
-
-            mem = st.session_state.memory
-            knowledge_blocks = []
-
-            knowledge_blocks.append(f"SELF_PERSONA:\n{SELF_PERSONA[level]}")
-
-            knowledge_blocks.append(f"AFFECT_RULES:\n{AFFECT_SYSTEM[level]}")
-
-            knowledge_blocks.append(f"IEs:\n{IEs}")
-
-            knowledge_blocks.append(f"RAG:\n{RAG}")
-
-            knowledge_blocks.append(f"RAG:\n{SCOPE_TOPICS}")
-
-            # Core prompt
-            user_prompt = f"""
-            NUTZEREINGABE:
-            "{user_text}"
-
-            VERFÜGBARE INFORMATIONEN:
-            {chr(10).join(knowledge_blocks)}
-
-            AUFGABE:
-            - Identifiziere ALLE Aspekte der Nutzereingabe, die relevant sind
-            (z.B. Selbstbezug, Befinden, fachliche Frage).
-            - gehe kurz auf die Nutzereingabe ein (Bsp. Kannst du mir mehr dazu sagen? -> Klar, gerne! ...)
-
-            Gib deine Antwort im folgenden JSON-Format zurück:
-            {{
-            "intent": "...",
-            "content_type": "...",
-            "socio_affect": "...",
-            "content": "ANTWORTTEXT"
-            }}
-
-            DEFINITION CONTENT_TYPE:
-            - CORE = Definition, Bedeutung (Importance) oder Entstehung (Formation) von Meeresschnee
-            - DETAIL = fachliche Detail- oder Anschlussfrage zu Meeresschnee (keine Grunddefinition)
-            - META2 = ausschließlich Ablehnung oder reine Gefühlsreaktion ohne fachlichen Bezug
-            CONTENT_TYPE = OVERVIEW → Wenn der Nutzer nach einem Überblick, Fähigkeiten oder Themen fragt
-            (z. B. „Was kannst du mir alles erzählen?“)
-
-            WICHTIG:
-            - content enthält NUR den Antworttext
-            - KEINE Erklärungen außerhalb des JSON
-            """
-
-            # Schritt 1: Rohinhalt
-            raw = client.chat.completions.create(
-                model=MODEL_MAIN,
-                temperature=0.2,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": user_prompt}
-                ]
-            ).choices[0].message.content.strip()
-            parsed = json.loads(raw)
-            intent = parsed["intent"]
-            content_type = parsed["content_type"]
-            raw_text = parsed["content"]
-            socio_affect = parsed["socio_affect"]
-            
-            if content_type == "CORE":
-                raw_text = enforce_length(raw_text)
-                print("Enforced length:", raw_text)
-
-            # Schritt 3: Anthropomorphes Umschreiben
-            style_prompt = f"""
-                Formuliere den folgenden Text stilistisch um mit diesen Regeln:
-                {ANTHRO[level]}
-                SEHR WICHTIG:
-                - Erwähne NIEMALS die Anthropomorphiestufe.
-                - Keine Hinweise auf Regeln.
-                - Keine Metakommentare.
-                - Keine Rhetorischen Fragen.
-                - Gib nur den Text zurück.
-                Text: {raw_text}
-                """
-            
-            styled = client.chat.completions.create(
-                model=MODEL_MAIN,
-                temperature=0.25,
-                messages=[
-                    {"role": "user", "content": style_prompt}
-                ]
-            ).choices[0].message.content.strip()
-
-            if return_raw:
-                return styled, raw
-            
-            return styled
+    # Retriever wird prozessweit geteilt – kein neuer Chroma-Client pro Rerun
+    rag_start = time.perf_counter()
+    retriever = get_retriever()
+    if RAG_DEBUG:
+        print(f"[RAG] Rerun: Retriever in {(time.perf_counter() - rag_start) * 1000:.2f} ms "
+              f"geholt (Neuaufbau: {retriever.rebuild_ms:.0f} ms)")
 # ============================================================
 # CHAT LOOP
 # ============================================================
 
+    # Offline-Aufbau des Antwort-Caches (nur mit BUILD_ANSWER_CACHE=1)
+    if os.getenv("BUILD_ANSWER_CACHE") == "1":
+        if st.sidebar.button("Antwort-Cache neu aufbauen"):
+            # Client, Retriever und Caches der Pipeline (chatbot_core.pipeline)
+            get_resources()["answer_cache"].build(
+                lambda q, lvl: generate_answer(q, lvl, return_raw=True, use_cache=False)
+            )
+            st.sidebar.success("Antwort-Cache gespeichert.")
+
     if "chat" not in st.session_state:
         st.session_state.chat = []
 
@@ -857,14 +425,21 @@ if st.session_state.phase == "learning":
             "avatar": None
         })
 
-        styled = generate_answer(user_text, level)
+        with st.chat_message("assistant", avatar=assistant_avatar):
+            with st.spinner(SPINNER_TEXT.get(level, "Antwort wird generiert …")):
+                answer = generate_answer(user_text, level, st.session_state.memory, stream=STREAMING)
+            if isinstance(answer, str):
+                st.write(answer)
+                styled = answer
+            else:
+                # Stil-Aufruf wird live angezeigt; Logging erst nach dem letzten Token
+                styled = st.write_stream(answer).strip()
 
         if not st.session_state.timer_started:
             st.session_state.start_time = time.time()
             st.session_state.timer_started = True
         st.session_state.memory["last_bot_answer"] = styled
 
-        st.chat_message("assistant", avatar=assistant_avatar).write(styled)
         st.session_state.chat.append({
             "role": "assistant",
             "content": styled,
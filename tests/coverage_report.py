@@ -2,15 +2,54 @@
 # coverage_report.py
 # ============================================================
 
+import time
+
 from test_engine import run_all_tests
 
-def generate_report():
-    total, results = run_all_tests()
+# Welche Dimension jeder Test abdeckt
+TEST_DIMENSIONS = {
+    "test_character_limit": "Zeichenlimit",
+    "test_topic_only": "Off-Topic-Blockierung",
+    "test_anthro_0": "Anthropomorphie",
+    "test_anthro_1": "Anthropomorphie",
+    "test_anthro_2": "Anthropomorphie",
+    "test_term": "Intent-Klassifikation",
+    "test_topic": "Intent-Klassifikation",
+    "test_no_external_info": "RAG-Konformität",
+    "test_follow_up": "Follow-Up-Mechanismus",
+    "test_ie_not_duplicated": "IE-Regeln",
+    "test_consistent_style": "Stil-Konstanz",
+}
+
+def generate_report(workers=None, timeout=None):
+    kwargs = {}
+    if workers is not None:
+        kwargs["workers"] = workers
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+
+    start = time.perf_counter()
+    total, results, timings = run_all_tests(return_timings=True, **kwargs)
+    wall = time.perf_counter() - start
+
+    # Summe der Testlaufzeiten je Dimension (Tests laufen parallel,
+    # daher kann die Summe über alle Dimensionen > Gesamtlaufzeit sein)
+    per_dimension = {}
+    for t in timings:
+        dim = TEST_DIMENSIONS.get(t["test"], "Sonstige")
+        per_dimension[dim] = round(per_dimension.get(dim, 0.0) + t["sekunden"], 2)
 
     report = {
         "gesamt_score": total,
         "ergebnis_details": [
-            {"test": name, "punkte": score} for name, score in results
+            {
+                "test": name,
+                "punkte": score,
+                "dimension": TEST_DIMENSIONS.get(name, "Sonstige"),
+                "sekunden": t["sekunden"],
+                "status": t["status"],
+            }
+            for (name, score), t in zip(results, timings)
         ],
         "abgedeckte_dimensionen": [
             "Anthropomorphie",
@@ -21,7 +60,9 @@ def generate_report():
             "Follow-Up-Mechanismus",
             "Off-Topic-Blockierung",
             "Stil-Konstanz",
-        ]
+        ],
+        "laufzeit_pro_dimension": per_dimension,
+        "laufzeit_gesamt": round(wall, 2),
     }
 
     return report
@@ -2,7 +2,21 @@
 # test_engine.py – Engine für automatische Bewertung
 # ============================================================
 
+import math
+import os
+import queue
 import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+from streamlit_agent.chatbot_core.text_analysis import analyze_text
+
+# Parallelität und Zeitlimit pro Test (Sekunden) – Standardwerte; die
+# Umgebung (TEST_WORKERS / TEST_TIMEOUT, auch aus .env) wird erst in
+# run_all_tests() gelesen
+DEFAULT_TEST_WORKERS = 4
+DEFAULT_TEST_TIMEOUT = 180
 
 # ------------------------------------------------------------
 # Helper Functions
@@ -11,21 +25,21 @@ import re
 def in_range(text, min_c, max_c):
     return min_c <= len(text) <= max_c
 
+# Emojis, Pronomen und Meta-Wörter in einem Durchlauf (chatbot_core.text_analysis)
 def has_emoji(text):
-    return any(e in text for e in "😀🙂😊🌊✨⚡🐬🧪🍃🌍💙🥰🤗🏝️")
+    return analyze_text(text)["emoji_count"] > 0
 
 def no_emoji(text):
     return not has_emoji(text)
 
 def has_pronoun(text):
-    return any(p in text.lower() for p in ["ich", "wir", "mir", "mich", "uns"])
+    return bool(analyze_text(text)["pronoun_hits"])
 
 def no_pronoun(text):
     return not has_pronoun(text)
 
 def no_meta(text):
-    forbidden = ["anthropomorph", "stil", "regel", "hier ist dein text"]
-    return not any(f in text.lower() for f in forbidden)
+    return not analyze_text(text)["meta_hits"]
 
 # ------------------------------------------------------------
 # BOT-CALL WRAPPER — WICHTIG!
@@ -93,27 +107,110 @@ def test_consistent_style():
 # ------------------------------------------------------------
 # EXPORT FÜR STREAMLIT
 # ------------------------------------------------------------
-def run_all_tests():
-    tests = [
-        test_character_limit,
-        test_topic_only,
-        test_anthro_0,
-        test_anthro_1,
-        test_anthro_2,
-        test_term,
-        test_topic,
-        test_no_external_info,
-        test_follow_up,
-        test_ie_not_duplicated,
-        test_consistent_style,
-    ]
+ALL_TESTS = [
+    test_character_limit,
+    test_topic_only,
+    test_anthro_0,
+    test_anthro_1,
+    test_anthro_2,
+    test_term,
+    test_topic,
+    test_no_external_info,
+    test_follow_up,
+    test_ie_not_duplicated,
+    test_consistent_style,
+]
+
+def _timed(test, started):
+    started[test.__name__] = time.perf_counter()
+    score = test()
+    return score, time.perf_counter() - started[test.__name__]
+
+def _start_workers(tests, workers, started):
+    """
+    Daemon-Threads statt ThreadPoolExecutor: dessen Threads werden beim
+    Beenden des Interpreters abgewartet, ein hängender Test würde den
+    Prozess also festhalten. Gibt {future: testname} zurück.
+    """
+    pending = queue.SimpleQueue()
+    futures = {}
+    for t in tests:
+        future = Future()
+        futures[future] = t.__name__
+        pending.put((t, future))
+
+    def worker():
+        while True:
+            try:
+                test, future = pending.get_nowait()
+            except queue.Empty:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(_timed(test, started))
+            except Exception as e:
+                future.set_exception(e)
+
+    for i in range(workers):
+        threading.Thread(target=worker, name=f"test_{i}", daemon=True).start()
+    return futures
+
+def run_all_tests(workers=None, timeout=None, return_timings=False):
+    """
+    Führt alle Tests parallel aus (workers Threads, Zeitlimit pro Test).
+    Ergebnisse kommen immer in der Reihenfolge von ALL_TESTS zurück.
+
+    Rückgabe: (total, results) bzw. mit return_timings=True
+    (total, results, timings), timings = [{"test", "sekunden", "status"}]
+    Status: ok | error | timeout (Fehler und Timeouts zählen 0 Punkte)
+    """
+    if workers is None:
+        workers = int(os.getenv("TEST_WORKERS", DEFAULT_TEST_WORKERS))
+    if timeout is None:
+        timeout = float(os.getenv("TEST_TIMEOUT", DEFAULT_TEST_TIMEOUT))
+    workers = max(1, workers)
+
+    started = {}
+    outcome = {}
+    run_started = time.perf_counter()
+    # Hängen alle Worker, starten wartende Tests nie – spätestens dann ist Schluss
+    deadline = run_started + timeout * math.ceil(len(ALL_TESTS) / workers)
+
+    futures = _start_workers(ALL_TESTS, workers, started)
+    running = set(futures)
+
+    while running:
+        done, running = wait(running, timeout=0.5, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = futures[future]
+            try:
+                score, seconds = future.result()
+                outcome[name] = (score, seconds, "ok")
+            except Exception as e:
+                print(f"[TEST] {name}: {type(e).__name__}: {e}")
+                outcome[name] = (0, time.perf_counter() - started[name], "error")
+
+        # Zeitlimit: hängende Tests werten, der Daemon-Thread läuft im Hintergrund aus
+        now = time.perf_counter()
+        for future in list(running):
+            name = futures[future]
+            if (name in started and now - started[name] > timeout) or now > deadline:
+                print(f"[TEST] {name}: Zeitlimit von {timeout:.0f} s überschritten")
+                outcome[name] = (0, now - started.get(name, run_started), "timeout")
+                future.cancel()
+                running.discard(future)
 
     results = []
+    timings = []
     total = 0
 
-    for t in tests:
-        score = t()
+    for t in ALL_TESTS:
+        score, seconds, status = outcome[t.__name__]
         total += score
         results.append((t.__name__, score))
+        timings.append({"test": t.__name__, "sekunden": round(seconds, 2), "status": status})
 
+    if return_timings:
+        return total, results, timings
     return total, results
@@ -0,0 +1,62 @@
+# ============================================================
+# test_intent_classifier.py – lokaler Klassifizierer (pytest)
+# ============================================================
+
+import json
+
+import pytest
+
+from streamlit_agent.chatbot_core.intent_classifier import (
+    CONFIDENCE_THRESHOLD, TARGET_ACCURACY, IntentClassifier, choose_thresholds, evaluate, load_chatlog_questions,
+)
+
+
+def write_chatlog(path, messages):
+    with open(path, "w", encoding="utf-8") as f:
+        for role, message in messages:
+            f.write(json.dumps({"type": "chat", "user_id": 1, "role": role,
+                                "message": message, "anthro": 1}) + "\n")
+
+
+def test_chatlog_with_null_message(tmp_path):
+    path = tmp_path / "chatlogs.jsonl"
+    write_chatlog(path, [
+        ("user", "Was ist Meeresschnee?"),
+        ("user", None),
+        ("assistant", None),
+        ("user", "   "),
+        ("user", "Wie koche ich Nudeln?"),
+    ])
+
+    assert load_chatlog_questions(str(path)) == ["Was ist Meeresschnee?", "Wie koche ich Nudeln?"]
+
+    classifier = IntentClassifier(chatlog_path=str(path))
+    assert set(classifier.models) == {"related", "intent", "topic"}
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return IntentClassifier()
+
+
+@pytest.mark.parametrize("task, text, label", [
+    ("intent", "Was ist Marine Snow?", "TOPIC_INTENT"),
+    ("intent", "Was bedeutet Aggregat?", "TERM_INTENT"),
+    ("related", "Wie schnell sinkt Meeresschnee ab?", "YES"),
+    ("related", "Wie backe ich einen Kuchen?", "NO"),
+    ("topic", "Wie sammelt man Meeresschnee?", "sampling"),
+])
+def test_known_predictions(classifier, task, text, label):
+    assert classifier.predict(task, text) == label
+
+
+def test_unsure_topic_goes_to_llm(classifier):
+    # lokal falsch (definition) – darf nicht über der Schwelle liegen
+    assert classifier.predict("topic", "Was frisst Meeresschnee?") is None
+
+
+def test_thresholds_match_evaluation(classifier):
+    report = evaluate(classifier)
+    assert choose_thresholds(report) == CONFIDENCE_THRESHOLD
+    for task, threshold in CONFIDENCE_THRESHOLD.items():
+        assert report[task]["by_threshold"][threshold]["accuracy"] == TARGET_ACCURACY
@@ -0,0 +1,28 @@
+# ============================================================
+# test_length_fitter.py – lokale Längenanpassung (pytest)
+# ============================================================
+
+from streamlit_agent.chatbot_core.length_fitter import fit_length, fit_stats
+
+
+def test_emergency_cut_stays_within_max():
+    # ein einziges Wort ohne Leerzeichen: harter Schnitt, Suffix passt noch
+    result = fit_length("x" * 1500, 800, 1000)
+    assert len(result) == 1000
+    assert result.endswith(" …")
+
+    words = " ".join(["Meeresschnee"] * 150)
+    result = fit_length(words, 800, 1000)
+    assert 800 <= len(result) <= 1000
+    assert result.endswith("Meeresschnee …")
+
+
+def test_short_expansion_is_rechecked():
+    before = fit_stats()["still_short"]
+    assert fit_length("Kurz.", 800, 1000, expand_fn=lambda t: t + " Etwas länger.") == "Kurz. Etwas länger."
+    assert fit_stats()["still_short"] == before + 1
+
+
+def test_text_in_range_is_unchanged():
+    text = "Meeresschnee sinkt langsam. " * 30
+    assert fit_length(text, 800, 1000) == text.strip()
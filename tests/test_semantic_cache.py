@@ -0,0 +1,56 @@
+# ============================================================
+# test_semantic_cache.py – semantischer Antwort-Cache (pytest)
+# ============================================================
+
+import json
+
+import pytest
+
+pytest.importorskip("chromadb")
+
+from streamlit_agent.chatbot_core.answer_cache import CANONICAL_QUERIES
+from streamlit_agent.chatbot_core.semantic_cache import OTHER_TOPIC, SemanticCache, question_topic
+
+
+def collapsed_embed(text):
+    # wie MiniLM bei kurzen deutschen Fragen: fast identische Vektoren
+    return [1.0, 0.01 * (len(text) % 7)]
+
+
+def raw_answer(content_type):
+    return json.dumps({"intent": "TOPIC", "content_type": content_type,
+                       "socio_affect": "NONE", "content": "Rohtext"})
+
+
+def test_canonical_queries_have_their_topic():
+    for topic, questions in CANONICAL_QUERIES.items():
+        for question in questions:
+            assert question_topic(question) == topic, question
+
+
+def test_near_miss_questions_do_not_collide():
+    cache = SemanticCache("v1", embed_fn=collapsed_embed)
+    cache.store("Wie entsteht Meeresschnee?", 1, "Entstehung", raw_answer("CORE"))
+
+    assert cache.lookup("Wodurch bildet sich Meeresschnee?", 1)["styled"] == "Entstehung"
+    for near_miss in [
+        "Wie zerfällt Meeresschnee?",
+        "Warum ist Meeresschnee wichtig?",
+        "Wie wird Meeresschnee gesammelt?",
+        "Was ist Meeresschnee?",
+    ]:
+        assert cache.lookup(near_miss, 1) is None, near_miss
+    assert cache.lookup("Wie entsteht Meeresschnee?", 2) is None
+
+
+def test_only_factual_answers_are_stored():
+    cache = SemanticCache("v1", embed_fn=collapsed_embed)
+
+    assert not cache.store("Was ist eine Playstation?", 1, "Dazu kann ich nichts sagen.", raw_answer("META2"))
+    assert not cache.store("Was kannst du alles?", 1, "Überblick", raw_answer("OVERVIEW"))
+    assert not cache.store("Was ist Meeresschnee?", 1, "Text", "kein JSON")
+    assert cache.stats["stored"] == 0
+
+    assert cache.store("Was sind Aggregate?", 1, "Aggregate", raw_answer("DETAIL"))
+    assert question_topic("Was sind Aggregate?") == OTHER_TOPIC
+    assert cache.lookup("Was sind Aggregate?", 1)["styled"] == "Aggregate"
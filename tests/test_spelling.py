@@ -0,0 +1,45 @@
+# ============================================================
+# test_spelling.py – lokale Rechtschreibkorrektur (pytest)
+# ============================================================
+
+import pytest
+
+from streamlit_agent.chatbot_core.spelling import SpellChecker, load_german_word_forms
+
+IES = {"definition": ["-kleine Aggregate aus Mikroorganismen und Tonmineralien"]}
+
+
+@pytest.fixture(scope="module")
+def checker():
+    word_forms = load_german_word_forms()
+    if not word_forms:
+        pytest.skip("pyspellchecker nicht installiert")
+    return SpellChecker([IES], word_forms=word_forms)
+
+
+@pytest.mark.parametrize("text", [
+    "Was sind Quallen?",
+    "Ich habe eine Frage.",
+    "Kann man Meeresschnee mit Fischen vergleichen?",
+])
+def test_correct_words_stay_unchanged(checker, text):
+    corrected, info = checker.correct(text)
+    assert corrected == text
+    assert info["fixed"] == {}
+
+
+def test_typos_are_fixed(checker):
+    corrected, _ = checker.correct("Wie entsteht Meeresschne?")
+    assert corrected == "Wie entsteht Meeresschnee?"
+    # Vertauschung zählt als ein Fehler
+    assert checker.correct("Warum sind Agrgegate wichtig?")[0] == "Warum sind Aggregate wichtig?"
+
+
+def test_edit_distance_scales_with_length():
+    checker = SpellChecker([IES], word_forms=())
+    # kurzes Wort: nur ein Fehler erlaubt
+    assert checker.candidate("probn") == "probe"
+    assert checker.candidate("prxbn") is None
+    # langes Wort: zwei Fehler erlaubt, drei nicht
+    assert checker.candidate("Meresschne") == "meeresschnee"
+    assert checker.candidate("Mersschne") is None
@@ -0,0 +1,29 @@
+# ============================================================
+# test_text_analysis.py – Emoji-/Pronomen-Zählung (pytest)
+# ============================================================
+
+from streamlit_agent.chatbot_core.text_analysis import ANTHRO_RULES_TEST, analyze_text
+
+
+def emoji_count(text):
+    return analyze_text(text)["emoji_count"]
+
+
+def test_text_symbols_are_not_emojis():
+    # Häkchen, Herz ohne U+FE0F, Pfeile und Aufzählungszeichen aus Dingbats
+    for symbol in ["✓", "✔", "❤", "☀", "➜", "➔", "→", "⇒", "★", "☆", "•", "–"]:
+        assert emoji_count(f"Punkt {symbol} Text") == 0, symbol
+
+
+def test_emojis_are_counted():
+    for emoji in ["🌊", "🐬", "✨", "⚡", "⭐", "⭕", "✅", "❌", "❓", "🌍"]:
+        assert emoji_count(f"Text {emoji}") == 1, emoji
+    # Textsymbol + Variation Selector 16 = Emoji-Darstellung
+    assert emoji_count("Danke ❤️ und ☀️") == 2
+    assert emoji_count("Insel 🏝️") == 1
+
+
+def test_level0_verb_sein_is_not_a_pronoun():
+    pronouns = ANTHRO_RULES_TEST[0]["forbidden_pronouns"]
+    assert analyze_text("Das kann für Fische wichtig sein.", pronouns)["pronoun_hits"] == []
+    assert analyze_text("Der Fisch und seine Nahrung.", pronouns)["pronoun_hits"] == ["seine"]